@@ -0,0 +1,139 @@
+import numpy as np
+
+from backends import backend_for
+
+# ----------------------------
+# Settings
+# ----------------------------
+# Figures built from these summaries stay the same size whatever the row count.
+MAX_HISTOGRAM_BINS = 200
+MAX_OUTLIER_POINTS = 500
+KDE_GRID_SIZE = 256
+
+# ----------------------------
+# Helpers
+# ----------------------------
+def finite_values(series):
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return values[np.isfinite(values)]
+
+def grouped(df, category_col, value_col):
+    # Drops rows with a missing category or value; groups keep first-appearance
+    # order, like Plotly Express does for categorical axes.
+    data = df[[category_col, value_col]].dropna()
+    return data.groupby(category_col, sort=False, observed=True)[value_col]
+
+# ----------------------------
+# Histograms and Group Aggregates
+# ----------------------------
+def auto_bin_count(values):
+    # numpy's "auto" rule (the narrower of the Sturges and relaxed
+    # Freedman-Diaconis widths, the latter at most 2 * sqrt(n) bins) as a bin
+    # count, so it can be capped before any edges are built; heavy tails would
+    # otherwise ask for millions of them.
+    if values.size == 0:
+        return 1
+    span = values.max() - values.min()
+    if span == 0:
+        return 1
+    sturges = np.log2(values.size) + 1.0
+    q25, q75 = np.percentile(values, [25, 75])
+    fd_width = 2.0 * (q75 - q25) * values.size ** (-1.0 / 3.0)
+    fd = 2.0 * np.sqrt(values.size)
+    if fd_width > 0:
+        fd = min(fd, span / fd_width)
+    return int(np.ceil(max(sturges, fd)))
+
+def histogram_bins(values, max_bins=MAX_HISTOGRAM_BINS):
+    counts, edges = np.histogram(values, bins=min(auto_bin_count(values), max_bins))
+    return counts, edges
+
+def group_means(df, category_col, value_col):
+    return grouped(df, category_col, value_col).mean().reset_index()
+
+def category_counts(df, category_col):
+    counts = df.groupby(category_col, sort=False, observed=True).size()
+    return counts.rename("count").reset_index()
+
+GROUP_AGGREGATIONS = ("mean", "median", "sum")
+
+def group_aggregates(df, category_col, value_cols, how="mean"):
+    # One row per category, in order of first appearance, and one column per
+    # value column, from a single groupby; missing values are skipped per
+    # column. Large frames are grouped by the execution backend.
+    if how not in GROUP_AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation '{how}'. Choose one of: {', '.join(GROUP_AGGREGATIONS)}")
+    value_cols = list(value_cols)
+    table = backend_for(df).group_reduce(df, category_col, value_cols, how)
+    if table is not None:
+        return table
+    return df[[category_col] + value_cols].groupby(category_col, sort=False, observed=True)[value_cols].agg(how)
+
+def min_max_normalize(table):
+    # Scales each column to 0..1 so metrics on different scales share an axis;
+    # a column with a single value maps to 0.
+    low, high = table.min(), table.max()
+    extent = (high - low).where(high > low, 1.0)
+    return (table - low) / extent
+
+# ----------------------------
+# Box Statistics
+# ----------------------------
+def box_stats(values, max_outliers=MAX_OUTLIER_POINTS, seed=0):
+    # Quartiles use linear interpolation (Plotly's default); whiskers reach
+    # the most extreme values within 1.5 IQR; outliers are capped to a sample
+    # that always keeps the minimum and maximum.
+    if values.size == 0:
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outliers = values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)]
+    n_outliers = outliers.size
+    if n_outliers > max_outliers:
+        rng = np.random.default_rng(seed)
+        keep = rng.choice(n_outliers, max_outliers - 2, replace=False)
+        outliers = np.concatenate([outliers[keep], [outliers.min(), outliers.max()]])
+    return {
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "lowerfence": inside.min() if inside.size else q1,
+        "upperfence": inside.max() if inside.size else q3,
+        "outliers": outliers,
+        "n_outliers": n_outliers,
+        "count": values.size,
+    }
+
+def group_box_stats(df, category_col, value_col, max_outliers=MAX_OUTLIER_POINTS):
+    stats = {}
+    for name, series in grouped(df, category_col, value_col):
+        result = box_stats(finite_values(series), max_outliers=max_outliers)
+        if result is not None:
+            stats[name] = result
+    return stats
+
+# ----------------------------
+# Kernel Density
+# ----------------------------
+def kde_grid(values, grid_size=KDE_GRID_SIZE):
+    # Binned Gaussian KDE: values are counted onto a fixed grid and convolved
+    # with the kernel, so the cost is linear in rows and the output size is
+    # fixed. Bandwidth follows Silverman's rule, as Plotly's violins do.
+    n = values.size
+    if n == 0:
+        return np.array([]), np.array([])
+    std = values.std(ddof=1) if n > 1 else 0.0
+    q1, q3 = np.percentile(values, [25, 75])
+    spread = min(std, (q3 - q1) / 1.349) or std
+    bandwidth = 1.059 * spread * n ** (-1 / 5) if spread > 0 else 1.0
+    lo, hi = values.min() - 3 * bandwidth, values.max() + 3 * bandwidth
+    counts, edges = np.histogram(values, bins=grid_size, range=(lo, hi))
+    grid = (edges[:-1] + edges[1:]) / 2
+    step = grid[1] - grid[0]
+    half_width = int(np.ceil(4 * bandwidth / step))
+    offsets = np.arange(-half_width, half_width + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    density = np.convolve(counts, kernel)[half_width:half_width + grid_size]
+    density = density / (n * bandwidth * np.sqrt(2 * np.pi))
+    return grid, density
@@ -1,9 +1,20 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import io
-from contextlib import redirect_stdout
-from plot_functions import *
+import json
+from plot_functions import job_progress, session_id, show_figure
+from charts import CHART_TYPES, chart_panel, figure_cache
+from rendering import DEFAULT_POINT_BUDGET
+from data_cleaning import clean_data_cached
+from caching import hash_bytes, hash_key
+from ingestion import read_csv_streaming, read_files, excel_sheet_names, DEFAULT_MEMORY_LIMIT_MB
+from profiling import get_profile
+from projects import project_store
+from filters import FILTER_MAX_OPTIONS, filter_code, filter_frame
+from exports import EXPORT_FORMATS, available_formats, cached_export, export_frame
+from jobs import job_manager, DONE, FAILED, JOB_INLINE_WAIT_SECONDS
+from instrumentation import (
+    RECENT_JOB_TRACES, span, start_trace, end_trace, save_trace, available_profilers, RunProfiler,
+)
 
 # ----------------------------
 # App Configuration
@@ -23,6 +34,52 @@ if 'cleaning_summary' not in st.session_state:
     st.session_state.cleaning_summary = []
 if 'uploaded_file_name' not in st.session_state:
     st.session_state.uploaded_file_name = None
+if 'cleaning_timings' not in st.session_state:
+    st.session_state.cleaning_timings = []
+if 'file_hash' not in st.session_state:
+    st.session_state.file_hash = None
+if 'ingest_options' not in st.session_state:
+    st.session_state.ingest_options = None
+if 'ingest_info' not in st.session_state:
+    st.session_state.ingest_info = None
+if 'ingest_stats' not in st.session_state:
+    st.session_state.ingest_stats = None
+if 'load_info' not in st.session_state:
+    st.session_state.load_info = None
+if 'sheet_names' not in st.session_state:
+    st.session_state.sheet_names = {}
+if 'profile_request' not in st.session_state:
+    st.session_state.profile_request = None
+if 'profile_result' not in st.session_state:
+    st.session_state.profile_result = None
+if 'clean_job' not in st.session_state:
+    st.session_state.clean_job = None
+if 'cleaned_key' not in st.session_state:
+    st.session_state.cleaned_key = None
+if 'clean_options' not in st.session_state:
+    st.session_state.clean_options = None
+if 'project_id' not in st.session_state:
+    st.session_state.project_id = None
+if 'job_traces' not in st.session_state:
+    st.session_state.job_traces = []
+
+# ----------------------------
+# Instrumentation
+# ----------------------------
+# With the performance panel on, every run is traced; the profiler is armed by
+# a button and captures the run after the click (the user's next interaction).
+perf_enabled = st.session_state.get("perf_panel", False)
+if perf_enabled:
+    start_trace("rerun", measure_payload=st.session_state.get("perf_payload", False))
+run_profiler = None
+if st.session_state.profile_request == "now":
+    st.session_state.profile_request = None
+    try:
+        run_profiler = RunProfiler(st.session_state.get("perf_profiler", "cProfile")).start()
+    except (RuntimeError, ValueError) as e:
+        st.session_state.profile_result = {"kind": "error", "report": f"Could not start the profiler: {e}"}
+elif st.session_state.profile_request == "next":
+    st.session_state.profile_request = "now"
 
 # ----------------------------
 # Functions
@@ -30,126 +87,338 @@ if 'uploaded_file_name' not in st.session_state:
 def set_chart_type(chart):
     st.session_state.chart_type = chart
 
-def clean_data(df, normalize_text=True, drop_empty_cols=True, missing_choice="Fill", remove_outliers=False):
-    df = df.copy()
-    summary = []
-
-    # 1. Remove duplicates
-    duplicates_before = df.duplicated().sum()
-    if duplicates_before > 0:
-        df.drop_duplicates(inplace=True)
-        summary.append(f"✅ Removed {duplicates_before} duplicate row(s).")
-
-    # 2. Trim and normalize text
-    object_cols = df.select_dtypes(include=['object']).columns
-    if len(object_cols) > 0:
-        df[object_cols] = df[object_cols].apply(lambda x: x.str.strip())
-        if normalize_text:
-            df[object_cols] = df[object_cols].apply(lambda x: x.str.lower())
-            summary.append("✅ Trimmed whitespace & normalized text columns to lowercase.")
+def run_cleaning_job(job, df, source_hash, options):
+    return clean_data_cached(df, source_hash, progress=job.report, **options)
+
+def submit_clean_job(options):
+    # Cleaning runs in the background; the same file and options reuse a job
+    # that is already running or finished.
+    job = job_manager.submit(
+        hash_key("clean", st.session_state.file_hash, options),
+        "Cleaning",
+        run_cleaning_job,
+        st.session_state.original_df,
+        st.session_state.file_hash,
+        options,
+        waiter=session_id()
+    )
+    st.session_state.clean_job = job.id
+    return job
+
+def forget_clean_job():
+    st.session_state.clean_job = None
+
+def apply_clean_job():
+    # Moves a finished background cleaning into the session; True once applied.
+    job = job_manager.get(st.session_state.clean_job) if st.session_state.clean_job else None
+    if job is None or not job.is_finished:
+        return False
+    result = job.result
+    if job.status == DONE and result is None:
+        # The result was dropped from memory before this session read it;
+        # rerunning the job is mostly served from the cleaning cache.
+        if st.session_state.original_df is not None:
+            submit_clean_job(st.session_state.clean_options)
+        return False
+    st.session_state.clean_job = None
+    if job.status == DONE:
+        df, summary, timings = result
+        st.session_state.cleaned_df = df
+        st.session_state.cleaned_key = job.id
+        st.session_state.cleaning_summary = summary
+        st.session_state.cleaning_timings = timings
+        if st.session_state.project_id is not None:
+            # Saved as a new version of the project, tagged with its options.
+            job_manager.submit(
+                hash_key("save", job.id), "Saving cleaned version", run_save_version_job,
+                st.session_state.project_id, job.id, df, st.session_state.clean_options, summary, timings
+            )
+        if all(t["cached"] for t in timings):
+            st.toast("Data has been cleaned! (served from cache)", icon="⚡")
         else:
-            summary.append("✅ Trimmed whitespace in text columns.")
-
-    # 3. Drop completely empty columns
-    if drop_empty_cols:
-        empty_cols = [col for col in df.columns if df[col].isnull().all()]
-        if empty_cols:
-            df.drop(columns=empty_cols, inplace=True)
-            summary.append(f"🗑️ Dropped {len(empty_cols)} empty column(s): {empty_cols}")
-
-    # 4. Handle missing values
-    if missing_choice == "Fill":
-        for col in df.columns:
-            if df[col].isnull().any():
-                missing_count = df[col].isnull().sum()
-                if pd.api.types.is_numeric_dtype(df[col]):
-                    median = df[col].median()
-                    df[col].fillna(median, inplace=True)
-                    summary.append(f"✅ Filled {missing_count} missing value(s) in numeric column '{col}' with median ({median:.2f}).")
-                else:
-                    mode = df[col].mode().iloc[0] if not df[col].mode().empty else "Unknown"
-                    df[col].fillna(mode, inplace=True)
-                    summary.append(f"✅ Filled {missing_count} missing value(s) in categorical column '{col}' with mode ('{mode}').")
-    elif missing_choice == "Drop":
-        before_rows = df.shape[0]
-        df.dropna(inplace=True)
-        dropped = before_rows - df.shape[0]
-        summary.append(f"🗑️ Dropped {dropped} row(s) containing missing values.")
+            st.toast(f"Data has been cleaned in {job.elapsed:.1f}s!", icon="✅")
+    elif job.status == FAILED:
+        st.toast(f"Cleaning failed: {job.error}", icon="❌")
     else:
-        summary.append("⚠️ Left missing values as NaN (no imputation).")
-
-    # 5. Convert numeric-like text safely
-    conversion_report = {}
-    for col in object_cols:
-        try:
-            df[col] = pd.to_numeric(df[col], errors="raise")
-            conversion_report[col] = "Converted to numeric"
-        except Exception:
-            df[col] = df[col].astype(str).str.strip()
-            conversion_report[col] = "Kept as text"
-    if conversion_report:
-        for k, v in conversion_report.items():
-            summary.append(f"🔄 Column '{k}': {v}")
-
-    # 6. Standardize categorical text (title case)
-    for col in df.select_dtypes(include=['object']).columns:
-        df[col] = df[col].str.title()
-
-    # 7. Convert datetime columns
-    for col in df.columns:
-        if any(keyword in col.lower() for keyword in ['date', 'time', 'day']):
+        st.toast("Cleaning cancelled.", icon="🛑")
+    return True
+
+def run_save_raw_job(job, project_id, name, df):
+    job.report(0.0, "Writing data to the project store")
+    project_store.save_raw(project_id, name, df)
+
+def run_save_version_job(job, project_id, key, df, options, summary, timings):
+    job.report(0.0, "Writing cleaned data to the project store")
+    project_store.save_version(project_id, key, df, options, summary, timings)
+
+def open_project(project_id, version, upload_name, ingest_options):
+    # Frames are memory-mapped from the store; nothing is parsed or cleaned.
+    project = project_store.get(project_id)
+    raw = project_store.load_raw(project_id)
+    if project is None or raw is None:
+        st.toast("This project is no longer in the store.", icon="❌")
+        return
+    cleaned = project_store.load_version(project_id, version) if version is not None else None
+    entry = project["versions"].get(version) if cleaned is not None else None
+    st.session_state.original_df = raw
+    st.session_state.cleaned_df = cleaned
+    st.session_state.cleaned_key = version if cleaned is not None else None
+    st.session_state.cleaning_summary = entry["summary"] if entry else []
+    st.session_state.cleaning_timings = entry["timings"] if entry else []
+    st.session_state.ingest_info = None
+    st.session_state.ingest_stats = None
+    st.session_state.load_info = None
+    st.session_state.clean_job = None
+    st.session_state.project_id = project_id
+    # The project's hash keys the cleaning and figure caches like a fresh
+    # upload would; the current uploads are recorded so they do not replace
+    # the project until they change.
+    st.session_state.file_hash = project_id
+    st.session_state.uploaded_file_name = upload_name
+    st.session_state.ingest_options = ingest_options
+    st.toast(f"Opened project '{project['name']}'.", icon="📂")
+
+def describe_version(entry):
+    options = ", ".join(f"{k}={v}" for k, v in (entry["options"] or {}).items())
+    return f"Cleaned: {entry['rows']:,} rows ({options})"
+
+def render_saved_figures(project_id):
+    project = project_store.get(project_id)
+    figures = project["figures"] if project is not None else {}
+    if not figures:
+        return
+    with st.expander(f"💾 Saved Charts ({len(figures)})"):
+        key = st.selectbox(
+            "Chart",
+            sorted(figures, key=lambda k: figures[k]["created"], reverse=True),
+            format_func=lambda k: f"{figures[k]['chart']}: " + ", ".join(
+                f"{name}={value}" for name, value in figures[k]["params"].items() if value is not None
+            ),
+            key="saved_figure"
+        )
+        stored = figure_cache.get(key)
+        if stored is None:
+            stored = project_store.load_figure(project_id, key)
+            if stored is not None:
+                figure_cache.put(key, stored)
+        if stored is not None:
+            show_figure(stored[0], key="saved_figure_chart")
+
+def render_filter_panel(df):
+    # Predicates for the chart section, built from the filter widgets. Columns
+    # whose widgets still cover everything add no predicate.
+    profile = get_profile(df)
+    predicates = []
+    with st.expander("🔎 Filter Rows for Charts"):
+        columns = st.multiselect("Filter by", profile.columns, key="filter_columns")
+        for col in columns:
+            if col in profile.datetime_columns:
+                low, high = profile.min_max(col)
+                if low is None:
+                    continue
+                picked = st.date_input(
+                    f"{col} between", value=(low.date(), high.date()),
+                    min_value=low.date(), max_value=high.date(), key=f"filter_dates_{col}"
+                )
+                if len(picked) == 2 and (picked[0] > low.date() or picked[1] < high.date()):
+                    end = pd.Timestamp(picked[1]) + pd.Timedelta(days=1)
+                    predicates.append(("dates", col, pd.Timestamp(picked[0]).isoformat(), end.isoformat()))
+            elif col in profile.numeric_columns:
+                low, high = profile.min_max(col)
+                if low is None or low == high:
+                    continue
+                cast = int if pd.api.types.is_integer_dtype(profile.dtypes[col]) else float
+                low, high = cast(low), cast(high)
+                picked = st.slider(f"{col} range", low, high, (low, high), key=f"filter_range_{col}")
+                if picked != (low, high):
+                    predicates.append(("range", col, picked[0], picked[1]))
+            else:
+                picked = st.multiselect(
+                    f"{col} is one of", list(profile.top_values(col, k=FILTER_MAX_OPTIONS).index),
+                    key=f"filter_in_{col}", help=f"Lists the {FILTER_MAX_OPTIONS} most frequent values."
+                )
+                if picked:
+                    predicates.append(("in", col, tuple(picked)))
+        if predicates:
+            st.code(filter_code(predicates), language="python")
+    return predicates
+
+def list_sheets(files):
+    sheet_names = {}
+    for f in files:
+        if f.name.endswith('.xlsx'):
             try:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-                summary.append(f"📅 Converted '{col}' to datetime.")
-            except:
-                pass
-
-    # 8. Drop irrelevant columns (all null or constant)
-    df = df.dropna(axis=1, how='all')
-    df = df.loc[:, df.nunique() > 1]
-
-    # 9. Outlier handling
-    numeric_cols = df.select_dtypes(include=np.number).columns
-    if remove_outliers:
-        outlier_report = {}
-        for col in numeric_cols:
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            before = df.shape[0]
-            df = df[(df[col] >= lower_bound) & (df[col] <= upper_bound)]
-            removed = before - df.shape[0]
-            if removed > 0:
-                outlier_report[col] = removed
-        if outlier_report:
-            for k, v in outlier_report.items():
-                summary.append(f"🗑️ Removed {v} outlier(s) from '{k}' using IQR.")
-        else:
-            summary.append("✅ No outliers detected/removed with IQR.")
-    else:
-        for col in numeric_cols:
-            mean, std = df[col].mean(), df[col].std()
-            if std > 0:
-                outliers = df[(df[col] - mean).abs() > 3 * std].shape[0]
-                if outliers > 0:
-                    summary.append(f"⚠️ Detected {outliers} potential outlier(s) in '{col}' (|z| > 3). Not removed.")
-
-    return df, summary
+                sheet_names[f.name] = excel_sheet_names(f.getvalue())
+            except Exception:
+                # Unreadable workbooks are reported when the data is loaded.
+                sheet_names[f.name] = []
+    return sheet_names
+
+def arm_profiler():
+    st.session_state.profile_request = "next"
+    st.session_state.profile_result = None
+
+def render_performance_panel(trace):
+    with st.expander("⏱️ Performance", expanded=True):
+        if trace is not None:
+            render_trace(trace)
+            # Jobs submitted by this run usually finish after it, so they are
+            # listed (and filled in) on later runs too.
+            st.session_state.job_traces = (trace.children + st.session_state.job_traces)[:RECENT_JOB_TRACES]
+        if st.session_state.job_traces:
+            render_job_traces(st.session_state.job_traces)
+        result = st.session_state.profile_result
+        if result is not None:
+            st.subheader(f"Profile ({result['kind']})")
+            st.code(result["report"], language=None)
+            if "data" in result:
+                st.download_button("⬇️ Raw profile", data=result["data"],
+                                   file_name=f"plotpilot_profile.{result['extension']}")
+
+def trace_table(trace):
+    rows = []
+    for depth, s in trace.ordered_spans():
+        attrs = s.attributes
+        details = ", ".join(
+            f"{k}={v}" for k, v in attrs.items()
+            if k not in ("rows_in", "rows_out", "memory_delta_bytes", "payload_bytes")
+        )
+        rows.append({
+            "Span": "\u2003" * depth + s.name,
+            "Time (ms)": round(s.seconds * 1000, 1),
+            "Rows In": attrs.get("rows_in"),
+            "Rows Out": attrs.get("rows_out"),
+            "Memory Δ (MB)": round(attrs["memory_delta_bytes"] / (1024 * 1024), 1) if "memory_delta_bytes" in attrs else None,
+            "Payload (KB)": round(attrs["payload_bytes"] / 1024, 1) if "payload_bytes" in attrs else None,
+            "Details": details,
+        })
+    return pd.DataFrame(rows).astype({"Rows In": "Int64", "Rows Out": "Int64"})
+
+def render_trace(trace):
+    st.caption(f"This run: {trace.root.seconds:.3f}s. Browser rendering time is not included.")
+    st.dataframe(trace_table(trace), hide_index=True, use_container_width=True)
+
+    col1, col2, col3 = st.columns(3)
+    if col1.button("Save trace to disk"):
+        plain_path, otlp_path = save_trace(trace)
+        st.caption(f"Saved {plain_path} and {otlp_path}")
+    col2.download_button("⬇️ Trace (JSON)", data=json.dumps(trace.to_dict(), indent=2, default=str),
+                         file_name=f"trace_{trace.trace_id}.json", mime="application/json")
+    col3.download_button("⬇️ Trace (OTLP JSON)", data=json.dumps(trace.to_otlp(), indent=2, default=str),
+                         file_name=f"trace_{trace.trace_id}.otlp.json", mime="application/json")
+
+def render_job_traces(job_traces):
+    st.subheader("Background Jobs")
+    for job_trace in job_traces:
+        if not job_trace.finished:
+            st.caption(f"{job_trace.name}: still running.")
+            continue
+        st.caption(f"{job_trace.name}: {job_trace.root.seconds:.3f}s from submission "
+                   f"({job_trace.root.attributes.get('status')}).")
+        st.dataframe(trace_table(job_trace), hide_index=True, use_container_width=True)
+        st.download_button("⬇️ Job trace (JSON)", data=json.dumps(job_trace.to_dict(), indent=2, default=str),
+                           file_name=f"trace_{job_trace.trace_id}.json", mime="application/json",
+                           key=f"job_trace_{job_trace.trace_id}")
 
 # ----------------------------
 # Sidebar Controls
 # ----------------------------
 with st.sidebar:
     st.header("1. Upload Your Data")
-    uploaded_file = st.file_uploader("Choose a CSV or Excel file", type=["csv", "xlsx"])
+    uploaded_files = st.file_uploader(
+        "Choose CSV or Excel files",
+        type=["csv", "xlsx"],
+        accept_multiple_files=True,
+        help="Several files (or sheets) are stacked into one dataset, matching columns by name."
+    )
+    upload_name = ", ".join(f.name for f in uploaded_files)
+    if st.session_state.get('uploaded_file_name') != upload_name:
+        st.session_state.sheet_names = list_sheets(uploaded_files)
+
+    sheet_selection = {}
+    for name, sheets in st.session_state.sheet_names.items():
+        if len(sheets) > 1:
+            sheet_selection[name] = tuple(st.multiselect(f"Sheets in {name}", sheets, default=sheets[:1], key=f"sheets_{name}"))
+    n_parts = sum(len(sheet_selection.get(f.name) or (None,)) for f in uploaded_files)
+    add_source = st.checkbox(
+        "Add a source column",
+        value=True,
+        disabled=n_parts < 2,
+        help="Records the file (and sheet) each row came from when several are combined."
+    )
+
+    with st.expander("Large file options"):
+        streaming_mode = st.toggle(
+            "Streaming CSV ingestion",
+            value=False,
+            help="Reads a single CSV in chunks with compact dtypes and computes statistics as chunks arrive."
+        )
+        memory_limit_mb = st.number_input("Memory cap (MB)", min_value=64, value=DEFAULT_MEMORY_LIMIT_MB, step=256)
+        compact_dtypes = st.checkbox("Compact dtypes (category text, downcast numbers)", value=True)
+    streaming_csv = streaming_mode and len(uploaded_files) == 1 and uploaded_files[0].name.endswith('.csv')
+    if streaming_csv:
+        ingest_options = (memory_limit_mb, compact_dtypes)
+    else:
+        ingest_options = (tuple(sorted(sheet_selection.items())), add_source and n_parts > 1)
 
-    if uploaded_file and st.session_state.get('uploaded_file_name') != uploaded_file.name:
+    if uploaded_files and (
+        st.session_state.get('uploaded_file_name') != upload_name
+        or st.session_state.ingest_options != ingest_options
+    ):
         st.session_state.cleaned_df = None
+        st.session_state.cleaned_key = None
         st.session_state.original_df = None
         st.session_state.cleaning_summary = []
-        st.session_state.uploaded_file_name = uploaded_file.name
+        st.session_state.cleaning_timings = []
+        st.session_state.ingest_info = None
+        st.session_state.ingest_stats = None
+        st.session_state.load_info = None
+        st.session_state.clean_job = None
+        st.session_state.project_id = None
+        st.session_state.uploaded_file_name = upload_name
+        st.session_state.ingest_options = ingest_options
+        # The loaded frame depends on the ingestion options, so they are part of its key.
+        st.session_state.file_hash = hash_key(tuple(hash_bytes(f.getvalue()) for f in uploaded_files), ingest_options)
+
+    with st.expander("Projects"):
+        save_project = st.checkbox(
+            "Save uploads to the project store",
+            value=False,
+            key="save_project",
+            help=f"Loaded data, cleaned versions and charts are kept on disk in {project_store.directory} "
+                 "and can be reopened after a restart."
+        )
+        saved_projects = project_store.projects()
+        if saved_projects:
+            project_id = st.selectbox(
+                "Saved projects",
+                [p["id"] for p in saved_projects],
+                format_func=lambda pid: next(
+                    f"{p['name']} ({p['raw']['rows']:,} rows, {len(p['versions'])} cleaned)"
+                    for p in saved_projects if p["id"] == pid
+                ),
+                key="project_choice"
+            )
+            versions = next(p["versions"] for p in saved_projects if p["id"] == project_id)
+            version = st.selectbox(
+                "Version",
+                [None] + sorted(versions, key=lambda k: versions[k]["created"], reverse=True),
+                format_func=lambda k: "Raw data" if k is None else describe_version(versions[k]),
+                key="project_version"
+            )
+            col1, col2 = st.columns(2)
+            if col1.button("Open", use_container_width=True):
+                open_project(project_id, version, upload_name, ingest_options)
+            if col2.button("Delete", use_container_width=True):
+                project_store.delete(project_id)
+                if st.session_state.project_id == project_id:
+                    st.session_state.project_id = None
+                st.rerun()
+            st.caption(f"Store: {project_store.usage() / (1024 * 1024):,.0f} of "
+                       f"{project_store.max_bytes / (1024 * 1024):,.0f} MB used; least recently used items are removed first.")
+        else:
+            st.caption("No saved projects yet.")
+    has_data = bool(uploaded_files) or st.session_state.project_id is not None
 
     st.divider()
     st.header("2. Data Cleaning Options")
@@ -163,26 +432,55 @@ with st.sidebar:
     normalize_text = st.checkbox("Normalize text to lowercase", value=True)
     remove_outliers = st.checkbox("Remove numeric outliers (IQR method)", value=False)
 
-    if uploaded_file:
+    if has_data:
+        apply_clean_job()
         if st.button("Clean & Prepare Data", use_container_width=True):
             if st.session_state.original_df is not None:
-                df, summary = clean_data(
-                    st.session_state.original_df,
-                    normalize_text=normalize_text,
-                    drop_empty_cols=drop_empty_cols,
-                    missing_choice=missing_choice,
-                    remove_outliers=remove_outliers
-                )
-                st.session_state.cleaned_df = df
-                st.session_state.cleaning_summary = summary
-                st.toast("Data has been cleaned!", icon="✅")
+                options = {
+                    "normalize_text": normalize_text,
+                    "drop_empty_cols": drop_empty_cols,
+                    "missing_choice": missing_choice,
+                    "remove_outliers": remove_outliers,
+                }
+                st.session_state.clean_options = options
+                with span("clean", rows_in=len(st.session_state.original_df)) as clean_span:
+                    job = submit_clean_job(options)
+                    # Short jobs (and cache hits) finish within this run.
+                    job.wait(JOB_INLINE_WAIT_SECONDS)
+                    clean_span.set(job=job.id, status=job.status)
+                apply_clean_job()
 
         if st.session_state.cleaned_df is not None:
             if st.button("Revert to Raw Data", use_container_width=True):
                 st.session_state.cleaned_df = None
+                st.session_state.cleaned_key = None
                 st.session_state.cleaning_summary = []
+                st.session_state.cleaning_timings = []
                 st.toast("Reverted to raw data.", icon="↩️")
 
+    st.divider()
+    st.header("Chart Rendering")
+    st.number_input(
+        "Max points per chart",
+        min_value=1_000,
+        max_value=1_000_000,
+        value=DEFAULT_POINT_BUDGET,
+        step=5_000,
+        key="point_budget",
+        help="Charts with more rows than this are decimated, binned or drawn with WebGL."
+    )
+
+    st.divider()
+    st.header("Performance")
+    st.toggle("Show performance panel", key="perf_panel",
+              help="Times each step of a run (loading, cleaning stages, statistics, chart building and rendering).")
+    st.checkbox("Measure figure payload size", key="perf_payload", disabled=not perf_enabled,
+                help="Serializes each figure an extra time to report its size.")
+    st.selectbox("Profiler", available_profilers(), key="perf_profiler")
+    st.button("Profile next interaction", on_click=arm_profiler, use_container_width=True)
+    if st.session_state.profile_request is not None:
+        st.caption("The next interaction will be profiled.")
+
     st.divider()
     st.write("Done with a plot?")
     if st.button("Clear Plot Selection"):
@@ -192,13 +490,56 @@ with st.sidebar:
 # ----------------------------
 # Main Panel
 # ----------------------------
-if uploaded_file is not None:
+if has_data:
     try:
         if st.session_state.original_df is None:
-            if uploaded_file.name.endswith('.csv'):
-                st.session_state.original_df = pd.read_csv(uploaded_file)
-            else:
-                st.session_state.original_df = pd.read_excel(uploaded_file)
+            with span("load", file=upload_name, streaming=streaming_csv) as load_span:
+                if streaming_csv:
+                    # Show the first chunk as soon as it is parsed.
+                    preview_slot = st.empty()
+                    progress_slot = st.empty()
+
+                    def show_progress(chunk, stats, total_bytes):
+                        if stats.chunks == 1:
+                            with preview_slot.container():
+                                st.subheader("Data Preview (streaming):")
+                                st.dataframe(chunk.head())
+                        progress_slot.info(f"Reading file… {stats.rows:,} rows parsed in {stats.chunks} chunk(s).")
+
+                    df, stats, info = read_csv_streaming(
+                        uploaded_files[0],
+                        memory_limit_mb=memory_limit_mb,
+                        compact_dtypes=compact_dtypes,
+                        on_chunk=show_progress
+                    )
+                    preview_slot.empty()
+                    progress_slot.empty()
+                    st.session_state.original_df = df
+                    st.session_state.ingest_stats = stats
+                    st.session_state.ingest_info = info
+                else:
+                    # Workbook sheets are parsed in parallel and kept in the
+                    # parsed-file cache, so reopening a workbook skips parsing.
+                    with st.spinner("Reading files..."):
+                        df, load_info = read_files(
+                            [(f.name, f.getvalue()) for f in uploaded_files],
+                            sheets=dict(sheet_selection),
+                            add_source=add_source
+                        )
+                    st.session_state.original_df = df
+                    st.session_state.load_info = load_info
+                    load_span.set(parts=len(load_info["parts"]), cached=sum(p["cached"] for p in load_info["parts"]))
+                load_span.set(rows_out=len(st.session_state.original_df))
+            if save_project:
+                st.session_state.project_id = st.session_state.file_hash
+                if not project_store.has_raw(st.session_state.file_hash):
+                    job_manager.submit(
+                        hash_key("save", st.session_state.file_hash), "Saving project", run_save_raw_job,
+                        st.session_state.file_hash, upload_name, st.session_state.original_df
+                    )
+
+        if st.session_state.clean_job is not None:
+            job_progress(st.session_state.clean_job, "Cleaning", on_cancel=forget_clean_job)
 
         df_to_display = (
             st.session_state.cleaned_df
@@ -207,6 +548,12 @@ if uploaded_file is not None:
         )
 
         st.success("File loaded successfully!")
+        ingest_info = st.session_state.ingest_info
+        if ingest_info is not None and ingest_info["truncated"]:
+            st.warning(
+                f"Stopped reading after {ingest_info['rows']:,} rows to stay within the "
+                f"{ingest_info['memory_limit_bytes'] // (1024 * 1024):,} MB memory cap."
+            )
 
         original_rows = st.session_state.original_df.shape[0]
         cleaned_rows = (
@@ -217,7 +564,8 @@ if uploaded_file is not None:
         rows_removed = original_rows - cleaned_rows
 
         st.subheader("Data Preview:")
-        st.dataframe(df_to_display.head())
+        with span("preview"):
+            st.dataframe(df_to_display.head())
         st.divider()
 
         with st.expander("📊 Data Cleaning & Analysis"):
@@ -225,6 +573,20 @@ if uploaded_file is not None:
                 st.subheader("Cleaning Actions Performed")
                 for action in st.session_state.cleaning_summary:
                     st.markdown(f"- {action}")
+                if st.session_state.cleaning_timings:
+                    st.text("Stage Timings:")
+                    st.dataframe(
+                        pd.DataFrame([
+                            {
+                                "Stage": t["stage"],
+                                "Time (s)": round(t["seconds"], 3),
+                                "Rows Out": t["rows"],
+                                "Source": "cache" if t["cached"] else "computed",
+                            }
+                            for t in st.session_state.cleaning_timings
+                        ]),
+                        hide_index=True
+                    )
                 st.divider()
 
             st.subheader("Cleaning Results")
@@ -233,52 +595,127 @@ if uploaded_file is not None:
             col2.metric("Cleaned Rows", f"{cleaned_rows:,}")
             col3.metric("Rows Removed", f"{rows_removed:,}")
 
-            st.subheader("Statistical Overview of Displayed Data")
-            buffer = io.StringIO()
-            with redirect_stdout(buffer):
-                df_to_display.info()
-            info_str = buffer.getvalue()
-            st.text("Dataframe Info:")
-            st.text(info_str)
+            load_info = st.session_state.load_info
+            if load_info is not None and (len(load_info["parts"]) > 1 or any(p["cached"] for p in load_info["parts"])):
+                st.subheader("Files Read")
+                st.caption(f"Read in {load_info['seconds']:.2f}s with the {load_info['engine']} Excel engine.")
+                st.dataframe(
+                    pd.DataFrame([
+                        {"Source": p["source"], "Rows": p["rows"], "Parsed": "cache" if p["cached"] else "file"}
+                        for p in load_info["parts"]
+                    ]),
+                    hide_index=True
+                )
+                for source, columns in load_info["missing_columns"].items():
+                    st.caption(f"'{source}' has no {', '.join(map(str, columns))} column(s); left empty.")
+                st.divider()
+
+            if ingest_info is not None:
+                st.subheader("Ingestion Summary")
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Rows Read", f"{ingest_info['rows']:,}")
+                col2.metric("Parser", ingest_info["engine"])
+                col3.metric("Memory Used", f"{ingest_info['memory_bytes'] / (1024 * 1024):,.1f} MB")
+                if ingest_info["duplicate_rows_error"]:
+                    col4.metric("Duplicate Rows (estimated)", f"≈ {ingest_info['duplicate_rows']:,} ± {ingest_info['duplicate_rows_error']:,}")
+                else:
+                    col4.metric("Duplicate Rows", f"{ingest_info['duplicate_rows']:,}")
+                if ingest_info["compacted"]:
+                    st.text("Compacted Columns:")
+                    st.dataframe(
+                        pd.DataFrame(
+                            {"Column": list(ingest_info["compacted"]), "Storage": list(ingest_info["compacted"].values())}
+                        ),
+                        hide_index=True
+                    )
+                st.divider()
 
-            st.text("Numeric Column Statistics:")
-            st.dataframe(df_to_display.describe(include=np.number))
+            st.subheader("Statistical Overview of Displayed Data")
+            with span("statistics", rows_in=len(df_to_display)):
+                # Computed once per dataset version and shared with the chart option panels.
+                profile = get_profile(df_to_display)
+                ingest_stats = st.session_state.ingest_stats
+                # Raw streamed data reuses the statistics gathered while reading.
+                streamed = ingest_stats is not None and st.session_state.cleaned_df is None
+                fast_stats = not streamed and st.toggle(
+                    "Fast approximate statistics",
+                    key="fast_stats",
+                    help="One bounded-memory pass with sketches: quantiles, distinct counts, top values "
+                         "and duplicates are estimates with the error bounds shown."
+                )
+                # In fast mode the dtype and non-null summary also comes from the sketch pass.
+                sketch = profile.sketch() if fast_stats else None
+                st.text("Dataframe Info:")
+                st.text(sketch.info_text() if fast_stats else profile.info_text())
+
+                if streamed:
+                    st.text("Numeric Column Statistics (computed while streaming; percentiles from a row sample):")
+                    st.dataframe(ingest_stats.describe_numeric())
+
+                    st.text("Categorical Column Statistics (computed while streaming):")
+                    st.dataframe(ingest_stats.describe_categorical())
+                elif fast_stats:
+                    st.text("Numeric Column Statistics (count, mean, std, min and max exact; percentiles "
+                            "within the rank error shown, 99% confidence):")
+                    st.dataframe(sketch.describe_numeric())
+
+                    st.text("Categorical Column Statistics (unique within ± shown, 95% confidence; "
+                            "freq never undercounts and overcounts by at most the bound, 99% confidence):")
+                    st.dataframe(sketch.describe_categorical())
+
+                    duplicates, duplicates_error = sketch.duplicates
+                    st.metric("Duplicate Rows (estimated)", f"≈ {duplicates:,} ± {duplicates_error:,}")
+                else:
+                    st.text("Numeric Column Statistics:")
+                    st.dataframe(profile.describe_numeric())
 
-            st.text("Categorical Column Statistics:")
-            st.dataframe(df_to_display.describe(include=['object', 'category']))
+                    st.text("Categorical Column Statistics:")
+                    st.dataframe(profile.describe_categorical())
 
             # ----------------------------
             # Download Button
             # ----------------------------
-            csv_buffer = io.StringIO()
-            df_to_display.to_csv(csv_buffer, index=False)
-            st.download_button(
-                "⬇️ Download Cleaned CSV",
-                data=csv_buffer.getvalue(),
-                file_name="cleaned_data.csv",
-                mime="text/csv"
+            # The file is only built when requested, then served from the export cache.
+            # Exports are keyed like the frames themselves: by the cleaning job
+            # (or saved version) for cleaned data and by the upload for raw data.
+            export_format = st.selectbox(
+                "Download format",
+                available_formats(),
+                format_func=lambda name: EXPORT_FORMATS[name]["label"],
+                key="export_format"
+            )
+            export_spec = EXPORT_FORMATS[export_format]
+            export_source = (
+                st.session_state.cleaned_key
+                if st.session_state.cleaned_df is not None
+                else st.session_state.file_hash
             )
+            export_path = cached_export(df_to_display, export_format, export_source)
+            if export_path is None and st.button(f"Prepare {export_spec['label']} Download"):
+                try:
+                    with st.spinner(f"Writing {export_spec['label']} file..."), span("export", format=export_format, rows_in=len(df_to_display)):
+                        export_path = export_frame(df_to_display, export_format, export_source)
+                except ValueError as e:
+                    st.warning(str(e))
+            if export_path is not None:
+                with open(export_path, "rb") as export_file:
+                    st.download_button(
+                        f"⬇️ Download Cleaned {export_spec['label']}",
+                        data=export_file,
+                        file_name=f"cleaned_data.{export_spec['extension']}",
+                        mime=export_spec["mime"]
+                    )
 
         # ----------------------------
         # Chart Selection Buttons
         # ----------------------------
         st.subheader("3. Select a Chart Type")
-        plot_functions = {
-            "Scatter Plot": generate_scatter_plot,
-            "Line Plot": generate_line_plot,
-            "Bar Chart": generate_bar_chart,
-            "Histogram": generate_histogram,
-            "Box Plot": generate_box_plot,
-            "Violin Plot": generate_violin_plot,
-            "Count Plot": generate_count_plot,
-            "Heatmap": generate_heatmap,
-            "Bubble Chart": generate_bubble_chart,
-            "Pie Chart": generate_pie_chart,
-            "Dot Plot": generate_dot_plot,
-            "Radar Chart": generate_radar_chart,
-        }
-
-        chart_names = list(plot_functions.keys())
+        # Every chart gets the filtered frame; masks and filtered frames are
+        # cached, so changing one predicate only evaluates that one.
+        chart_df = filter_frame(df_to_display, render_filter_panel(df_to_display))
+        if chart_df is not df_to_display:
+            st.caption(f"Charts use {len(chart_df):,} of {len(df_to_display):,} rows matching the filters.")
+        chart_names = list(CHART_TYPES)
         for i in range(0, len(chart_names), 4):
             cols = st.columns(4)
             for j in range(4):
@@ -293,11 +730,26 @@ if uploaded_file is not None:
                         )
 
         # Call the selected plot function
-        if st.session_state.chart_type:
-            selected_function = plot_functions[st.session_state.chart_type]
-            selected_function(df_to_display)
+        if st.session_state.chart_type and len(chart_df) == 0:
+            st.warning("No rows match the filters.")
+        elif st.session_state.chart_type:
+            # The panel's module, and the chart's builders, load on first selection.
+            selected_function = chart_panel(st.session_state.chart_type)
+            with span(f"chart.{st.session_state.chart_type}", rows_in=len(chart_df)):
+                selected_function(chart_df)
+
+        if st.session_state.project_id is not None:
+            render_saved_figures(st.session_state.project_id)
 
     except Exception as e:
         st.error(f"An error occurred: {e}")
 else:
-    st.info("Upload a CSV or Excel file to begin.")
+    st.info("Upload one or more CSV or Excel files, or open a saved project, to begin.")
+
+# ----------------------------
+# Performance Panel
+# ----------------------------
+if run_profiler is not None:
+    st.session_state.profile_result = run_profiler.stop()
+if perf_enabled or st.session_state.profile_result is not None:
+    render_performance_panel(end_trace())
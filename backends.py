@@ -0,0 +1,331 @@
+import contextvars
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from lazy_imports import is_installed, optional_module
+
+# ----------------------------
+# Settings
+# ----------------------------
+# The row-scale work of the cleaning steps and chart aggregations (hashing
+# rows for duplicates, medians, modes, text normalization, grouped
+# reductions) can run in Polars or DuckDB, which use every core. An engine
+# only computes those kernels; the results come back to pandas, where the
+# rest of each step runs unchanged, so summaries and frames match the pandas
+# path. Kernels return None for input an engine cannot reproduce exactly
+# (mixed-type text, unusual dtypes), and that input runs on pandas.
+#
+# PLOTPILOT_BACKEND picks the engine: "pandas", "polars", "duckdb", or "auto"
+# (Polars, else DuckDB, else pandas; frames under BACKEND_MIN_ROWS rows always
+# run on pandas since moving them between engines costs more than it saves).
+BACKENDS = ("auto", "pandas", "polars", "duckdb")
+BACKEND = os.environ.get("PLOTPILOT_BACKEND", "auto")
+BACKEND_MIN_ROWS = int(os.environ.get("PLOTPILOT_BACKEND_MIN_ROWS", 200_000))
+GROUP_REDUCTIONS = ("sum", "mean", "median")
+
+# Exactly the characters str.strip() removes, i.e. those with str.isspace().
+# Written out rather than found by scanning every code point at import time;
+# benchmarks/check_backends.py verifies the list.
+WHITESPACE = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680"
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+    "\u2028\u2029\u202f\u205f\u3000"
+)
+
+_selected = contextvars.ContextVar("plotpilot_backend", default=None)
+
+# ----------------------------
+# Selection
+# ----------------------------
+def available_backends():
+    return ["pandas"] + [name for name in ("polars", "duckdb") if is_installed(name)]
+
+@contextmanager
+def use_backend(name):
+    # Overrides PLOTPILOT_BACKEND for the calling context (and for jobs it
+    # submits, which copy the context). None keeps the current choice.
+    if name is not None and name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    token = _selected.set(name) if name is not None else None
+    try:
+        yield
+    finally:
+        if token is not None:
+            _selected.reset(token)
+
+def backend_for(df):
+    name = _selected.get() or BACKEND
+    if name == "auto":
+        if len(df) < BACKEND_MIN_ROWS:
+            return PANDAS
+        name = next((n for n in ("polars", "duckdb") if is_installed(n)), "pandas")
+    if name not in ENGINES:
+        raise ValueError(f"Unknown backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    if name != "pandas" and optional_module(name) is None:
+        raise ValueError(f"The {name} backend needs {name} installed: pip install {name}")
+    return ENGINES[name]
+
+# ----------------------------
+# Engines
+# ----------------------------
+def _is_float64(s):
+    return s.dtype == np.float64
+
+def _is_text(s):
+    return s.dtype == object
+
+def _arrow_text(s):
+    # The column as an Arrow string array (NaN and None become null), or None
+    # when it also holds non-strings, which pandas' .str methods turn into NaN.
+    pa = optional_module("pyarrow")
+    try:
+        return pa.array(s.to_numpy(), type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+
+def _group_index(key, keys):
+    # The index pandas' groupby(observed=True) would build for these keys.
+    if isinstance(key.dtype, pd.CategoricalDtype):
+        return pd.CategoricalIndex(keys, categories=key.cat.categories, ordered=key.cat.ordered, name=key.name)
+    return pd.Index(keys, dtype=key.dtype, name=key.name)
+
+def _groupable(df, key, value_cols, how):
+    # Key columns of text, category, integers or booleans and numeric values
+    # of NumPy dtypes; anything else runs on pandas.
+    s = df[key]
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        key_ok = s.cat.categories.dtype == object
+    else:
+        key_ok = isinstance(s.dtype, np.dtype) and s.dtype.kind in "Oiub"
+    values_ok = all(df[col].dtype in (np.float64, np.int64) for col in value_cols)
+    return how in GROUP_REDUCTIONS and key_ok and values_ok and key not in value_cols
+
+def _group_frame(key, value_cols, keys, columns, how, df):
+    result = pd.DataFrame(
+        {col: np.asarray(values, dtype=df[col].dtype if how == "sum" else np.float64) for col, values in zip(value_cols, columns)},
+        index=_group_index(df[key], keys),
+    )
+    return result[value_cols]
+
+class PandasBackend:
+    # Every kernel defers to the pandas code of its caller.
+    name = "pandas"
+
+    def duplicated(self, df):
+        return None
+
+    def medians(self, df, cols):
+        return {}
+
+    def modes(self, df, cols):
+        return {}
+
+    def normalize_text(self, s, lower):
+        return None
+
+    def group_reduce(self, df, key, value_cols, how):
+        return None
+
+class PolarsBackend(PandasBackend):
+    name = "polars"
+
+    @property
+    def pl(self):
+        return optional_module("polars")
+
+    @property
+    def errors(self):
+        return (self.pl.exceptions.PolarsError, TypeError, ValueError, NotImplementedError)
+
+    def _text(self, s):
+        text = _arrow_text(s) if _is_text(s) else None
+        return self.pl.Series("v", text) if text is not None else None
+
+    def duplicated(self, df):
+        if df.shape[1] == 0:
+            return None
+        try:
+            frame = self.pl.from_pandas(df.set_axis([str(i) for i in range(df.shape[1])], axis=1))
+            first = frame.select(self.pl.struct(self.pl.all()).is_first_distinct()).to_series()
+        except self.errors:
+            return None
+        return ~first.to_numpy()
+
+    def medians(self, df, cols):
+        # The two middle values per column; the caller averages them the way
+        # NumPy does, so medians match pandas to the last bit.
+        pl = self.pl
+        cols = [col for col in cols if _is_float64(df[col])]
+        if not cols:
+            return {}
+        frame = pl.DataFrame({str(i): df[col].to_numpy() for i, col in enumerate(cols)}, nan_to_null=True)
+        row = frame.select(
+            [pl.col(str(i)).quantile(0.5, "lower").alias(f"lo{i}") for i in range(len(cols))]
+            + [pl.col(str(i)).quantile(0.5, "higher").alias(f"hi{i}") for i in range(len(cols))]
+        ).row(0)
+        return {col: _middle(row[i], row[len(cols) + i]) for i, col in enumerate(cols)}
+
+    def modes(self, df, cols):
+        # The smallest of the most frequent values, as pandas' mode().iloc[0].
+        pl = self.pl
+        result = {}
+        for col in cols:
+            text = self._text(df[col])
+            if text is None:
+                continue
+            counts = text.drop_nulls().value_counts(name="n")
+            if counts.height == 0:
+                result[col] = np.nan
+                continue
+            result[col] = counts.filter(pl.col("n") == pl.col("n").max()).get_column("v").min()
+        return result
+
+    def normalize_text(self, s, lower):
+        # str.strip() (and str.lower()) of every string. Polars' lowercase
+        # mapping is only used for ASCII strings, where it cannot differ from
+        # Python's; other strings are lowered by Python.
+        text = self._text(s)
+        if text is None:
+            return None
+        present = text.is_not_null().to_numpy()
+        stripped = text.drop_nulls().str.strip_chars(WHITESPACE)
+        if not lower:
+            out = stripped.to_numpy()
+        else:
+            out = stripped.str.to_lowercase().to_numpy()
+            unicode_rows = np.flatnonzero(stripped.str.contains(r"[^\x00-\x7F]").to_numpy())
+            for i, value in zip(unicode_rows, stripped.gather(unicode_rows).to_list()):
+                out[i] = value.lower()
+        result = s.to_numpy(dtype=object, copy=True)
+        result[present] = out
+        return pd.Series(result, index=s.index, name=s.name, dtype=object)
+
+    def group_reduce(self, df, key, value_cols, how):
+        pl = self.pl
+        if not _groupable(df, key, value_cols, how):
+            return None
+        s = df[key]
+        keys = s.cat.categories.to_numpy()[s.cat.codes.to_numpy()] if isinstance(s.dtype, pd.CategoricalDtype) else s.to_numpy()
+        present = s.notna().to_numpy()
+        try:
+            frame = pl.DataFrame(
+                {"key": pl.Series(keys[present], strict=True),
+                 **{str(i): df[col].to_numpy()[present] for i, col in enumerate(value_cols)}},
+                nan_to_null=True,
+            )
+            reduce = {"sum": pl.Expr.sum, "mean": pl.Expr.mean, "median": pl.Expr.median}[how]
+            grouped = frame.group_by("key", maintain_order=True).agg(
+                [reduce(pl.col(str(i))) for i in range(len(value_cols))]
+            )
+        except self.errors:
+            return None
+        columns = [grouped.get_column(str(i)).to_numpy() for i in range(len(value_cols))]
+        return _group_frame(key, value_cols, grouped.get_column("key").to_list(), columns, how, df)
+
+class DuckDBBackend(PandasBackend):
+    name = "duckdb"
+
+    @property
+    def duckdb(self):
+        return optional_module("duckdb")
+
+    @property
+    def errors(self):
+        return (self.duckdb.Error, TypeError, ValueError, NotImplementedError)
+
+    def _query(self, sql, **tables):
+        # A connection per call: DuckDB connections are not shared between
+        # threads, and opening one is cheap next to a scan of many rows.
+        pa = optional_module("pyarrow")
+        with self.duckdb.connect() as con:
+            for name, data in tables.items():
+                con.register(name, pa.table(data))
+            return con.execute(sql).fetch_arrow_table()
+
+    def duplicated(self, df):
+        # Rows numbered within each group of identical rows; every row after
+        # the first of its group is a duplicate.
+        if df.shape[1] == 0:
+            return None
+        pa = optional_module("pyarrow")
+        try:
+            table = pa.Table.from_pandas(df.set_axis([f"c{i}" for i in range(df.shape[1])], axis=1), preserve_index=False)
+            table = table.append_column("row_", pa.array(np.arange(len(df))))
+            columns = ", ".join(f"c{i}" for i in range(df.shape[1]))
+            rows = self._query(
+                f"SELECT row_ FROM t QUALIFY row_number() OVER (PARTITION BY {columns} ORDER BY row_) > 1", t=table
+            ).column(0).to_numpy()
+        except self.errors:
+            return None
+        mask = np.zeros(len(df), dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def medians(self, df, cols):
+        # quantile_disc picks the lower middle value; the upper one is the
+        # lower middle of the negated column.
+        cols = [col for col in cols if _is_float64(df[col])]
+        if not cols:
+            return {}
+        pa = optional_module("pyarrow")
+        data = {f"c{i}": pa.array(df[col].to_numpy(), from_pandas=True) for i, col in enumerate(cols)}
+        select = ", ".join(f"quantile_disc(c{i}, 0.5) AS lo{i}, -quantile_disc(-c{i}, 0.5) AS hi{i}" for i in range(len(cols)))
+        try:
+            row = self._query(f"SELECT {select} FROM t", t=data).to_pylist()[0]
+        except self.errors:
+            return {}
+        return {col: _middle(row[f"lo{i}"], row[f"hi{i}"]) for i, col in enumerate(cols)}
+
+    def modes(self, df, cols):
+        result = {}
+        for col in cols:
+            values = _arrow_text(df[col]) if _is_text(df[col]) else None
+            if values is None:
+                continue
+            try:
+                row = self._query(
+                    "SELECT v FROM t WHERE v IS NOT NULL GROUP BY v ORDER BY count(*) DESC, v LIMIT 1", t={"v": values}
+                ).to_pylist()
+            except self.errors:
+                continue
+            result[col] = row[0]["v"] if row else np.nan
+        return result
+
+    def group_reduce(self, df, key, value_cols, how):
+        # Groups come out in order of first appearance, like groupby(sort=False).
+        if not _groupable(df, key, value_cols, how):
+            return None
+        pa = optional_module("pyarrow")
+        s = df[key]
+        keys = s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s
+        reduce = {
+            "sum": lambda c, integer: f"CAST(sum({c}) AS BIGINT)" if integer else f"coalesce(sum({c}), 0)",
+            "mean": lambda c, integer: f"avg({c})",
+            "median": lambda c, integer: f"median(CAST({c} AS DOUBLE))",
+        }[how]
+        select = ", ".join(reduce(f"c{i}", df[col].dtype.kind == "i") for i, col in enumerate(value_cols))
+        try:
+            data = {"k": pa.array(keys.to_numpy(), from_pandas=True), "row_": pa.array(np.arange(len(df)))}
+            for i, col in enumerate(value_cols):
+                data[f"c{i}"] = pa.array(df[col].to_numpy(), from_pandas=True)
+            table = self._query(
+                f"SELECT k, {select} FROM t WHERE k IS NOT NULL GROUP BY k ORDER BY min(row_)", t=data
+            )
+        except (pa.ArrowInvalid, pa.ArrowTypeError, *self.errors):
+            return None
+        columns = [table.column(i + 1).to_numpy(zero_copy_only=False) for i in range(len(value_cols))]
+        return _group_frame(key, value_cols, table.column(0).to_pylist(), columns, how, df)
+
+def _middle(low, high):
+    # NumPy's median of an even count: the mean of the two middle values.
+    if low is None:
+        return np.nan
+    if low == high:
+        return float(low)
+    return (float(low) + float(high)) / 2
+
+PANDAS = PandasBackend()
+ENGINES = {"pandas": PANDAS, "polars": PolarsBackend(), "duckdb": DuckDBBackend()}
@@ -0,0 +1,169 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_cleaning import CLEANING_STAGES
+from synthetic import make_wide_frame, make_tall_frame, make_text_frame
+
+# ----------------------------
+# Per-column reference implementations
+# ----------------------------
+# The column-by-column versions of the batched stages, kept here to measure
+# the speedup and to check that both produce the same frame and summary.
+
+def legacy_drop_empty_columns_stage(df, state, drop_empty_cols=True):
+    summary = []
+    if drop_empty_cols:
+        empty_cols = [col for col in df.columns if df[col].isnull().all()]
+        if empty_cols:
+            df = df.drop(columns=empty_cols)
+            summary.append(f"🗑️ Dropped {len(empty_cols)} empty column(s): {empty_cols}")
+    return df, summary, state
+
+def legacy_missing_values_stage(df, state, missing_choice="Fill"):
+    summary = []
+    df = df.copy()
+    for col in df.columns:
+        if df[col].isnull().any():
+            missing_count = df[col].isnull().sum()
+            if pd.api.types.is_numeric_dtype(df[col]):
+                median = df[col].median()
+                df[col] = df[col].fillna(median)
+                summary.append(f"✅ Filled {missing_count} missing value(s) in numeric column '{col}' with median ({median:.2f}).")
+            else:
+                mode = df[col].mode().iloc[0] if not df[col].mode().empty else "Unknown"
+                df[col] = df[col].fillna(mode)
+                summary.append(f"✅ Filled {missing_count} missing value(s) in categorical column '{col}' with mode ('{mode}').")
+    return df, summary, state
+
+def legacy_convert_numeric_stage(df, state):
+    summary = []
+    df = df.copy()
+    for col in state.get("object_cols", []):
+        try:
+            df[col] = pd.to_numeric(df[col], errors="raise")
+            summary.append(f"🔄 Column '{col}': Converted to numeric")
+        except Exception:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str).str.strip())
+            summary.append(f"🔄 Column '{col}': Kept as text")
+    return df, summary, state
+
+def legacy_outliers_stage(df, state, remove_outliers=False):
+    summary = []
+    numeric_cols = df.select_dtypes(include=np.number).columns
+    if remove_outliers:
+        outlier_report = {}
+        for col in numeric_cols:
+            Q1 = df[col].quantile(0.25)
+            Q3 = df[col].quantile(0.75)
+            IQR = Q3 - Q1
+            before = df.shape[0]
+            df = df[(df[col] >= Q1 - 1.5 * IQR) & (df[col] <= Q3 + 1.5 * IQR)]
+            removed = before - df.shape[0]
+            if removed > 0:
+                outlier_report[col] = removed
+        if outlier_report:
+            for k, v in outlier_report.items():
+                summary.append(f"🗑️ Removed {v} outlier(s) from '{k}' using IQR.")
+        else:
+            summary.append("✅ No outliers detected/removed with IQR.")
+    else:
+        for col in numeric_cols:
+            mean, std = df[col].mean(), df[col].std()
+            if std > 0:
+                outliers = df[(df[col] - mean).abs() > 3 * std].shape[0]
+                if outliers > 0:
+                    summary.append(f"⚠️ Detected {outliers} potential outlier(s) in '{col}' (|z| > 3). Not removed.")
+    return df, summary, state
+
+def legacy_convert_datetime_stage(df, state):
+    summary = []
+    date_cols = [col for col in df.columns if any(keyword in col.lower() for keyword in ['date', 'time', 'day'])]
+    df = df.copy()
+    for col in date_cols:
+        try:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+            summary.append(f"📅 Converted '{col}' to datetime.")
+        except:
+            pass
+    return df, summary, state
+
+LEGACY_STAGES = {
+    "Drop empty columns": legacy_drop_empty_columns_stage,
+    "Handle missing values": legacy_missing_values_stage,
+    "Convert numeric-like text": legacy_convert_numeric_stage,
+    "Outlier handling": legacy_outliers_stage,
+    "Convert datetime columns": legacy_convert_datetime_stage,
+}
+# Stages whose rewrite intentionally changed the result (datetime columns are
+# found from their values, not their names) are timed but not compared.
+CHANGED_STAGES = {"Convert datetime columns"}
+
+# ----------------------------
+# Benchmark
+# ----------------------------
+def best_of(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+def bench_frame(label, df, repeat, options):
+    print(f"\n{label}: {df.shape[0]:,} rows x {df.shape[1]} columns, options={options}")
+    print(f"{'stage':<28}{'per-column (s)':>16}{'batched (s)':>14}{'speedup':>10}")
+    state = {}
+    total_legacy = total_new = 0.0
+    for name, stage, option_names in CLEANING_STAGES:
+        kwargs = {o: options[o] for o in option_names}
+        new_time, (new_df, new_summary, new_state) = best_of(lambda: stage(df, state, **kwargs), repeat)
+        if name in LEGACY_STAGES:
+            legacy_time, (legacy_df, legacy_summary, _) = best_of(lambda: LEGACY_STAGES[name](df, state, **kwargs), repeat)
+            if name not in CHANGED_STAGES:
+                pd.testing.assert_frame_equal(new_df, legacy_df)
+                assert list(new_summary) == list(legacy_summary), name
+            print(f"{name:<28}{legacy_time:>16.3f}{new_time:>14.3f}{legacy_time / max(new_time, 1e-9):>9.1f}x")
+        else:
+            legacy_time = new_time
+        total_legacy += legacy_time
+        total_new += new_time
+        df, state = new_df, new_state
+    print(f"{'total':<28}{total_legacy:>16.3f}{total_new:>14.3f}{total_legacy / max(total_new, 1e-9):>9.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched vs per-column cleaning stages.")
+    parser.add_argument("--wide-rows", type=int, default=20_000)
+    parser.add_argument("--wide-cols", type=int, default=300)
+    parser.add_argument("--tall-rows", type=int, default=1_000_000)
+    parser.add_argument("--tall-cols", type=int, default=8)
+    parser.add_argument("--text-rows", type=int, default=1_000_000)
+    parser.add_argument("--text-cols", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    frames = [
+        ("Wide frame", make_wide_frame(args.wide_rows, args.wide_cols)),
+        ("Tall frame", make_tall_frame(args.tall_rows, args.tall_cols)),
+        ("Text-heavy frame", make_text_frame(args.text_rows, args.text_cols)),
+    ]
+    for label, df in frames:
+        for remove_outliers in (False, True):
+            options = {
+                "normalize_text": True,
+                "drop_empty_cols": True,
+                "missing_choice": "Fill",
+                "remove_outliers": remove_outliers,
+            }
+            bench_frame(label, df, args.repeat, options)
+
+if __name__ == "__main__":
+    main()
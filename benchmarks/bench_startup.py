@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ----------------------------
+# Cold Start
+# ----------------------------
+# Every run starts a fresh interpreter, as a new container or autoscaled
+# replica would, and times:
+#
+#   streamlit     importing Streamlit and its test runner
+#   first_run     the first script run of app.py, with no file uploaded: every
+#                 import the app makes plus rendering the upload page
+#   rerun         a second run, with the modules already imported
+#   cold_start    process start to the end of the first run
+#   chart_import  importing the first chart builder afterwards, which the app
+#                 defers until a chart is selected
+#
+# and lists which of the deferred heavy modules the first run imported; the
+# list should stay empty.
+DEFERRED_MODULES = (
+    "plotly.express", "figures", "scipy", "numexpr", "openpyxl", "pyinstrument", "python_calamine",
+)
+
+CHILD = r"""
+import json, sys, time
+spawned = float(sys.argv[1])
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_seconds = time.perf_counter() - start
+
+app = AppTest.from_file({app!r}, default_timeout=120)
+start = time.perf_counter()
+app.run()
+first_run = time.perf_counter() - start
+first_run_done = time.time()
+if app.exception:
+    raise SystemExit(app.exception[0].message)
+loaded = [m for m in {deferred!r} if m in sys.modules]
+
+start = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - start
+
+from charts import chart_builder
+start = time.perf_counter()
+chart_builder("Scatter Plot")
+chart_import = time.perf_counter() - start
+
+print(json.dumps({{
+    "streamlit": streamlit_seconds, "first_run": first_run, "rerun": rerun,
+    "cold_start": first_run_done - spawned, "chart_import": chart_import, "loaded": loaded,
+}}))
+"""
+
+def cold_start():
+    code = CHILD.format(root=ROOT, app=os.path.join(ROOT, "app.py"), deferred=DEFERRED_MODULES)
+    # Saved projects are listed on the first page; an empty store keeps runs comparable.
+    env = dict(os.environ, PLOTPILOT_PROJECT_DIR=os.path.join(ROOT, "benchmarks", ".startup_projects"))
+    spawned = time.time()
+    out = subprocess.run([sys.executable, "-c", code, repr(spawned)], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=False)
+    if out.returncode != 0:
+        raise SystemExit(f"The app failed to start:\n{out.stderr or out.stdout}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the app's cold start in fresh interpreters.")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes to start (the median is reported)")
+    parser.add_argument("--json", help="also write the runs and medians to this file")
+    args = parser.parse_args()
+
+    runs = []
+    for i in range(args.repeat):
+        run = cold_start()
+        runs.append(run)
+        print(f"run {i + 1}: cold start {run['cold_start']:.3f}s, first run {run['first_run']:.3f}s", flush=True)
+
+    metrics = ("streamlit", "first_run", "rerun", "cold_start", "chart_import")
+    medians = {metric: statistics.median(run[metric] for run in runs) for metric in metrics}
+    print()
+    for metric in metrics:
+        print(f"{metric:<16}{medians[metric]:>9.3f}s")
+    loaded = sorted({module for run in runs for module in run["loaded"]})
+    print(f"\nDeferred modules imported at startup: {', '.join(loaded) or 'none'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"runs": runs, "median": medians, "loaded": loaded}, f, indent=2)
+    if loaded:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import argparse
+import fnmatch
+import gc
+import io
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_cleaning import clean_data
+from charts import build_chart
+from ingestion import read_csv_streaming
+from profiling import get_profile
+from synthetic import make_frame
+
+# ----------------------------
+# Datasets
+# ----------------------------
+# Each axis is swept on its own around a small base frame, rather than as a
+# full cross product, so the suite stays runnable. "quick" is meant for every
+# change; "full" covers the 1e3-1e7 rows and 5-500 columns range.
+BASE = {"rows": 10_000, "cols": 10, "text_fraction": 0.3, "high_cardinality": False}
+
+PROFILES = {
+    "quick": {
+        "rows": [1_000, 100_000],
+        "cols": [5, 50],
+        "repeat": 5,
+    },
+    "full": {
+        "rows": [1_000, 10_000, 100_000, 1_000_000, 10_000_000],
+        "cols": [5, 50, 500],
+        "repeat": 3,
+    },
+}
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+def dataset_specs(profile):
+    specs = {}
+    for rows in profile["rows"]:
+        specs[f"rows_{rows}"] = dict(BASE, rows=rows)
+    for cols in profile["cols"]:
+        specs[f"cols_{cols}"] = dict(BASE, cols=cols)
+    specs["numeric"] = dict(BASE, text_fraction=0.0)
+    specs["text_heavy"] = dict(BASE, text_fraction=0.8)
+    specs["high_cardinality"] = dict(BASE, high_cardinality=True)
+    return specs
+
+def build_dataset(spec):
+    return make_frame(spec["rows"], spec["cols"], text_fraction=spec["text_fraction"],
+                      high_cardinality=spec["high_cardinality"])
+
+# ----------------------------
+# Cases
+# ----------------------------
+CLEANING_OPTIONS = {
+    "normalize_text": [True, False],
+    "drop_empty_cols": [True, False],
+    "missing_choice": ["Fill", "Drop", "Leave as NaN"],
+    "remove_outliers": [False, True],
+}
+
+def option_combinations():
+    names = list(CLEANING_OPTIONS)
+    for values in itertools.product(*CLEANING_OPTIONS.values()):
+        yield dict(zip(names, values))
+
+def option_label(options):
+    return ",".join(f"{k}={v}" for k, v in options.items())
+
+def chart_params(df):
+    # Picks columns the way a user would: numeric axes from the profile and the
+    # lowest-cardinality text column as the category.
+    profile = get_profile(df)
+    numeric = profile.numeric_columns
+    categorical = sorted(profile.categorical_columns, key=profile.cardinality)
+    num = lambda i: numeric[i % len(numeric)] if numeric else None
+    cat = categorical[0] if categorical else None
+    params = {
+        "Scatter Plot": {"x": num(0), "y": num(1), "color": cat},
+        "Line Plot": {"x": num(0), "y": num(1)},
+        "Bar Chart": {"x": cat, "y": num(0)},
+        "Histogram": {"column": num(0)},
+        "Box Plot": {"x": cat, "y": num(0)},
+        "Violin Plot": {"x": cat, "y": num(0)},
+        "Count Plot": {"column": cat},
+        "Heatmap": {},
+        "Bubble Chart": {"x": num(0), "y": num(1), "size": num(2), "color": cat},
+        "Pie Chart": {"names": cat, "values": num(0)},
+        "Dot Plot": {"x": num(0), "y": cat},
+        "Radar Chart": {"category": cat, "metrics": numeric[:3]},
+    }
+    return {chart: p for chart, p in params.items() if None not in p.values()}
+
+def measure(fn, repeat):
+    # Wall time is the best of `repeat` untraced runs; peak memory comes from
+    # one extra run under tracemalloc, which numpy and pandas report into.
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak / (1024 * 1024)}, result
+
+def run_suite(profile_name, only=None, repeat=None, all_options=False):
+    profile = PROFILES[profile_name]
+    repeat = repeat or profile["repeat"]
+    results = {}
+
+    def record(case, metrics):
+        results[case] = metrics
+        extra = f"  {metrics['payload_bytes'] / 1024:10.1f} KB" if "payload_bytes" in metrics else ""
+        print(f"{case:<72}{metrics['seconds']:>9.3f}s{metrics['peak_mb']:>10.1f} MB{extra}", flush=True)
+
+    for name, spec in dataset_specs(profile).items():
+        if only and not any(fnmatch.fnmatch(name, pattern) for pattern in only):
+            continue
+        df = build_dataset(spec)
+        print(f"\n{name}: {df.shape[0]:,} rows x {df.shape[1]} columns", flush=True)
+
+        raw = df.to_csv(index=False).encode("utf-8")
+        metrics, _ = measure(lambda: pd.read_csv(io.BytesIO(raw)), repeat)
+        record(f"ingest/{name}/pandas", metrics)
+        metrics, _ = measure(lambda: read_csv_streaming(io.BytesIO(raw)), repeat)
+        record(f"ingest/{name}/streaming", metrics)
+        raw = None
+
+        # Every option combination on the base-sized frames; defaults elsewhere.
+        combos = list(option_combinations()) if all_options or spec["rows"] <= BASE["rows"] else [{}]
+        for options in combos:
+            metrics, cleaned = measure(lambda: clean_data(df, **options), repeat)
+            record(f"clean/{name}/{option_label(options) or 'defaults'}", metrics)
+
+        cleaned, _ = clean_data(df)
+        for chart, params in chart_params(cleaned).items():
+            try:
+                metrics, (fig, _) = measure(lambda: build_chart(chart, cleaned, params), repeat)
+            except ValueError as e:
+                print(f"{'chart/' + name + '/' + chart:<72}  skipped: {e}")
+                continue
+            metrics["payload_bytes"] = len(fig.to_json())
+            record(f"chart/{name}/{chart}", metrics)
+        df = cleaned = None
+        gc.collect()
+    return results
+
+# ----------------------------
+# Baselines
+# ----------------------------
+def calibrate(repeat=5):
+    # A fixed numpy/pandas workload timed alongside the suite. Baseline times
+    # are scaled by the ratio of calibrations, so a slower or busier machine
+    # does not read as a regression.
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({"key": rng.integers(0, 1000, 1_000_000), "value": rng.normal(size=1_000_000)})
+    def workload():
+        frame.groupby("key")["value"].agg(["mean", "std"])
+        np.sort(frame["value"].to_numpy())
+        frame["key"].astype(str).str.len().sum()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        workload()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+def compare(results, baseline, time_threshold, memory_threshold, payload_threshold, time_slack, speed_ratio=1.0):
+    # Returns the regressions as printable lines. Each limit is the relative
+    # threshold plus a small absolute slack, so millisecond-scale cases are not
+    # flagged for noise. speed_ratio (current calibration / baseline
+    # calibration) rescales baseline times.
+    regressions = []
+    checks = [
+        ("seconds", time_threshold, time_slack),
+        ("peak_mb", memory_threshold, 1.0),
+        ("payload_bytes", payload_threshold, 1024),
+    ]
+    for case, metrics in results.items():
+        old = baseline.get(case)
+        if old is None:
+            continue
+        for metric, threshold, slack in checks:
+            if metric not in metrics or metric not in old:
+                continue
+            expected = old[metric] * speed_ratio if metric == "seconds" else old[metric]
+            limit = expected * (1 + threshold) + slack
+            if metrics[metric] > limit:
+                regressions.append(
+                    f"{case}: {metric} {expected:.3f} -> {metrics[metric]:.3f} "
+                    f"(+{(metrics[metric] / max(expected, 1e-9) - 1) * 100:.0f}%, limit {threshold * 100:.0f}%)"
+                )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cleaning, ingestion and every chart builder, and check for regressions.")
+    parser.add_argument("--profile", choices=list(PROFILES), default="quick")
+    parser.add_argument("--only", nargs="*", help="run only these datasets (names or glob patterns, e.g. rows_1000 'cols_*')")
+    parser.add_argument("--repeat", type=int, help="timed runs per case (best is kept)")
+    parser.add_argument("--all-options", action="store_true", help="run every cleaning option combination on every dataset")
+    parser.add_argument("--save", nargs="?", const="", help="write results as the baseline (default: baselines/<profile>.json)")
+    parser.add_argument("--compare", nargs="?", const="", help="compare with a baseline (default: baselines/<profile>.json)")
+    parser.add_argument("--time-threshold", type=float, default=0.25, help="allowed slowdown, as a fraction (default: 0.25)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="allowed peak memory growth (default: 0.25)")
+    parser.add_argument("--payload-threshold", type=float, default=0.10, help="allowed figure payload growth (default: 0.10)")
+    parser.add_argument("--time-slack", type=float, default=0.01, help="absolute slowdown always allowed, in seconds (default: 0.01)")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    default_path = os.path.join(BASELINE_DIR, f"{args.profile}.json")
+    save_path = (args.save or default_path) if args.save is not None else None
+    compare_path = (args.compare or default_path) if args.compare is not None else None
+    if compare_path is not None and not os.path.exists(compare_path) and compare_path != save_path:
+        # Baselines are machine-specific, so none are committed.
+        print(f"No baseline at {compare_path}, run with --save first.")
+        return
+    calibration = calibrate()
+    print(f"Calibration workload: {calibration:.3f}s")
+    results = run_suite(args.profile, args.only, args.repeat, args.all_options)
+
+    if save_path is not None:
+        path = save_path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"profile": args.profile, "environment": environment(), "calibration": calibration, "results": results}, f, indent=2, sort_keys=True)
+        print(f"\nSaved {len(results)} results to {path}")
+
+    if compare_path is not None:
+        path = compare_path
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != environment():
+            print("\nWarning: the baseline was recorded in a different environment; timings may not be comparable.")
+        speed_ratio = calibration / baseline.get("calibration", calibration)
+        print(f"\nMachine speed vs baseline: {1 / speed_ratio:.2f}x (baseline times scaled by {speed_ratio:.2f})")
+        regressions = compare(results, baseline["results"], args.time_threshold, args.memory_threshold,
+                              args.payload_threshold, args.time_slack, speed_ratio)
+        missing = sorted(set(baseline["results"]) - set(results))
+        if missing and not args.only:
+            print(f"\n{len(missing)} baseline case(s) were not run, e.g. {missing[0]}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {path}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {path}")
+
+if __name__ == "__main__":
+    main()
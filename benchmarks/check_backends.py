@@ -0,0 +1,133 @@
+import argparse
+import io
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregations import GROUP_AGGREGATIONS, group_aggregates
+from backends import WHITESPACE, available_backends, use_backend
+from bench_suite import option_combinations, option_label
+from charts import build_chart
+from data_cleaning import clean_data
+from ingestion import read_csv_streaming
+from profiling import get_profile
+from synthetic import make_frame, make_text_frame
+
+# ----------------------------
+# Cross-Backend Equivalence
+# ----------------------------
+# Runs the cleaning pipeline (every option combination) and the chart
+# aggregations on each installed engine and checks them against pandas.
+# Cleaned frames and summaries must match exactly; grouped sums, means and
+# medians may differ in the last bits, since engines add floats in a
+# different order.
+AGGREGATE_RTOL = 1e-9
+
+def datasets(rows):
+    mixed = make_frame(rows, 12, text_fraction=0.5)
+    raw = mixed.to_csv(index=False).encode("utf-8")
+    return {
+        "mixed": mixed,
+        "high_cardinality": make_frame(rows, 8, text_fraction=0.5, high_cardinality=True, seed=1),
+        "text": make_text_frame(rows, cols=9),
+        # Category columns, as the streaming reader produces them.
+        "streamed": read_csv_streaming(io.BytesIO(raw))[0],
+    }
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def check_cleaning(name, df, engines):
+    failures = []
+    for options in option_combinations():
+        label = f"clean/{name}/{option_label(options)}"
+        (expected, expected_summary), base = timed(lambda: clean_data(df, backend="pandas", **options))
+        line = f"{label:<100}pandas {base:7.3f}s"
+        for engine in engines:
+            (cleaned, summary), seconds = timed(lambda: clean_data(df, backend=engine, **options))
+            try:
+                pd.testing.assert_frame_equal(cleaned, expected, check_exact=True)
+                assert summary == expected_summary, "cleaning summaries differ"
+            except AssertionError as e:
+                failures.append(f"{label} [{engine}]: {e}")
+                line += f"  {engine} FAILED"
+                continue
+            line += f"  {engine} {seconds:7.3f}s"
+        print(line, flush=True)
+    return failures
+
+def check_whitespace():
+    # The engines strip exactly the characters listed in WHITESPACE.
+    expected = "".join(chr(c) for c in range(sys.maxunicode + 1) if chr(c).isspace())
+    if WHITESPACE != expected:
+        return [f"backends.WHITESPACE differs from str.isspace(): expected {expected!r}"]
+    return []
+
+def check_aggregations(name, df, engines):
+    failures = []
+    cleaned, _ = clean_data(df, backend="pandas")
+    profile = get_profile(cleaned)
+    categories = sorted(profile.categorical_columns, key=profile.cardinality)[:2]
+    metrics = profile.numeric_columns[:3]
+    if not categories or not metrics:
+        return failures
+    for category in categories:
+        for how in GROUP_AGGREGATIONS:
+            label = f"group/{name}/{category}/{how}"
+            with use_backend("pandas"):
+                expected = group_aggregates(cleaned, category, metrics, how)
+            for engine in engines:
+                with use_backend(engine):
+                    table = group_aggregates(cleaned, category, metrics, how)
+                try:
+                    pd.testing.assert_frame_equal(table, expected, rtol=AGGREGATE_RTOL)
+                except AssertionError as e:
+                    failures.append(f"{label} [{engine}]: {e}")
+        label = f"pie/{name}/{category}"
+        params = {"names": category, "values": metrics[0], "top_n": 10}
+        with use_backend("pandas"):
+            expected, _ = build_chart("Pie Chart", cleaned, params)
+        for engine in engines:
+            with use_backend(engine):
+                fig, _ = build_chart("Pie Chart", cleaned, params)
+            try:
+                assert list(fig.data[0].labels) == list(expected.data[0].labels), "pie slices differ"
+                np.testing.assert_allclose(fig.data[0].values, expected.data[0].values, rtol=AGGREGATE_RTOL)
+            except AssertionError as e:
+                failures.append(f"{label} [{engine}]: {e}")
+    print(f"{'aggregations/' + name:<100}{len(engines)} engine(s) checked", flush=True)
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that every execution backend produces the pandas results.")
+    parser.add_argument("--rows", type=int, default=20_000, help="rows per synthetic dataset (default: 20000)")
+    parser.add_argument("--engines", nargs="*", help="engines to check (default: every installed one)")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    engines = args.engines or [name for name in available_backends() if name != "pandas"]
+    if not engines:
+        raise SystemExit("Neither Polars nor DuckDB is installed: pip install polars duckdb")
+    print(f"Checking {', '.join(engines)} against pandas on {args.rows:,}-row datasets\n")
+    failures = check_whitespace()
+    for name, df in datasets(args.rows).items():
+        failures += check_cleaning(name, df, engines)
+        failures += check_aggregations(name, df, engines)
+
+    if failures:
+        print(f"\n{len(failures)} mismatch(es):")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll engines match pandas.")
+
+if __name__ == "__main__":
+    main()
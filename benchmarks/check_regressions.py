@@ -0,0 +1,131 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_cleaning import clean_data
+from rendering import CHART_STRATEGIES
+
+# Reruns allowed while a chart's background job finishes.
+SNIPPET_MAX_RERUNS = 50
+
+# ----------------------------
+# Regression Checks
+# ----------------------------
+# Small, fixed cases for behavior that broke before. Each check returns a
+# list of failure messages; the script exits with code 1 if any fail.
+# The snippet check drives the chart panels with Streamlit's AppTest.
+
+def check_dates_with_missing(rows):
+    # Missing values in a date column left as NaN must not stop it from
+    # being converted: they used to become the text "nan" and fail the
+    # date-shape screen.
+    rng = np.random.default_rng(0)
+    dates = pd.Series(pd.date_range("2020-01-01", periods=rows).strftime("%Y-%m-%d"), dtype=object)
+    missing = rng.choice(rows, rows // 10, replace=False)
+    dates[missing] = np.nan
+    df = pd.DataFrame({"when": dates, "value": rng.normal(size=rows)})
+    cleaned, _ = clean_data(df, missing_choice="Leave as NaN")
+    failures = []
+    if not pd.api.types.is_datetime64_any_dtype(cleaned["when"]):
+        failures.append(f"dates/leave-nan: 'when' stayed {cleaned['when'].dtype}, expected datetime")
+    elif cleaned["when"].isna().sum() != len(missing):
+        failures.append(f"dates/leave-nan: {cleaned['when'].isna().sum()} missing dates, expected {len(missing)}")
+    return failures
+
+def _render_panel(chart_type):
+    # Runs as its own Streamlit script under AppTest.
+    import streamlit as st
+    from charts import chart_panel
+    chart_panel(chart_type)(st.session_state.check_df)
+
+def snippet_cases():
+    # (chart type, widget state) for every chart and rendering strategy.
+    cases = [
+        ("Bar Chart", {}), ("Histogram", {}), ("Box Plot", {}), ("Violin Plot", {}),
+        ("Count Plot", {}), ("Heatmap", {}), ("Pie Chart", {}),
+        ("Radar Chart", {"radar_num": ["x", "y"], "radar_normalize": True}),
+    ]
+    for chart_type, kind, key in (
+        ("Scatter Plot", "scatter", "scatter_render"), ("Line Plot", "line", "line_render"),
+        ("Bubble Chart", "bubble", "bubble_render"), ("Dot Plot", "dot", "dot_render"),
+    ):
+        # Axes keep their defaults (the same column for x and y); bubble sizes
+        # must not be negative.
+        extra = {"bubble_size": "size"} if kind == "bubble" else {}
+        cases += [(chart_type, {key: strategy, **extra}) for strategy in CHART_STRATEGIES[kind]]
+    return cases
+
+def check_code_snippets(rows):
+    # Every "show code" snippet must run on its own against the user's df,
+    # with only the imports the snippets assume.
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from plotly.basedatatypes import BaseFigure
+    from streamlit.testing.v1 import AppTest
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "x": rng.normal(size=rows),
+        "y": rng.normal(size=rows),
+        "size": rng.uniform(1, 10, rows),
+        "city": rng.choice(["Oslo", "Lima", "Pune"], rows).astype(object),
+        "group": pd.Categorical(rng.choice(["a", "b"], rows)),
+    })
+    failures = []
+    for chart_type, state in snippet_cases():
+        label = f"snippet/{chart_type}/{'/'.join(map(str, state.values())) or 'default'}"
+        at = AppTest.from_function(_render_panel, args=(chart_type,), default_timeout=120)
+        at.session_state["check_df"] = df
+        # Small enough that the sampling strategies reduce the frame.
+        at.session_state["point_budget"] = max(rows // 4, 10)
+        for key, value in state.items():
+            at.session_state[key] = value
+        at.run()
+        at.button[0].click().run()
+        for _ in range(SNIPPET_MAX_RERUNS):
+            if at.code or at.exception:
+                break
+            time.sleep(0.1)
+            at.run()
+        if at.exception or not at.code:
+            failures.append(f"{label}: no snippet shown ({at.exception[0].message if at.exception else 'timed out'})")
+            continue
+        for block in at.code:
+            namespace = {"df": df.copy(), "pd": pd, "np": np, "px": px, "go": go}
+            try:
+                with mock.patch.object(BaseFigure, "show"):
+                    exec(block.value, namespace)
+                assert isinstance(namespace.get("fig"), BaseFigure), "snippet does not build fig"
+            except Exception as e:
+                failures.append(f"{label}: {type(e).__name__}: {e}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the fixed regression checks.")
+    parser.add_argument("--rows", type=int, default=2_000, help="rows per generated frame (default: 2000)")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    failures = []
+    for check in (check_dates_with_missing, check_code_snippets):
+        found = check(args.rows)
+        print(f"{check.__name__:<40}{'FAILED' if found else 'ok'}", flush=True)
+        failures += found
+
+    if failures:
+        print(f"\n{len(failures)} failure(s):")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll checks passed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# Synthetic Datasets
+# ----------------------------
+# Deterministic generators shared by the benchmark scripts. Columns cycle
+# through numeric, text and numeric-like text so every cleaning step has work.
+
+CITIES = ["  New York", "london ", "Paris", "TOKYO", "berlin", "Madrid  ", "Rome", "Oslo"]
+
+def make_frame(rows, cols, text_fraction=0.3, null_fraction=0.05, high_cardinality=False, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    n_text = int(round(cols * text_fraction))
+    for i in range(cols):
+        if i < n_text:
+            if high_cardinality and i % 2 == 0:
+                # Every other text column is an ID-like column; the rest stay
+                # low-cardinality so charts still have a usable grouping column.
+                values = np.char.add("id_", rng.integers(0, rows, rows).astype(str)).astype(object)
+            elif i % 3 == 2:
+                # Numeric values stored as text, converted by step 5.
+                values = rng.integers(0, 1000, rows).astype(str).astype(object)
+            else:
+                values = rng.choice(CITIES, rows).astype(object)
+            name = f"text_{i}"
+        else:
+            if i % 4 == 0:
+                values = rng.integers(0, 100, rows).astype(float)
+            else:
+                values = rng.normal(100.0, 15.0, rows)
+                # A few extreme values for the outlier step.
+                values[rng.integers(0, rows, max(1, rows // 500))] *= 20
+            name = f"num_{i}"
+        if null_fraction > 0:
+            values[rng.random(rows) < null_fraction] = np.nan if values.dtype.kind == "f" else None
+        data[name] = values
+    df = pd.DataFrame(data)
+    # Some exact duplicate rows for step 1.
+    n_dupes = max(1, rows // 100)
+    return pd.concat([df, df.iloc[:n_dupes]], ignore_index=True)
+
+def make_wide_frame(rows=2_000, cols=300, seed=0):
+    return make_frame(rows, cols, seed=seed)
+
+def make_tall_frame(rows=1_000_000, cols=8, seed=0):
+    return make_frame(rows, cols, seed=seed)
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%b %d, %Y"]
+
+def make_text_frame(rows=1_000_000, cols=12, seed=0):
+    # Everything arrives as text, as from a CSV read without dtypes: dates in
+    # several formats (only some under date-like names), numbers stored as
+    # text, plain labels, weekday names and a numeric column whose name
+    # contains "day".
+    rng = np.random.default_rng(seed)
+    stamps = pd.date_range("2020-01-01", periods=5_000, freq="7h")
+    picks = rng.integers(0, len(stamps), rows)
+    data = {"daycare_count": rng.integers(0, 40, rows)}
+    for i in range(cols - 1):
+        kind = i % 4
+        if kind == 0:
+            fmt = DATE_FORMATS[(i // 4) % len(DATE_FORMATS)]
+            name = f"date_{i}" if i % 8 == 0 else f"recorded_{i}"
+            values = stamps.strftime(fmt).to_numpy(dtype=object)[picks]
+        elif kind == 1:
+            name, values = f"amount_{i}", np.round(rng.normal(100.0, 15.0, rows), 2).astype(str).astype(object)
+        elif kind == 2:
+            name, values = f"label_{i}", rng.choice(CITIES, rows).astype(object)
+        else:
+            # Text under a date-like name.
+            name, values = f"day_of_week_{i}", rng.choice(WEEKDAYS, rows).astype(object)
+        data[name] = values
+    return pd.DataFrame(data)
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import stat
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# Fingerprints
+# ----------------------------
+def hash_bytes(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def hash_key(*parts):
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+def estimate_nbytes(value, sample_size=1000):
+    # memory_usage(deep=True) walks every Python object; for large text
+    # columns extrapolate from a sample instead.
+    if isinstance(value, pd.Series):
+        value = value.to_frame()
+    if isinstance(value, pd.DataFrame):
+        n = len(value)
+        if n <= sample_size:
+            return int(value.memory_usage(deep=True).sum())
+        shallow = value.memory_usage(deep=False).astype(np.float64)
+        sample = value.iloc[:: max(1, n // sample_size)].iloc[:sample_size]
+        deep = sample.memory_usage(deep=True) * (n / len(sample))
+        is_object = value.dtypes.reindex(shallow.index).astype(str).eq("object")
+        return int(shallow.where(~is_object, deep).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "to_plotly_json") and hasattr(value, "data"):
+        # Plotly figures, by their traces (which hold the data arrays).
+        return sum(estimate_nbytes(trace.to_plotly_json()) for trace in value.data)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_nbytes(v) for v in value)
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return sys.getsizeof(value)
+
+# ----------------------------
+# On-disk Directories
+# ----------------------------
+def private_directory(directory):
+    # Creates directory (mode 0700) for on-disk caches and stores. Returns
+    # False if it is not a directory owned by this user, in which case the
+    # caller should not use it: file names there are predictable content
+    # hashes, so anyone who could write to it could plant data for a
+    # matching upload. Group and other access is removed if present.
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+        if not stat.S_ISDIR(info.st_mode):
+            return False
+        if hasattr(os, "getuid"):
+            if info.st_uid != os.getuid():
+                return False
+            if info.st_mode & 0o077:
+                os.chmod(directory, 0o700)
+    except OSError:
+        return False
+    return True
+
+# ----------------------------
+# Bounded LRU cache
+# ----------------------------
+class LRUCache:
+    # Thread-safe LRU cache bounded by entry count and by estimated size in bytes.
+    # Instances are meant to live at module level so every Streamlit session shares them.
+    # on_evict(key, value) is called whenever an entry leaves the cache, e.g. to
+    # delete a file the value refers to.
+
+    def __init__(self, max_entries=32, max_bytes=1024 * 1024 * 1024, sizeof=estimate_nbytes, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self._items = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return default
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._items:
+                self._discard(key)
+            # Values larger than the whole budget are not worth caching.
+            if size > self.max_bytes:
+                return value
+            self._items[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+            while self._items and (len(self._items) > self.max_entries or self._total_bytes > self.max_bytes):
+                self._discard(next(iter(self._items)))
+        return value
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._items):
+                self._discard(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _discard(self, key):
+        value = self._items.pop(key)
+        self._total_bytes -= self._sizes.pop(key)
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+_MISSING = object()
@@ -0,0 +1,75 @@
+import os
+
+from caching import LRUCache, estimate_nbytes, hash_key
+from instrumentation import span
+from lazy_imports import load_object
+from profiling import get_profile
+
+# ----------------------------
+# Registry
+# ----------------------------
+# Every chart type with the "module:function" paths of its figure builder
+# (figures.py, pure Plotly) and its Streamlit option panel
+# (plot_functions.py). Listing the charts imports neither; a builder's module,
+# and with it Plotly Express, is only imported when a chart is first built.
+CHART_TYPES = {
+    "Scatter Plot": {"builder": "figures:build_scatter_plot", "panel": "plot_functions:generate_scatter_plot"},
+    "Line Plot": {"builder": "figures:build_line_plot", "panel": "plot_functions:generate_line_plot"},
+    "Bar Chart": {"builder": "figures:build_bar_chart", "panel": "plot_functions:generate_bar_chart"},
+    "Histogram": {"builder": "figures:build_histogram", "panel": "plot_functions:generate_histogram"},
+    "Box Plot": {"builder": "figures:build_box_plot", "panel": "plot_functions:generate_box_plot"},
+    "Violin Plot": {"builder": "figures:build_violin_plot", "panel": "plot_functions:generate_violin_plot"},
+    "Count Plot": {"builder": "figures:build_count_plot", "panel": "plot_functions:generate_count_plot"},
+    "Heatmap": {"builder": "figures:build_heatmap", "panel": "plot_functions:generate_heatmap"},
+    "Bubble Chart": {"builder": "figures:build_bubble_chart", "panel": "plot_functions:generate_bubble_chart"},
+    "Pie Chart": {"builder": "figures:build_pie_chart", "panel": "plot_functions:generate_pie_chart"},
+    "Dot Plot": {"builder": "figures:build_dot_plot", "panel": "plot_functions:generate_dot_plot"},
+    "Radar Chart": {"builder": "figures:build_radar_chart", "panel": "plot_functions:generate_radar_chart"},
+}
+
+def _chart(chart_type):
+    if chart_type not in CHART_TYPES:
+        raise ValueError(f"Unknown chart type '{chart_type}'. Choose one of: {', '.join(CHART_TYPES)}")
+    return CHART_TYPES[chart_type]
+
+def chart_builder(chart_type):
+    return load_object(_chart(chart_type)["builder"])
+
+def chart_panel(chart_type):
+    return load_object(_chart(chart_type)["panel"])
+
+def build_chart(chart_type, df, params):
+    return chart_builder(chart_type)(df, **params)
+
+# ----------------------------
+# Figure Cache
+# ----------------------------
+# Built figures are memoized on the dataset fingerprint, chart type and
+# parameters, so re-opening a chart or switching back to it skips the rebuild.
+# Like the cleaning cache this lives at module level and is shared between
+# sessions: treat returned figures as read-only.
+FIGURE_CACHE_MAX_ENTRIES = int(os.environ.get("PLOTPILOT_FIGURE_CACHE_ENTRIES", 128))
+FIGURE_CACHE_MAX_MB = int(os.environ.get("PLOTPILOT_FIGURE_CACHE_MB", 512))
+
+def figure_nbytes(value):
+    fig, meta = value
+    return sum(estimate_nbytes(trace.to_plotly_json()) for trace in fig.data) + estimate_nbytes(meta)
+
+figure_cache = LRUCache(
+    max_entries=FIGURE_CACHE_MAX_ENTRIES,
+    max_bytes=FIGURE_CACHE_MAX_MB * 1024 * 1024,
+    sizeof=figure_nbytes,
+)
+
+def figure_key(chart_type, df, params, fingerprint=None):
+    # fingerprint identifies the data in df; it defaults to a content hash
+    # computed once per frame by its column profile.
+    if fingerprint is None:
+        fingerprint = get_profile(df).fingerprint()
+    return hash_key(fingerprint, chart_type, sorted(params.items()))
+
+def build_figure(chart_type, df, params, fingerprint=None):
+    with span("figure.build", chart=chart_type, rows_in=len(df)) as s:
+        key = figure_key(chart_type, df, params, fingerprint)
+        s.set(cached=key in figure_cache)
+        return figure_cache.get_or_compute(key, lambda: build_chart(chart_type, df, params))
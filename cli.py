@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from data_cleaning import clean_data
+from backends import BACKENDS, use_backend
+from charts import CHART_TYPES, build_chart
+from ingestion import read_files
+
+try:
+    import yaml
+except ImportError:  # YAML specs are optional; JSON always works.
+    yaml = None
+
+# ----------------------------
+# Batch Rendering
+# ----------------------------
+# Renders a list of charts from a spec file without the Streamlit UI:
+#
+#   python cli.py data.csv spec.yaml --out charts --workers 4
+#
+# The dataset is loaded and cleaned once, then handed to each worker process
+# when it starts, so charts are built in parallel without re-reading the file.
+#
+# Spec format (JSON, or YAML when PyYAML is installed):
+#
+#   dataset: data.csv            # optional if given on the command line
+#   cleaning:                    # optional, same options as the sidebar
+#     normalize_text: true
+#     drop_empty_cols: true
+#     missing_choice: Fill
+#     remove_outliers: false
+#   charts:
+#     - type: Scatter Plot
+#       name: price_vs_area      # output file name, defaults to chart_<n>
+#       params: {x: area, y: price, color: city}
+
+OUTPUT_FORMATS = ("html", "json")
+CLEANING_OPTIONS = ("normalize_text", "drop_empty_cols", "missing_choice", "remove_outliers")
+
+def load_spec(path):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise SystemExit("PyYAML is required for YAML specs: pip install pyyaml (or use a JSON spec).")
+        spec = yaml.safe_load(text)
+    else:
+        spec = json.loads(text)
+    if not isinstance(spec, dict) or not isinstance(spec.get("charts"), list):
+        raise SystemExit(f"{path}: the spec must be a mapping with a 'charts' list.")
+    unknown = set(spec.get("cleaning") or {}) - set(CLEANING_OPTIONS)
+    if unknown:
+        raise SystemExit(f"{path}: unknown cleaning options: {', '.join(sorted(unknown))}")
+    for i, chart in enumerate(spec["charts"]):
+        if chart.get("type") not in CHART_TYPES:
+            raise SystemExit(f"{path}: chart {i} has unknown type {chart.get('type')!r}. Choose one of: {', '.join(CHART_TYPES)}")
+        chart.setdefault("name", f"chart_{i + 1}")
+        chart.setdefault("params", {})
+    names = [chart["name"] for chart in spec["charts"]]
+    if len(set(names)) != len(names):
+        raise SystemExit(f"{path}: chart names must be unique.")
+    return spec
+
+def load_dataset(path):
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    if path.endswith(".xlsx"):
+        # First sheet, through the same engine and parsed-file cache as the app.
+        with open(path, "rb") as f:
+            df, _ = read_files([(os.path.basename(path), f.read())])
+        return df
+    raise SystemExit(f"{path}: only .csv and .xlsx files are supported.")
+
+# ----------------------------
+# Workers
+# ----------------------------
+_worker_df = None
+
+def _init_worker(df):
+    global _worker_df
+    _worker_df = df
+
+def render_chart(chart, out_dir, formats, df=None, backend=None):
+    df = _worker_df if df is None else df
+    result = {"name": chart["name"], "type": chart["type"], "files": [], "bytes": 0}
+    try:
+        start = time.perf_counter()
+        with use_backend(backend):
+            fig, meta = build_chart(chart["type"], df, chart["params"])
+        result["build_seconds"] = time.perf_counter() - start
+        result["meta"] = meta
+
+        start = time.perf_counter()
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{chart['name']}.{fmt}")
+            if fmt == "html":
+                fig.write_html(path, include_plotlyjs="cdn")
+            else:
+                fig.write_json(path)
+            result["files"].append(path)
+            result["bytes"] += os.path.getsize(path)
+        result["write_seconds"] = time.perf_counter() - start
+    except Exception as e:  # Reported per chart so one bad spec entry does not stop the batch.
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+def render_all(df, charts, out_dir, formats, workers, backend=None):
+    if workers <= 1:
+        for chart in charts:
+            yield render_chart(chart, out_dir, formats, df=df, backend=backend)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(df,)) as pool:
+        futures = [pool.submit(render_chart, chart, out_dir, formats, backend=backend) for chart in charts]
+        for future in as_completed(futures):
+            yield future.result()
+
+# ----------------------------
+# Entry Point
+# ----------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render PlotPilot charts from a spec file without the web UI.")
+    parser.add_argument("dataset", nargs="?", help="CSV or XLSX file (overrides 'dataset' in the spec)")
+    parser.add_argument("spec", help="JSON or YAML chart spec")
+    parser.add_argument("--out", default="charts", help="output directory (default: charts)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("--format", default="html", help="comma-separated output formats: html, json (default: html)")
+    parser.add_argument("--no-clean", action="store_true", help="render the raw data without the cleaning pipeline")
+    parser.add_argument("--backend", choices=BACKENDS, help="execution engine for cleaning and aggregations (default: PLOTPILOT_BACKEND or auto)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    formats = [fmt.strip() for fmt in args.format.split(",") if fmt.strip()]
+    bad = [fmt for fmt in formats if fmt not in OUTPUT_FORMATS]
+    if bad or not formats:
+        raise SystemExit(f"Unsupported format(s): {', '.join(bad) or '(none)'}. Choose from: {', '.join(OUTPUT_FORMATS)}")
+
+    spec = load_spec(args.spec)
+    dataset = args.dataset or spec.get("dataset")
+    if not dataset:
+        raise SystemExit("No dataset given: pass it on the command line or set 'dataset' in the spec.")
+
+    start = time.perf_counter()
+    df = load_dataset(dataset)
+    print(f"Loaded {dataset}: {len(df):,} rows x {df.shape[1]} columns in {time.perf_counter() - start:.2f}s")
+    if not args.no_clean:
+        start = time.perf_counter()
+        df, _ = clean_data(df, backend=args.backend, **(spec.get("cleaning") or {}))
+        print(f"Cleaned: {len(df):,} rows x {df.shape[1]} columns in {time.perf_counter() - start:.2f}s")
+
+    os.makedirs(args.out, exist_ok=True)
+    charts = spec["charts"]
+    workers = max(1, min(args.workers, len(charts)))
+    results = []
+    start = time.perf_counter()
+    for result in render_all(df, charts, args.out, formats, workers, args.backend):
+        results.append(result)
+        if "error" in result:
+            print(f"  FAILED {result['name']} ({result['type']}): {result['error']}")
+        else:
+            print(f"  {result['name']:<30} build {result['build_seconds']:6.2f}s  "
+                  f"write {result['write_seconds']:6.2f}s  {result['bytes'] / 1024:10.1f} KB")
+    total = time.perf_counter() - start
+
+    order = {chart["name"]: i for i, chart in enumerate(charts)}
+    results.sort(key=lambda r: order[r["name"]])
+    failed = [r for r in results if "error" in r]
+    manifest = {
+        "dataset": dataset,
+        "rows": len(df),
+        "cleaned": not args.no_clean,
+        "workers": workers,
+        "seconds": total,
+        "charts": results,
+    }
+    with open(os.path.join(args.out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    print(f"Rendered {len(results) - len(failed)}/{len(results)} charts in {total:.2f}s with {workers} worker(s) -> {args.out}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+from lazy_imports import optional_module
+from rendering import sample_rows
+
+# ----------------------------
+# Settings
+# ----------------------------
+# Correlations are computed in float32 as matrix products of standardized
+# columns, so hundreds of columns cost a few BLAS calls instead of one pass
+# per pair. Above CORRELATION_SAMPLE_ROWS rows a random row sample is used
+# unless all rows are requested.
+CORRELATION_METHODS = ("pearson", "spearman", "kendall")
+CORRELATION_SAMPLE_ROWS = 200_000
+# Kendall's tau compares every pair of rows, so it always runs on a sample of
+# at most this many rows; row pairs are processed in blocks to bound memory.
+KENDALL_SAMPLE_ROWS = 1000
+KENDALL_PAIR_BLOCK = 16_384
+COLUMN_ORDERS = ("original", "clustered")
+# Cell labels are only drawn on small matrices; larger ones show values on hover.
+ANNOTATE_MAX_COLUMNS = 20
+TOP_PAIRS = 20
+
+# ----------------------------
+# Correlation Matrix
+# ----------------------------
+def _standardized(values, present):
+    # Centered and scaled per column, with missing values left as NaN; keeps
+    # float32 sums well conditioned.
+    if present.all():
+        mean, std = values.mean(axis=0, dtype=np.float64), values.std(axis=0, dtype=np.float64)
+    else:
+        mean, std = np.nanmean(values, axis=0, dtype=np.float64), np.nanstd(values, axis=0, dtype=np.float64)
+    constant = ~(std > 0)
+    std[constant] = 1.0
+    return ((values - mean.astype(np.float32)) / std.astype(np.float32)), constant
+
+def column_ranks(values):
+    # Average ranks per column (ties share the mean of their positions), NaN
+    # where values are missing. Columns are sorted as contiguous rows with
+    # NumPy's default sort, which is several times faster than DataFrame.rank()
+    # or a stable sort; stability does not matter for average ranks.
+    columns = np.ascontiguousarray(values.T)
+    n = columns.shape[1]
+    order = np.argsort(columns, axis=1)
+    ordered = np.take_along_axis(columns, order, axis=1)
+    position = np.broadcast_to(np.arange(n), columns.shape)
+    starts = np.ones(columns.shape, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    ends = np.ones(columns.shape, dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, position, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, position, n)[:, ::-1], axis=1)[:, ::-1]
+    ranks = np.empty(columns.shape, dtype=np.float32)
+    np.put_along_axis(ranks, order, ((first + last) / 2 + 1).astype(np.float32), axis=1)
+    ranks[np.isnan(columns)] = np.nan
+    return ranks.T
+
+def pearson_matrix(values):
+    # Pairwise-complete Pearson correlation, as DataFrame.corr() computes it:
+    # each pair uses the rows where both columns are present. Without missing
+    # values that is a single Gram matrix.
+    present = ~np.isnan(values)
+    x, constant = _standardized(values, present)
+    if present.all():
+        n = x.shape[0]
+        sums = x.sum(axis=0, dtype=np.float64)
+        cov = x.T @ x - np.outer(sums, sums) / n
+        var = np.diag(cov).copy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.sqrt(np.outer(var, var))
+    else:
+        mask = present.astype(np.float32)
+        x = np.where(present, x, np.float32(0))
+        n = mask.T @ mask
+        sums = x.T @ mask
+        squares = (x * x).T @ mask
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = x.T @ x - sums * sums.T / n
+            var = squares - sums * sums / n
+            corr = cov / np.sqrt(var * var.T)
+        # Pairs with fewer than two common rows, or a column that is constant
+        # on them, have no correlation.
+        flat = var <= 1e-6 * np.maximum(n, 1)
+        corr[(n < 2) | flat | flat.T] = np.nan
+    with np.errstate(invalid="ignore"):
+        corr = np.clip(corr, -1.0, 1.0)
+    # Constant columns have no correlation, as in pandas.
+    corr[constant, :] = np.nan
+    corr[:, constant] = np.nan
+    np.fill_diagonal(corr, np.where(constant, np.nan, 1.0))
+    return corr
+
+def kendall_matrix(values, block=KENDALL_PAIR_BLOCK):
+    # Kendall's tau-b is the cosine similarity of the columns' concordance
+    # signs over all row pairs, so it accumulates as Gram matrices block by
+    # block; pairs where a column is missing count for neither side.
+    n, p = values.shape
+    first, second = np.triu_indices(n, 1)
+    gram = np.zeros((p, p), dtype=np.float64)
+    untied = np.zeros((p, p), dtype=np.float64)
+    for start in range(0, first.size, block):
+        a, b = first[start:start + block], second[start:start + block]
+        diff = values[b] - values[a]
+        valid = (~np.isnan(diff)).astype(np.float32)
+        signs = np.nan_to_num(np.sign(diff)).astype(np.float32)
+        gram += signs.T @ signs
+        untied += (signs * signs).T @ valid
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = gram / np.sqrt(untied * untied.T)
+    np.fill_diagonal(corr, np.where(np.diag(untied) > 0, 1.0, np.nan))
+    return np.clip(corr, -1.0, 1.0)
+
+def correlation_matrix(df, method="pearson", max_rows=CORRELATION_SAMPLE_ROWS):
+    # Returns (correlation DataFrame, rows used). max_rows=None uses every
+    # row, except for Kendall which is always sampled.
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unknown correlation method '{method}'. Choose one of: {', '.join(CORRELATION_METHODS)}")
+    if method == "kendall":
+        max_rows = min(max_rows or KENDALL_SAMPLE_ROWS, KENDALL_SAMPLE_ROWS)
+    data = sample_rows(df, max_rows) if max_rows else df
+    values = data.to_numpy(dtype=np.float32, na_value=np.nan)
+    if method == "spearman":
+        # Ranks are taken per column, so with missing values they can differ
+        # slightly from pandas, which ranks each pair's common rows.
+        values = column_ranks(values)
+    corr = kendall_matrix(values) if method == "kendall" else pearson_matrix(values)
+    return pd.DataFrame(corr, index=df.columns, columns=df.columns), len(data)
+
+# ----------------------------
+# Ordering and Filtering
+# ----------------------------
+def _distance(corr):
+    strength = np.nan_to_num(np.abs(corr.to_numpy()))
+    np.fill_diagonal(strength, 1.0)
+    return 1.0 - np.maximum(strength, strength.T)
+
+def cluster_order(corr):
+    # Column order that puts strongly correlated columns next to each other:
+    # average-linkage clustering on 1 - |r| with optimal leaf ordering, or the
+    # Fiedler vector of the |r| graph when SciPy is not installed.
+    n = len(corr)
+    if n < 3:
+        return list(corr.columns)
+    distance = _distance(corr)
+    # SciPy is imported by the first clustered heatmap.
+    hierarchy = optional_module("scipy.cluster.hierarchy")
+    if hierarchy is not None:
+        condensed = optional_module("scipy.spatial.distance").squareform(distance, checks=False)
+        linkage = hierarchy.optimal_leaf_ordering(hierarchy.linkage(condensed, method="average"), condensed)
+        order = hierarchy.leaves_list(linkage)
+    else:
+        affinity = 1.0 - distance
+        np.fill_diagonal(affinity, 0.0)
+        laplacian = np.diag(affinity.sum(axis=1)) - affinity
+        _, vectors = np.linalg.eigh(laplacian)
+        order = np.argsort(vectors[:, 1], kind="stable")
+    return [corr.columns[i] for i in order]
+
+def top_pairs(corr, k=TOP_PAIRS, threshold=0.0):
+    # The k column pairs with the largest |r| at or above threshold.
+    values = corr.to_numpy()
+    first, second = np.triu_indices(len(values), 1)
+    r = values[first, second]
+    strength = np.abs(r)
+    keep = np.flatnonzero(strength >= threshold)
+    if keep.size > k:
+        keep = keep[np.argpartition(-strength[keep], k - 1)[:k]]
+    keep = keep[np.argsort(-strength[keep], kind="stable")]
+    return pd.DataFrame({
+        "Column A": corr.columns[first[keep]],
+        "Column B": corr.columns[second[keep]],
+        "Correlation": r[keep].astype(np.float64),
+    })
+
+def filter_threshold(corr, threshold):
+    # Blanks cells below |threshold| and drops columns without any pair at or
+    # above it.
+    if threshold <= 0:
+        return corr
+    strong = (corr.abs() >= threshold).to_numpy()
+    np.fill_diagonal(strong, False)
+    keep = strong.any(axis=0)
+    corr = corr.where(strong | np.eye(len(corr), dtype=bool))
+    return corr.loc[keep, keep]
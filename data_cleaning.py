@@ -0,0 +1,374 @@
+import os
+import time
+
+import pandas as pd
+import numpy as np
+
+from backends import backend_for, use_backend
+from caching import LRUCache, hash_key
+from instrumentation import span
+from type_inference import infer_and_convert
+
+# ----------------------------
+# Cleaning Cache
+# ----------------------------
+# Shared by every session of the app process. Every pipeline stage caches its
+# output frame keyed on the uploaded file's content hash plus the options of
+# that stage and of every stage before it, so changing a late option (e.g.
+# outlier removal) reuses the earlier stages and only reruns the tail.
+CLEAN_CACHE_MAX_ENTRIES = int(os.environ.get("PLOTPILOT_CLEAN_CACHE_ENTRIES", 64))
+CLEAN_CACHE_MAX_MB = int(os.environ.get("PLOTPILOT_CLEAN_CACHE_MB", 2048))
+
+clean_cache = LRUCache(
+    max_entries=CLEAN_CACHE_MAX_ENTRIES,
+    max_bytes=CLEAN_CACHE_MAX_MB * 1024 * 1024,
+)
+
+# ----------------------------
+# Cleaning Stages
+# ----------------------------
+# Each stage takes the frame produced by the previous stage and must not
+# modify it in place (it may be a cached, shared frame). Stages return the
+# new frame, their summary lines and any state later stages depend on.
+# Row-scale kernels go through the execution backend (backends.py), which
+# produces the same frames and summaries on every engine.
+CONSTANT_PROBE_ROWS = 1000
+
+def remove_duplicates_stage(df, state):
+    summary = []
+    duplicated = backend_for(df).duplicated(df)
+    if duplicated is None:
+        duplicated = df.duplicated().to_numpy()
+    duplicates_before = int(duplicated.sum())
+    if duplicates_before > 0:
+        # What drop_duplicates() does with the mask it computes.
+        df = df[~duplicated]
+        summary.append(f"✅ Removed {duplicates_before} duplicate row(s).")
+    return df, summary, state
+
+def normalize_text_stage(df, state, normalize_text=True):
+    summary = []
+    object_cols = df.select_dtypes(include=['object']).columns
+    category_cols = df.select_dtypes(include=['category']).columns
+    if len(object_cols) > 0 or len(category_cols) > 0:
+        df = df.copy()
+        backend = backend_for(df)
+        normalized = {col: backend.normalize_text(df[col], normalize_text) for col in object_cols}
+        pandas_cols = [col for col, values in normalized.items() if values is None]
+        if pandas_cols:
+            df[pandas_cols] = df[pandas_cols].apply(lambda x: x.str.strip())
+            if normalize_text:
+                df[pandas_cols] = df[pandas_cols].apply(lambda x: x.str.lower())
+        for col, values in normalized.items():
+            if values is not None:
+                df[col] = values
+        for col in category_cols:
+            df[col] = map_categories(df[col], lambda c: c.str.lower().str.strip() if normalize_text else c.str.strip())
+        if normalize_text:
+            summary.append("✅ Trimmed whitespace & normalized text columns to lowercase.")
+        else:
+            summary.append("✅ Trimmed whitespace in text columns.")
+    # Step 5 converts the text columns found here, before any are dropped.
+    state = dict(state, object_cols=list(object_cols))
+    return df, summary, state
+
+def drop_empty_columns_stage(df, state, drop_empty_cols=True):
+    summary = []
+    if drop_empty_cols:
+        empty_cols = list(df.columns[df.isnull().all().to_numpy()])
+        if empty_cols:
+            df = df.drop(columns=empty_cols)
+            summary.append(f"🗑️ Dropped {len(empty_cols)} empty column(s): {empty_cols}")
+    return df, summary, state
+
+def missing_values_stage(df, state, missing_choice="Fill"):
+    summary = []
+    if missing_choice == "Fill":
+        # Null counts, medians and modes are computed once for all columns and
+        # applied with a single fillna.
+        null_counts = df.isnull().sum()
+        missing_cols = [col for col, count in null_counts.items() if count > 0]
+        numeric_missing = [col for col in missing_cols if pd.api.types.is_numeric_dtype(df[col])]
+        other_missing = [col for col in missing_cols if col not in numeric_missing]
+        # The backend returns the columns it handles; pandas computes the rest.
+        backend = backend_for(df)
+        medians = backend.medians(df, numeric_missing)
+        rest = [col for col in numeric_missing if col not in medians]
+        if rest:
+            medians.update(df[rest].median().items())
+        modes = backend.modes(df, other_missing)
+        rest = [col for col in other_missing if col not in modes]
+        if rest:
+            rest_modes = df[rest].mode()
+            modes.update((col, rest_modes[col].iloc[0] if len(rest_modes) > 0 else np.nan) for col in rest)
+
+        fill_values = {}
+        for col in missing_cols:
+            missing_count = null_counts[col]
+            if col in medians:
+                median = medians[col]
+                fill_values[col] = median
+                summary.append(f"✅ Filled {missing_count} missing value(s) in numeric column '{col}' with median ({median:.2f}).")
+            else:
+                mode = modes[col] if not pd.isna(modes[col]) else "Unknown"
+                fill_values[col] = mode
+                summary.append(f"✅ Filled {missing_count} missing value(s) in categorical column '{col}' with mode ('{mode}').")
+        if fill_values:
+            # A categorical column only accepts fill values among its categories.
+            new_categories = {
+                col: df[col].cat.add_categories([value])
+                for col, value in fill_values.items()
+                if isinstance(df[col].dtype, pd.CategoricalDtype) and value not in df[col].cat.categories
+            }
+            if new_categories:
+                df = df.assign(**new_categories)
+            df = df.fillna(fill_values)
+    elif missing_choice == "Drop":
+        before_rows = df.shape[0]
+        df = df.dropna()
+        dropped = before_rows - df.shape[0]
+        summary.append(f"🗑️ Dropped {dropped} row(s) containing missing values.")
+    else:
+        summary.append("⚠️ Left missing values as NaN (no imputation).")
+    return df, summary, state
+
+def convert_numeric_stage(df, state):
+    summary = []
+    conversion_report = {}
+    object_cols = [col for col in state.get("object_cols", []) if col in df.columns]
+    if object_cols:
+        # Columns are only ever replaced, never written into, so a shallow
+        # copy leaves the input frame intact without copying every block.
+        df = df.copy(deep=False)
+    for col in object_cols:
+        # The type is picked on a sample, so text columns are rejected without
+        # parsing every row; a column is only converted if every value parses.
+        converted, _ = infer_and_convert(df[col], kinds=("numeric",))
+        if converted is not None:
+            df[col] = converted
+            conversion_report[col] = "Converted to numeric"
+        else:
+            # Columns that already hold only strings were stripped in step 2.
+            # Missing values stay missing rather than becoming the text "nan",
+            # which would hide dates from the datetime stage.
+            if pd.api.types.infer_dtype(df[col], skipna=False) != "string":
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str).str.strip())
+            conversion_report[col] = "Kept as text"
+    if conversion_report:
+        for k, v in conversion_report.items():
+            summary.append(f"🔄 Column '{k}': {v}")
+    return df, summary, state
+
+def describe_inference(report):
+    text = f"{report['confidence']:.0%} of sampled values matched"
+    if report["failed_fraction"] > 0:
+        text += f", {report['failed_fraction']:.2%} unparseable set to missing"
+    return text
+
+def title_case_stage(df, state):
+    object_cols = df.select_dtypes(include=['object']).columns
+    category_cols = df.select_dtypes(include=['category']).columns
+    if len(object_cols) > 0 or len(category_cols) > 0:
+        df = df.copy()
+        for col in object_cols:
+            df[col] = df[col].str.title()
+        for col in category_cols:
+            df[col] = map_categories(df[col], lambda c: c.str.title())
+    return df, [], state
+
+def convert_datetime_stage(df, state):
+    # Detected from the values, not the column name: numeric columns such as
+    # "daycare_count" are never touched, and dates under any name are found.
+    summary = []
+    converted_cols = {}
+    # Candidates are read off the dtypes: select_dtypes() would consolidate
+    # and copy the whole frame before a single column is sampled.
+    text_cols = [col for col, dtype in df.dtypes.items() if _is_text_dtype(dtype)]
+    for col in text_cols:
+        converted, report = infer_and_convert(df[col], kinds=("datetime",))
+        if converted is not None:
+            converted_cols[col] = converted
+            summary.append(f"📅 Converted '{col}' to datetime (format {report['format']}; {describe_inference(report)}).")
+    if converted_cols:
+        df = df.copy(deep=False)
+        for col, converted in converted_cols.items():
+            df[col] = converted
+    return df, summary, state
+
+def _is_text_dtype(dtype):
+    # The dtypes select_dtypes(include=['object', 'category', 'string']) picks.
+    return dtype == object or isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+def drop_constant_columns_stage(df, state):
+    df = df.dropna(axis=1, how='all')
+    df = df.loc[:, [not _is_constant(df[col]) for col in df.columns]]
+    return df, [], state
+
+def _is_constant(s):
+    # Same result as nunique() <= 1 without hashing every value: most columns
+    # already vary within their first rows, and the rest are compared against
+    # their first non-null value.
+    head = s.iloc[:CONSTANT_PROBE_ROWS]
+    if head.nunique() > 1:
+        return False
+    values = s.dropna()
+    if values.empty:
+        return True
+    return bool((values == values.iloc[0]).all())
+
+def outliers_stage(df, state, remove_outliers=False):
+    summary = []
+    numeric_cols = df.select_dtypes(include=np.number).columns
+    if remove_outliers:
+        # Each column's IQR bounds are computed on the rows kept by the previous
+        # columns, so the bounds stay sequential; rows are tracked in one mask
+        # and the frame is filtered once at the end instead of once per column.
+        outlier_report = {}
+        keep = np.ones(df.shape[0], dtype=bool)
+        for col in numeric_cols:
+            values = df[col].to_numpy(dtype=float, na_value=np.nan)
+            kept_values = values[keep]
+            if kept_values.size == 0:
+                break
+            Q1, Q3 = _nanquantiles(kept_values, [0.25, 0.75])
+            IQR = Q3 - Q1
+            lower_bound = Q1 - 1.5 * IQR
+            upper_bound = Q3 + 1.5 * IQR
+            in_bounds = (values >= lower_bound) & (values <= upper_bound)
+            removed = int(np.count_nonzero(keep & ~in_bounds))
+            keep &= in_bounds
+            if removed > 0:
+                outlier_report[col] = removed
+        if not keep.all():
+            df = df[keep]
+        if outlier_report:
+            for k, v in outlier_report.items():
+                summary.append(f"🗑️ Removed {v} outlier(s) from '{k}' using IQR.")
+        else:
+            summary.append("✅ No outliers detected/removed with IQR.")
+    elif len(numeric_cols) > 0:
+        means = df[numeric_cols].mean()
+        stds = df[numeric_cols].std()
+        for col in numeric_cols:
+            mean, std = means[col], stds[col]
+            if std > 0:
+                values = df[col].to_numpy(dtype=float, na_value=np.nan)
+                outliers = int(np.count_nonzero(np.abs(values - mean) > 3 * std))
+                if outliers > 0:
+                    summary.append(f"⚠️ Detected {outliers} potential outlier(s) in '{col}' (|z| > 3). Not removed.")
+    return df, summary, state
+
+def _nanquantiles(values, qs):
+    # Same linear interpolation as Series.quantile, ignoring NaN.
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return [np.nan] * len(qs)
+    return list(np.percentile(values, [q * 100 for q in qs]))
+
+def map_categories(s, func):
+    # Applies a string transform to the categories only (category columns come
+    # from the streaming reader). Categories that collide afterwards are merged.
+    categories = s.cat.categories
+    if not pd.api.types.is_string_dtype(categories):
+        return s
+    new_categories = func(categories.to_series(index=categories)).to_numpy(dtype=object)
+    if pd.Index(new_categories).is_unique:
+        return s.cat.rename_categories(new_categories)
+    codes = s.cat.codes.to_numpy()
+    values = new_categories[codes]
+    values[codes == -1] = np.nan
+    return pd.Series(values, index=s.index, name=s.name, dtype="category")
+
+# (name, stage function, cleaning options the stage depends on), in run order.
+CLEANING_STAGES = [
+    ("Remove duplicates", remove_duplicates_stage, ()),
+    ("Trim & normalize text", normalize_text_stage, ("normalize_text",)),
+    ("Drop empty columns", drop_empty_columns_stage, ("drop_empty_cols",)),
+    ("Handle missing values", missing_values_stage, ("missing_choice",)),
+    ("Convert numeric-like text", convert_numeric_stage, ()),
+    ("Standardize text case", title_case_stage, ()),
+    ("Convert datetime columns", convert_datetime_stage, ()),
+    ("Drop constant columns", drop_constant_columns_stage, ()),
+    ("Outlier handling", outliers_stage, ("remove_outliers",)),
+]
+
+# ----------------------------
+# Pipeline
+# ----------------------------
+def stage_keys(source_hash, options):
+    # Each key chains the previous one, so a stage's key changes whenever any
+    # option it (or an earlier stage) depends on changes.
+    keys = []
+    key = source_hash
+    for name, _, option_names in CLEANING_STAGES:
+        key = hash_key("clean_stage", key, name, tuple(options[o] for o in option_names))
+        keys.append(key)
+    return keys
+
+def run_cleaning_pipeline(df, source_hash=None, normalize_text=True, drop_empty_cols=True, missing_choice="Fill", remove_outliers=False, progress=None, backend=None):
+    # progress(fraction, message), if given, is called before each stage that
+    # runs and once at the end; it may raise to abort between stages. backend
+    # overrides PLOTPILOT_BACKEND; it is not part of the cache keys since
+    # every engine produces the same frames.
+    options = {
+        "normalize_text": normalize_text,
+        "drop_empty_cols": drop_empty_cols,
+        "missing_choice": missing_choice,
+        "remove_outliers": remove_outliers,
+    }
+    keys = stage_keys(source_hash, options) if source_hash is not None else None
+
+    # Resume from the deepest stage that is already cached.
+    start, state, summaries, timings = 0, {}, [], []
+    if keys is not None:
+        for i in range(len(keys) - 1, -1, -1):
+            cached = clean_cache.get(keys[i])
+            if cached is not None:
+                df, summaries, state = cached[0], list(cached[1]), cached[2]
+                start = i + 1
+                break
+    for name, _, _ in CLEANING_STAGES[:start]:
+        timings.append({"stage": name, "seconds": 0.0, "cached": True, "rows": df.shape[0]})
+
+    with use_backend(backend):
+        for i in range(start, len(CLEANING_STAGES)):
+            name, stage, option_names = CLEANING_STAGES[i]
+            if progress is not None:
+                progress(i / len(CLEANING_STAGES), f"Step {i + 1}/{len(CLEANING_STAGES)}: {name}")
+            t0 = time.perf_counter()
+            with span(f"clean.{name}", rows_in=df.shape[0], backend=backend_for(df).name) as s:
+                df, stage_summary, state = stage(df, state, **{o: options[o] for o in option_names})
+                s.set(rows_out=df.shape[0])
+            summaries = summaries + [tuple(stage_summary)]
+            timings.append({"stage": name, "seconds": time.perf_counter() - t0, "cached": False, "rows": df.shape[0]})
+            if keys is not None:
+                clean_cache.put(keys[i], (df, tuple(summaries), state))
+
+    if progress is not None:
+        progress(1.0, "Done")
+    summary = [line for stage_summary in summaries for line in stage_summary]
+    return df, summary, timings
+
+def clean_data(df, normalize_text=True, drop_empty_cols=True, missing_choice="Fill", remove_outliers=False, backend=None):
+    df, summary, _ = run_cleaning_pipeline(
+        df,
+        normalize_text=normalize_text,
+        drop_empty_cols=drop_empty_cols,
+        missing_choice=missing_choice,
+        remove_outliers=remove_outliers,
+        backend=backend
+    )
+    return df, summary
+
+def clean_data_cached(df, source_hash, normalize_text=True, drop_empty_cols=True, missing_choice="Fill", remove_outliers=False, progress=None, backend=None):
+    # Cached frames are shared between sessions: treat the returned frame as read-only.
+    return run_cleaning_pipeline(
+        df,
+        source_hash,
+        normalize_text=normalize_text,
+        drop_empty_cols=drop_empty_cols,
+        missing_choice=missing_choice,
+        remove_outliers=remove_outliers,
+        progress=progress,
+        backend=backend
+    )
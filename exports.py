@@ -0,0 +1,184 @@
+import gzip
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from caching import LRUCache, hash_key
+from lazy_imports import is_installed, optional_module
+from profiling import get_profile
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+# ----------------------------
+# Settings
+# ----------------------------
+# Exports are built only when requested, written to disk chunk by chunk so the
+# full file never has to sit in memory next to the frame, and kept in a
+# disk-bounded cache so downloading the same frame again is free.
+EXPORT_CHUNK_ROWS = 100_000
+EXPORT_CACHE_MAX_ENTRIES = int(os.environ.get("PLOTPILOT_EXPORT_CACHE_ENTRIES", 16))
+EXPORT_CACHE_MAX_MB = int(os.environ.get("PLOTPILOT_EXPORT_CACHE_MB", 2048))
+EXCEL_MAX_ROWS = 1_048_575  # one row of the sheet is taken by the header
+
+# ----------------------------
+# Writers
+# ----------------------------
+def iter_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+def write_csv_stream(df, stream, chunk_rows=EXPORT_CHUNK_ROWS):
+    header = True
+    for chunk in iter_chunks(df, chunk_rows):
+        stream.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+        header = False
+    if header:
+        # Empty frame: still write the header row.
+        stream.write(df.to_csv(index=False).encode("utf-8"))
+
+def write_csv(df, path):
+    with open(path, "wb") as f:
+        write_csv_stream(df, f)
+
+def write_csv_gzip(df, path):
+    with gzip.open(path, "wb", compresslevel=6) as f:
+        write_csv_stream(df, f)
+
+def write_csv_zstd(df, path):
+    with pa.CompressedOutputStream(path, "zstd") as f:
+        write_csv_stream(df, f)
+
+def arrow_schema(df):
+    # Taken from the whole frame so every chunk is converted to the same types,
+    # even when a chunk happens to be all-null in some column.
+    return pa.Schema.from_pandas(df, preserve_index=False)
+
+def write_parquet(df, path):
+    schema = arrow_schema(df)
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for chunk in iter_chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+def write_feather(df, path):
+    # Feather v2 is the Arrow IPC file format, which can be written batch by batch.
+    schema = arrow_schema(df)
+    options = pa.ipc.IpcWriteOptions(compression="lz4" if pa.Codec.is_available("lz4") else None)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+        for chunk in iter_chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+def excel_chunk(chunk):
+    # Excel has no time zones and no NaN; openpyxl expects None for blanks.
+    for col in chunk.select_dtypes(include=["datetimetz"]).columns:
+        chunk = chunk.assign(**{col: chunk[col].dt.tz_localize(None)})
+    return chunk.astype(object).where(chunk.notna(), None)
+
+def write_excel(df, path):
+    if len(df) > EXCEL_MAX_ROWS:
+        raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS:,} data rows; this dataset has {len(df):,}. Use CSV or Parquet instead.")
+    # Write-only workbooks stream rows to disk instead of building the sheet in memory.
+    workbook = optional_module("openpyxl").Workbook(write_only=True)
+    sheet = workbook.create_sheet("Cleaned Data")
+    sheet.append([str(col) for col in df.columns])
+    for chunk in iter_chunks(df):
+        for row in excel_chunk(chunk).itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(path)
+
+# ----------------------------
+# Formats
+# ----------------------------
+EXPORT_FORMATS = {
+    "csv": {"label": "CSV", "extension": "csv", "mime": "text/csv", "writer": write_csv, "available": True},
+    "csv.gz": {"label": "CSV (gzip)", "extension": "csv.gz", "mime": "application/gzip", "writer": write_csv_gzip, "available": True},
+    "csv.zst": {"label": "CSV (zstd)", "extension": "csv.zst", "mime": "application/zstd", "writer": write_csv_zstd,
+                "available": pa is not None and pa.Codec.is_available("zstd")},
+    "parquet": {"label": "Parquet", "extension": "parquet", "mime": "application/vnd.apache.parquet", "writer": write_parquet,
+                "available": pq is not None},
+    "feather": {"label": "Feather", "extension": "feather", "mime": "application/vnd.apache.arrow.file", "writer": write_feather,
+                "available": pa is not None},
+    "xlsx": {"label": "Excel", "extension": "xlsx", "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+             "writer": write_excel, "available": is_installed("openpyxl")},
+}
+
+def available_formats():
+    return [name for name, spec in EXPORT_FORMATS.items() if spec["available"]]
+
+# ----------------------------
+# Export Cache
+# ----------------------------
+_export_dir = tempfile.TemporaryDirectory(prefix="plotpilot-exports-")
+# One lock per export key, shared by the sessions building that key and
+# dropped once the last of them is done.
+_key_locks = {}
+_key_locks_lock = threading.Lock()
+
+def _remove_file(key, path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+export_cache = LRUCache(
+    max_entries=EXPORT_CACHE_MAX_ENTRIES,
+    max_bytes=EXPORT_CACHE_MAX_MB * 1024 * 1024,
+    sizeof=os.path.getsize,
+    on_evict=_remove_file,
+)
+
+@contextmanager
+def _key_lock(key):
+    with _key_locks_lock:
+        lock, users = _key_locks.get(key, (None, 0))
+        lock = lock or threading.Lock()
+        _key_locks[key] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _key_locks_lock:
+            users = _key_locks[key][1] - 1
+            if users:
+                _key_locks[key] = (lock, users)
+            else:
+                del _key_locks[key]
+
+def export_key(df, fmt, dataset_key=None):
+    # The caller's key for the frame (its upload or cleaning cache key) is
+    # shared across sessions; otherwise the profile version identifies it
+    # without hashing the data.
+    if dataset_key is None:
+        dataset_key = ("profile", get_profile(df).version)
+    return hash_key(dataset_key, fmt)
+
+def cached_export(df, fmt, dataset_key=None):
+    # Path of an already built export, or None; never builds one.
+    path = export_cache.get(export_key(df, fmt, dataset_key))
+    return path if path is not None and os.path.exists(path) else None
+
+def export_frame(df, fmt, dataset_key=None):
+    spec = EXPORT_FORMATS[fmt]
+    if not spec["available"]:
+        raise ValueError(f"{spec['label']} export needs an optional dependency that is not installed.")
+    key = export_key(df, fmt, dataset_key)
+    # Sessions asking for the same file wait for the first build instead of
+    # repeating it; different files are built in parallel.
+    with _key_lock(key):
+        path = cached_export(df, fmt, dataset_key)
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix="." + spec["extension"], dir=_export_dir.name)
+            os.close(fd)
+            try:
+                spec["writer"](df, path)
+            except BaseException:
+                os.remove(path)
+                raise
+            export_cache.put(key, path)
+    return path
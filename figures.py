@@ -0,0 +1,255 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from aggregations import (
+    finite_values, grouped, histogram_bins, group_means, category_counts,
+    group_aggregates, min_max_normalize, box_stats, group_box_stats, kde_grid,
+)
+from correlation import (
+    ANNOTATE_MAX_COLUMNS, COLUMN_ORDERS, CORRELATION_SAMPLE_ROWS, TOP_PAIRS,
+    cluster_order, filter_threshold, top_pairs,
+)
+from profiling import get_profile
+from rendering import (
+    DEFAULT_POINT_BUDGET, DENSITY_BINS,
+    choose_strategy, decimate_line, bin_2d, sample_rows,
+)
+
+# ----------------------------
+# Figure Builders
+# ----------------------------
+# Pure chart construction, shared by the Streamlit option panels in
+# plot_functions.py and the batch renderer in cli.py through the registry in
+# charts.py, which imports this module on first use. Each builder returns the
+# figure and a small dict describing how the data was reduced. Invalid
+# parameter combinations raise ValueError with a message for the user.
+
+def render_mode_kwargs(strategy):
+    return {} if strategy == "full" else {"render_mode": "webgl"}
+
+def build_scatter_plot(df, x, y, color=None, strategy="auto", point_budget=DEFAULT_POINT_BUDGET):
+    strategy = choose_strategy("scatter", len(df), point_budget, strategy)
+    if strategy == "density":
+        x_centers, y_centers, z = bin_2d(df, x, y, bins=DENSITY_BINS)
+        fig = go.Figure(go.Heatmap(x=x_centers, y=y_centers, z=z, colorscale="Viridis", colorbar=dict(title="Count")))
+        fig.update_layout(title=f"{x} vs. {y} (point density)", xaxis_title=x, yaxis_title=y)
+        return fig, {"strategy": strategy, "rows": len(df), "shown": DENSITY_BINS * DENSITY_BINS}
+    plot_df = sample_rows(df, point_budget) if strategy == "sample" else df
+    fig = px.scatter(plot_df, x=x, y=y, color=color, title=f"{x} vs. {y}", **render_mode_kwargs(strategy))
+    return fig, {"strategy": strategy, "rows": len(df), "shown": len(plot_df)}
+
+def build_line_plot(df, x, y, color=None, strategy="auto", point_budget=DEFAULT_POINT_BUDGET):
+    strategy = choose_strategy("line", len(df), point_budget, strategy)
+    if strategy in ("lttb", "minmax"):
+        plot_df = decimate_line(df, x, y, color, point_budget, method=strategy)
+    else:
+        plot_df = df
+    # Decimated lines are small enough for SVG; only the WebGL strategy switches renderer.
+    line_mode = "webgl" if strategy == "webgl" else "full"
+    fig = px.line(plot_df, x=x, y=y, color=color, title=f"Trend of {y} over {x}", **render_mode_kwargs(line_mode))
+    return fig, {"strategy": strategy, "rows": len(df), "shown": len(plot_df)}
+
+def build_bar_chart(df, x, y):
+    agg_df = group_means(df, x, y)
+    fig = px.bar(agg_df, x=x, y=y, color=x, title=f"Average {y} by {x}")
+    fig.update_layout(yaxis_title=f"Average of {y}")
+    return fig, {}
+
+def histogram_figure(df, column, title):
+    values = finite_values(df[column])
+    counts, edges = histogram_bins(values)
+    stats = box_stats(values)
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+    if stats is not None:
+        fig.add_trace(go.Box(
+            y=[column], q1=[stats["q1"]], median=[stats["median"]], q3=[stats["q3"]],
+            lowerfence=[stats["lowerfence"]], upperfence=[stats["upperfence"]],
+            orientation="h", name=column, showlegend=False, marker_color="#636efa"
+        ), row=1, col=1)
+        fig.add_trace(go.Scatter(
+            x=stats["outliers"], y=[column] * len(stats["outliers"]), mode="markers",
+            marker=dict(color="#636efa", size=4), showlegend=False, name="outliers"
+        ), row=1, col=1)
+    fig.add_trace(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+        name=column, showlegend=False, marker_color="#636efa"
+    ), row=2, col=1)
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_layout(title=title, bargap=0, xaxis2_title=column, yaxis2_title="count")
+    return fig
+
+def build_histogram(df, column):
+    return histogram_figure(df, column, f"Distribution of {column}"), {}
+
+def box_figure(df, x, y, title):
+    colors = px.colors.qualitative.Plotly
+    fig = go.Figure()
+    for i, (name, stats) in enumerate(group_box_stats(df, x, y).items()):
+        color = colors[i % len(colors)]
+        fig.add_trace(go.Box(
+            x=[name], q1=[stats["q1"]], median=[stats["median"]], q3=[stats["q3"]],
+            lowerfence=[stats["lowerfence"]], upperfence=[stats["upperfence"]],
+            name=str(name), legendgroup=str(name), marker_color=color
+        ))
+        if len(stats["outliers"]):
+            fig.add_trace(go.Scatter(
+                x=[name] * len(stats["outliers"]), y=stats["outliers"], mode="markers",
+                marker=dict(color=color, size=4), name=str(name), legendgroup=str(name), showlegend=False
+            ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y, legend_title=x)
+    return fig
+
+def build_box_plot(df, x, y):
+    return box_figure(df, x, y, f"Distribution of {y} by {x}"), {}
+
+def violin_figure(df, x, y, title):
+    # Each violin is a filled outline of the KDE mirrored around the
+    # category's position, with the precomputed box drawn inside.
+    colors = px.colors.qualitative.Plotly
+    fig = go.Figure()
+    names = []
+    for i, (name, series) in enumerate(grouped(df, x, y)):
+        values = finite_values(series)
+        grid, density = kde_grid(values)
+        if grid.size == 0:
+            continue
+        color = colors[i % len(colors)]
+        half_width = 0.4 * density / density.max()
+        position = len(names)
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([position + half_width, (position - half_width)[::-1]]),
+            y=np.concatenate([grid, grid[::-1]]),
+            fill="toself", mode="lines", line=dict(color=color, width=1),
+            name=str(name), legendgroup=str(name), hoverinfo="name"
+        ))
+        stats = box_stats(values)
+        fig.add_trace(go.Box(
+            x=[position], q1=[stats["q1"]], median=[stats["median"]], q3=[stats["q3"]],
+            lowerfence=[stats["lowerfence"]], upperfence=[stats["upperfence"]],
+            width=0.08, marker_color=color, name=str(name), legendgroup=str(name), showlegend=False
+        ))
+        names.append(str(name))
+    fig.update_layout(
+        title=title, yaxis_title=y, legend_title=x,
+        xaxis=dict(title=x, tickmode="array", tickvals=list(range(len(names))), ticktext=names)
+    )
+    return fig
+
+def build_violin_plot(df, x, y):
+    return violin_figure(df, x, y, f"Distribution of {y} by {x}"), {}
+
+def build_count_plot(df, column):
+    counts_df = category_counts(df, column)
+    fig = px.bar(counts_df, x=column, y="count", title=f"Count of {column}", color=column)
+    fig.update_layout(yaxis_title="Count")
+    return fig, {}
+
+def build_heatmap(df, method="pearson", order="original", threshold=0.0, top_k=TOP_PAIRS,
+                  max_rows=CORRELATION_SAMPLE_ROWS):
+    if order not in COLUMN_ORDERS:
+        raise ValueError(f"Unknown column order '{order}'. Choose one of: {', '.join(COLUMN_ORDERS)}")
+    profile = get_profile(df)
+    if len(profile.numeric_columns) < 2:
+        raise ValueError("A correlation heatmap needs at least two numeric columns.")
+    # The matrix is cached per dataset version, so changing the order,
+    # threshold or number of pairs does not recompute it.
+    corr, rows_used = profile.correlation(method, max_rows)
+    pairs = top_pairs(corr, top_k, threshold)
+    shown = filter_threshold(corr, threshold)
+    if shown.empty:
+        raise ValueError(f"No pair of columns reaches |r| >= {threshold:.2f}. Please lower the threshold.")
+    if order == "clustered":
+        columns = cluster_order(shown)
+        shown = shown.loc[columns, columns]
+
+    labels = [str(c) for c in shown.columns]
+    annotate = len(labels) <= ANNOTATE_MAX_COLUMNS
+    fig = go.Figure(go.Heatmap(
+        z=np.round(shown.to_numpy(dtype=np.float64), 3), x=labels, y=labels,
+        colorscale="RdBu", zmin=-1, zmax=1, colorbar=dict(title="r"),
+        texttemplate="%{z:.2f}" if annotate else None,
+        hovertemplate="%{y} / %{x}: %{z:.3f}<extra></extra>",
+    ))
+    fig.update_layout(
+        title=f"Correlation Heatmap of Numeric Variables ({method.capitalize()})",
+        yaxis=dict(autorange="reversed"),
+    )
+    return fig, {
+        "method": method,
+        "rows": len(df),
+        "rows_used": rows_used,
+        "columns": len(labels),
+        "total_columns": len(corr),
+        "annotated": annotate,
+        "pairs": pairs.to_dict("records"),
+    }
+
+def build_bubble_chart(df, x, y, size, color=None, strategy="auto", point_budget=DEFAULT_POINT_BUDGET):
+    strategy = choose_strategy("bubble", len(df), point_budget, strategy)
+    plot_df = sample_rows(df, point_budget) if strategy == "sample" else df
+    fig = px.scatter(plot_df, x=x, y=y, size=size, color=color, title=f"{x} vs. {y}, Sized by {size}", **render_mode_kwargs(strategy))
+    return fig, {"strategy": strategy, "rows": len(df), "shown": len(plot_df)}
+
+def build_pie_chart(df, names, values, top_n=10):
+    # Aggregate data in case categories are repeated; tied slices keep the
+    # order in which their categories first appear.
+    agg_df = group_aggregates(df, names, [values], "sum").reset_index()
+    agg_df = agg_df.sort_values(by=values, ascending=False, kind="stable")
+
+    # If there are more categories than top_n, group the rest
+    if len(agg_df) > top_n:
+        df_top = agg_df.head(top_n)
+        others_sum = agg_df.iloc[top_n:][values].sum()
+
+        # Create the 'Others' row as a new DataFrame
+        df_others = pd.DataFrame([{names: 'Others', values: others_sum}])
+
+        # Combine the top N with the 'Others' row
+        df_for_plot = pd.concat([df_top, df_others], ignore_index=True)
+        title = f"Top {top_n} Proportions of {values} by {names}"
+    else:
+        df_for_plot = agg_df
+        title = f"Proportion of {values} by {names}"
+
+    fig = px.pie(df_for_plot, names=names, values=values, title=title)
+    return fig, {}
+
+def build_dot_plot(df, x, y, color=None, strategy="auto", point_budget=DEFAULT_POINT_BUDGET):
+    strategy = choose_strategy("dot", len(df), point_budget, strategy)
+    plot_df = sample_rows(df, point_budget) if strategy == "sample" else df
+    fig = px.scatter(plot_df, x=x, y=y, color=color, title=f"{x} by {y}", **render_mode_kwargs(strategy))
+    fig.update_traces(marker=dict(size=12)) # Make dots larger
+    return fig, {"strategy": strategy, "rows": len(df), "shown": len(plot_df)}
+
+def build_radar_chart(df, category, metrics, agg="mean", normalize=False):
+    if not metrics:
+        raise ValueError("Please select at least one numeric variable.")
+    if get_profile(df).cardinality(category) > 10:
+        raise ValueError("Radar charts are best for comparing a few categories (less than 10). Please filter your data (Filter Rows for Charts) or pick another category.")
+
+    # One aggregated row per category; each becomes a closed polygon with
+    # one point per metric, so traces stay small whatever the row count.
+    metrics = list(metrics)
+    table = group_aggregates(df, category, metrics, agg)
+    if normalize:
+        table = min_max_normalize(table)
+    theta = metrics + metrics[:1]
+    fig = go.Figure()
+    for cat, values in zip(table.index, table.to_numpy()):
+        fig.add_trace(go.Scatterpolar(
+            r=np.append(values, values[:1]),
+            theta=theta,
+            mode='lines+markers',
+            name=str(cat),
+            fill='toself'
+        ))
+
+    scale = ", min-max normalized" if normalize else ""
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 1] if normalize else None)),
+        title=f"{agg.capitalize()} of Metrics by {category}{scale}"
+    )
+    return fig, {"categories": len(table), "agg": agg, "normalize": normalize}
@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from caching import LRUCache, hash_key
+from instrumentation import span
+from lazy_imports import optional_module
+from profiling import get_profile
+
+# ----------------------------
+# Settings
+# ----------------------------
+# Filters are lists of predicates, each a hashable tuple:
+#
+#   ("range", column, low, high)     low <= value <= high (numbers)
+#   ("dates", column, start, end)    start <= value < end (datetimes)
+#   ("in", column, (value, ...))     value is one of the listed values
+#
+# Each predicate compiles to a boolean mask over the frame. Masks are cached
+# per dataset version and predicate, so adding, removing or changing one
+# predicate only evaluates that one; the others are reused and combined with
+# a bitwise AND. The filtered frame is cached per predicate set, so reruns
+# and chart switches hand the same frame (and its column profile) to every
+# chart.
+FILTER_MASK_CACHE_MB = int(os.environ.get("PLOTPILOT_FILTER_MASK_CACHE_MB", 256))
+FILTER_VIEW_CACHE_MB = int(os.environ.get("PLOTPILOT_FILTER_VIEW_CACHE_MB", 1024))
+# numexpr only pays off on longer columns.
+NUMEXPR_MIN_ROWS = 100_000
+# Value lists in the filter panel show the most frequent values only.
+FILTER_MAX_OPTIONS = 200
+
+mask_cache = LRUCache(max_entries=256, max_bytes=FILTER_MASK_CACHE_MB * 1024 * 1024)
+view_cache = LRUCache(max_entries=16, max_bytes=FILTER_VIEW_CACHE_MB * 1024 * 1024)
+
+# ----------------------------
+# Predicates
+# ----------------------------
+def range_mask(s, low, high):
+    values = s.to_numpy(dtype=np.float64, na_value=np.nan)
+    # numexpr is imported by the first long range filter; without it range
+    # masks fall back to NumPy comparisons.
+    numexpr = optional_module("numexpr") if values.size >= NUMEXPR_MIN_ROWS else None
+    if numexpr is not None:
+        return numexpr.evaluate("(values >= low) & (values <= high)", local_dict={"values": values, "low": low, "high": high})
+    # NaN compares False on both sides, so missing values are excluded.
+    return (values >= low) & (values <= high)
+
+def dates_mask(s, start, end):
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    tz = getattr(s.dtype, "tz", None)
+    if tz is not None:
+        start, end = start.tz_localize(tz), end.tz_localize(tz)
+    return (s.ge(start) & s.lt(end)).to_numpy(dtype=bool)
+
+def in_mask(s, values):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # Compares integer codes instead of hashing every value.
+        codes = s.cat.categories.get_indexer(list(values))
+        return np.isin(s.cat.codes.to_numpy(), codes[codes >= 0])
+    return s.isin(list(values)).to_numpy(dtype=bool)
+
+PREDICATES = {"range": range_mask, "dates": dates_mask, "in": in_mask}
+
+def predicate_mask(df, predicate):
+    kind, column, *args = predicate
+    if kind not in PREDICATES:
+        raise ValueError(f"Unknown filter '{kind}'. Choose one of: {', '.join(PREDICATES)}")
+    key = hash_key("mask", get_profile(df).version, predicate)
+    return mask_cache.get_or_compute(key, lambda: PREDICATES[kind](df[column], *args))
+
+# ----------------------------
+# Filtered Frames
+# ----------------------------
+def filter_mask(df, predicates):
+    # AND of the predicates' masks; None when there is nothing to filter.
+    predicates = sorted(set(predicates), key=repr)
+    if not predicates:
+        return None
+    key = hash_key("combined", get_profile(df).version, predicates)
+
+    def combine():
+        mask = predicate_mask(df, predicates[0]).copy()
+        for predicate in predicates[1:]:
+            mask &= predicate_mask(df, predicate)
+        return mask
+    return mask_cache.get_or_compute(key, combine)
+
+def filter_frame(df, predicates):
+    # The rows of df matching every predicate. Without predicates, or when
+    # every row matches, df itself is returned, so nothing is copied.
+    with span("filter", rows_in=len(df), predicates=len(predicates)) as s:
+        mask = filter_mask(df, predicates)
+        if mask is None or mask.all():
+            s.set(rows_out=len(df))
+            return df
+        key = hash_key("view", get_profile(df).version, sorted(set(predicates), key=repr))
+        view = view_cache.get_or_compute(key, lambda: df[mask])
+        s.set(rows_out=len(view))
+        return view
+
+def filter_code(predicates):
+    # pandas code applying the same filter, for the generated snippets.
+    terms = []
+    for kind, column, *args in sorted(set(predicates), key=repr):
+        if kind == "range":
+            terms.append(f"df[{column!r}].between({args[0]!r}, {args[1]!r})")
+        elif kind == "dates":
+            terms.append(f"(df[{column!r}] >= {args[0]!r}) & (df[{column!r}] < {args[1]!r})")
+        else:
+            terms.append(f"df[{column!r}].isin({list(args[0])!r})")
+    if not terms:
+        return ""
+    return "df = df[" + " & ".join(f"({t})" for t in terms) + "]\n"
@@ -0,0 +1,494 @@
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from caching import estimate_nbytes, hash_bytes, hash_key, private_directory
+from lazy_imports import is_installed
+from sketches import DuplicateEstimator
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    ARROW_ERRORS = (pa.ArrowInvalid,)
+except ImportError:
+    pa = None
+    pa_csv = None
+    ARROW_ERRORS = ()
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+# ----------------------------
+# Settings
+# ----------------------------
+DEFAULT_CHUNK_ROWS = 250_000
+DEFAULT_MEMORY_LIMIT_MB = 2048
+# Text columns with at most this many distinct values (and a low distinct
+# ratio in the first chunk) are stored as category.
+CATEGORY_MAX_UNIQUE = 1000
+CATEGORY_MAX_RATIO = 0.5
+# Rows kept for the streamed describe() percentiles.
+RESERVOIR_ROWS = 100_000
+# Distinct values tracked per text column for unique/top/freq.
+MAX_TRACKED_VALUES = 100_000
+
+# python_calamine is the Rust parser behind pandas' "calamine" Excel engine;
+# pandas imports whichever engine is used when the first workbook is read.
+EXCEL_ENGINE = "calamine" if is_installed("python_calamine") else "openpyxl"
+EXCEL_WORKERS = int(os.environ.get("PLOTPILOT_EXCEL_WORKERS", min(4, os.cpu_count() or 1)))
+# Below this much workbook data, starting worker processes costs more than
+# parsing the sheets one after another.
+EXCEL_PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+# Parsed sheets are kept as Parquet files so reopening a workbook skips
+# parsing, even after a restart. The least recently used files are removed
+# once the directory grows past the cap. The directory is per user (under
+# XDG_CACHE_HOME, ~/.cache by default) and private to its owner.
+PARSED_CACHE_DIR = os.environ.get(
+    "PLOTPILOT_PARSED_CACHE_DIR",
+    os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "plotpilot", "parsed")
+)
+PARSED_CACHE_MAX_MB = int(os.environ.get("PLOTPILOT_PARSED_CACHE_MB", 4096))
+SOURCE_COLUMN = "source"
+
+# ----------------------------
+# Dtype Compaction
+# ----------------------------
+def plan_dtypes(chunk, compact_dtypes=True):
+    # Decided once from the first chunk so every chunk gets the same layout.
+    plan = {}
+    if not compact_dtypes:
+        return plan
+    for col in chunk.columns:
+        s = chunk[col]
+        if s.dtype == object:
+            n_unique = s.nunique(dropna=True)
+            # A column still empty in the first chunk tells nothing about its values.
+            if 0 < n_unique <= CATEGORY_MAX_UNIQUE and n_unique <= CATEGORY_MAX_RATIO * max(len(s), 1):
+                plan[col] = "category"
+        elif pd.api.types.is_float_dtype(s):
+            plan[col] = "float"
+        elif pd.api.types.is_integer_dtype(s):
+            plan[col] = "integer"
+    return plan
+
+def compact_chunk(chunk, plan):
+    if not plan:
+        return chunk
+    chunk = chunk.copy()
+    for col, kind in plan.items():
+        if col not in chunk.columns:
+            continue
+        s = chunk[col]
+        if kind == "category":
+            if s.dtype == object:
+                chunk[col] = s.astype("category")
+        elif kind == "float" and pd.api.types.is_float_dtype(s):
+            chunk[col] = pd.to_numeric(s, downcast="float")
+        elif kind == "integer" and pd.api.types.is_integer_dtype(s):
+            chunk[col] = pd.to_numeric(s, downcast="integer")
+    return chunk
+
+def concat_chunks(chunks):
+    if len(chunks) == 1:
+        return chunks[0]
+    columns = {}
+    for col in chunks[0].columns:
+        parts = [c[col] for c in chunks]
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            # pd.concat would fall back to object when the chunks saw
+            # different categories.
+            columns[col] = pd.Series(union_categoricals(parts), name=col)
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+# ----------------------------
+# Incremental Statistics
+# ----------------------------
+class StreamingStats:
+    # Null counts, duplicate rows and describe() statistics, updated chunk by
+    # chunk. Numeric moments are merged exactly (Chan et al.); percentiles
+    # come from a uniform reservoir sample of rows. Duplicates are counted
+    # exactly until the distinct row hashes pass the estimator's cap, then
+    # estimated from a hash sample so their memory stays bounded.
+
+    def __init__(self, reservoir_rows=RESERVOIR_ROWS, seed=0):
+        self.rows = 0
+        self.chunks = 0
+        self.null_counts = None
+        self.numeric = {}
+        self.values = {}
+        self.saturated = set()
+        self.duplicates = DuplicateEstimator()
+        self.reservoir = None
+        self.reservoir_filled = 0
+        self.reservoir_rows = reservoir_rows
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, chunk):
+        self.chunks += 1
+        nulls = chunk.isnull().sum()
+        self.null_counts = nulls if self.null_counts is None else self.null_counts.add(nulls, fill_value=0)
+        self._update_duplicates(chunk)
+        self._update_numeric(chunk)
+        self._update_values(chunk)
+        self._update_reservoir(chunk)
+        self.rows += len(chunk)
+
+    def _update_duplicates(self, chunk):
+        # Hash a dtype-normalized view so equal rows hash equally even when
+        # chunks were parsed with different numeric dtypes.
+        view = chunk.copy(deep=False)
+        for col in view.columns:
+            if pd.api.types.is_numeric_dtype(view[col]) and not pd.api.types.is_bool_dtype(view[col]):
+                view[col] = view[col].astype("float64")
+            elif isinstance(view[col].dtype, pd.CategoricalDtype):
+                view[col] = view[col].astype(object)
+        self.duplicates.update(pd.util.hash_pandas_object(view, index=False).to_numpy())
+
+    def _update_numeric(self, chunk):
+        for col in chunk.select_dtypes(include=np.number).columns:
+            values = chunk[col].to_numpy(dtype="float64", na_value=np.nan)
+            values = values[~np.isnan(values)]
+            if values.size == 0:
+                continue
+            n_b, mean_b = values.size, values.mean()
+            m2_b = ((values - mean_b) ** 2).sum()
+            acc = self.numeric.get(col)
+            if acc is None:
+                self.numeric[col] = [n_b, mean_b, m2_b, values.min(), values.max()]
+                continue
+            n_a, mean_a, m2_a, min_a, max_a = acc
+            n = n_a + n_b
+            delta = mean_b - mean_a
+            self.numeric[col] = [
+                n,
+                mean_a + delta * n_b / n,
+                m2_a + m2_b + delta ** 2 * n_a * n_b / n,
+                min(min_a, values.min()),
+                max(max_a, values.max()),
+            ]
+
+    def _update_values(self, chunk):
+        for col in chunk.select_dtypes(include=["object", "category"]).columns:
+            if col in self.saturated:
+                continue
+            counts = chunk[col].value_counts(dropna=True)
+            counts.index = counts.index.astype(object)
+            merged = counts if col not in self.values else self.values[col].add(counts, fill_value=0)
+            if len(merged) > MAX_TRACKED_VALUES:
+                self.saturated.add(col)
+                self.values.pop(col, None)
+            else:
+                self.values[col] = merged
+
+    def _update_reservoir(self, chunk):
+        # Algorithm R, vectorized per chunk: row i (0-based, global) replaces
+        # slot j ~ U[0, i] when j < k.
+        k = self.reservoir_rows
+        if self.reservoir is None:
+            self.reservoir = {}
+        n = len(chunk)
+        fill = min(k - self.reservoir_filled, n)
+        positions = np.arange(self.rows + fill, self.rows + n)
+        slots = (self.rng.random(positions.size) * (positions + 1)).astype(np.int64)
+        accepted = np.flatnonzero(slots < k)
+        for col in chunk.select_dtypes(include=np.number).columns:
+            values = chunk[col].to_numpy(dtype="float64", na_value=np.nan)
+            sample = self.reservoir.get(col)
+            if sample is None:
+                # Columns first seen in a later chunk start with empty slots.
+                sample = self.reservoir[col] = np.full(k, np.nan)
+            sample[self.reservoir_filled:self.reservoir_filled + fill] = values[:fill]
+            sample[slots[accepted]] = values[fill:][accepted]
+        self.reservoir_filled += fill
+
+    @property
+    def duplicate_rows(self):
+        # (count, 95% bound); the bound is 0 while the count is exact.
+        return self.duplicates.estimate()
+
+    def describe_numeric(self):
+        rows = {}
+        for col, (n, mean, m2, vmin, vmax) in self.numeric.items():
+            sample = self.reservoir.get(col, np.array([]))[: self.reservoir_filled]
+            sample = sample[~np.isnan(sample)]
+            q25, q50, q75 = np.percentile(sample, [25, 50, 75]) if sample.size else (np.nan,) * 3
+            rows[col] = {
+                "count": n,
+                "mean": mean,
+                "std": np.sqrt(m2 / (n - 1)) if n > 1 else np.nan,
+                "min": vmin,
+                "25%": q25,
+                "50%": q50,
+                "75%": q75,
+                "max": vmax,
+            }
+        return pd.DataFrame(rows)
+
+    def describe_categorical(self):
+        rows = {}
+        for col in list(self.values) + sorted(self.saturated, key=str):
+            non_null = self.rows - int(self.null_counts.get(col, 0))
+            if col in self.values and len(self.values[col]):
+                counts = self.values[col]
+                rows[col] = {"count": non_null, "unique": len(counts), "top": counts.idxmax(), "freq": int(counts.max())}
+            else:
+                rows[col] = {"count": non_null, "unique": f">{MAX_TRACKED_VALUES:,}", "top": None, "freq": None}
+        return pd.DataFrame(rows)
+
+# ----------------------------
+# Readers
+# ----------------------------
+def _iter_pandas_chunks(raw, chunk_rows):
+    yield from pd.read_csv(io.BytesIO(raw), chunksize=chunk_rows)
+
+def _iter_arrow_chunks(raw, chunk_rows):
+    # Arrow infers column types from the first block. Timestamps are kept as
+    # text (like pd.read_csv) and empty strings read as missing values.
+    read_options = pa_csv.ReadOptions(block_size=16 * 1024 * 1024)
+    convert_options = pa_csv.ConvertOptions(strings_can_be_null=True)
+    reader = pa_csv.open_csv(pa.BufferReader(raw), read_options=read_options, convert_options=convert_options)
+    temporal = {
+        field.name: pa.string()
+        for field in reader.schema
+        if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type) or pa.types.is_time(field.type)
+    }
+    if temporal:
+        convert_options = pa_csv.ConvertOptions(strings_can_be_null=True, column_types=temporal)
+        reader = pa_csv.open_csv(pa.BufferReader(raw), read_options=read_options, convert_options=convert_options)
+    for batch in reader:
+        chunk = batch.to_pandas()
+        for start in range(0, len(chunk), chunk_rows):
+            yield chunk.iloc[start:start + chunk_rows].reset_index(drop=True)
+
+def read_csv_streaming(uploaded_file, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, chunk_rows=DEFAULT_CHUNK_ROWS,
+                       compact_dtypes=True, use_arrow=True, on_chunk=None):
+    raw = uploaded_file.getvalue() if hasattr(uploaded_file, "getvalue") else uploaded_file.read()
+    memory_limit = memory_limit_mb * 1024 * 1024
+    engines = ["pyarrow", "c"] if use_arrow and pa_csv is not None else ["c"]
+
+    for engine in engines:
+        chunks, plan, used_bytes, truncated = [], None, 0, False
+        stats = StreamingStats()
+        iterator = _iter_arrow_chunks(raw, chunk_rows) if engine == "pyarrow" else _iter_pandas_chunks(raw, chunk_rows)
+        try:
+            for chunk in iterator:
+                if plan is None:
+                    plan = plan_dtypes(chunk, compact_dtypes)
+                chunk = compact_chunk(chunk, plan)
+                chunk_bytes = estimate_nbytes(chunk)
+                if chunks and used_bytes + chunk_bytes > memory_limit:
+                    truncated = True
+                    break
+                chunks.append(chunk)
+                used_bytes += chunk_bytes
+                stats.update(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk, stats, len(raw))
+        except ARROW_ERRORS:
+            # A later block did not match the types inferred from the first
+            # one; start over with the pandas parser.
+            continue
+        break
+
+    df = concat_chunks(chunks) if chunks else pd.read_csv(io.BytesIO(raw))
+    info = {
+        "engine": engine,
+        "rows": stats.rows,
+        "chunks": stats.chunks,
+        "memory_bytes": used_bytes,
+        "memory_limit_bytes": memory_limit,
+        "truncated": truncated,
+        "compacted": {col: kind for col, kind in (plan or {}).items()},
+        "duplicate_rows": stats.duplicate_rows[0],
+        "duplicate_rows_error": stats.duplicate_rows[1],
+        "null_counts": stats.null_counts,
+    }
+    return df, stats, info
+
+# ----------------------------
+# Parsed-file Cache
+# ----------------------------
+_parsed_cache_lock = threading.Lock()
+# Only Parquet is used: it holds data, never code. Frames with columns that
+# mix numbers and text (which have no Arrow type) are not cached and are
+# parsed again next time.
+PARSED_CACHE_EXTENSIONS = (".parquet",)
+
+def parsed_cache_path(key, extension=".parquet", directory=PARSED_CACHE_DIR):
+    return os.path.join(directory, f"{key}{extension}")
+
+def load_parsed(key, directory=PARSED_CACHE_DIR):
+    path = parsed_cache_path(key, ".parquet", directory)
+    if pq is None or not os.path.exists(path) or not private_directory(directory):
+        return None
+    try:
+        df = pq.read_table(path).to_pandas()
+        os.utime(path)  # the modification time doubles as last use
+    except (OSError, ValueError, *ARROW_ERRORS):
+        # Truncated or corrupt (e.g. the disk filled up mid-write): drop it
+        # and parse the file again.
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    return df
+
+def _write_parquet(df, path):
+    if pq is None:
+        return False
+    try:
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, compression="zstd")
+    except (TypeError, ValueError, NotImplementedError, *ARROW_ERRORS):
+        return False
+    return True
+
+def store_parsed(key, df, directory=PARSED_CACHE_DIR, max_mb=PARSED_CACHE_MAX_MB):
+    if not private_directory(directory):
+        return False
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=directory)
+    os.close(fd)
+    try:
+        if not _write_parquet(df, tmp):
+            os.remove(tmp)
+            return False
+        os.replace(tmp, parsed_cache_path(key, ".parquet", directory))
+    except OSError:
+        # Best effort: a full or read-only disk only costs a re-parse later.
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    trim_parsed_cache(directory, max_mb)
+    return True
+
+def trim_parsed_cache(directory=PARSED_CACHE_DIR, max_mb=PARSED_CACHE_MAX_MB):
+    with _parsed_cache_lock:
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(PARSED_CACHE_EXTENSIONS):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_mb * 1024 * 1024:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+# ----------------------------
+# Excel
+# ----------------------------
+def excel_sheet_names(raw, engine=EXCEL_ENGINE):
+    with pd.ExcelFile(io.BytesIO(raw), engine=engine) as book:
+        return list(book.sheet_names)
+
+def parse_sheet(raw, sheet, engine=EXCEL_ENGINE):
+    return pd.read_excel(io.BytesIO(raw), sheet_name=sheet, engine=engine)
+
+def read_excel_sheets(workbooks, engine=EXCEL_ENGINE, workers=EXCEL_WORKERS, use_cache=True):
+    # workbooks: list of (raw bytes, sheet names). Returns one frame per
+    # requested sheet, in order, and whether each came from the cache.
+    # Uncached sheets are parsed in worker processes (the Excel parsers hold
+    # the GIL), each worker reading its own copy of the workbook.
+    tasks = []
+    for raw, sheets in workbooks:
+        file_hash = hash_bytes(raw)
+        for sheet in sheets:
+            tasks.append((raw, sheet, hash_key("excel", file_hash, sheet, engine)))
+    frames = [load_parsed(key) if use_cache else None for _, _, key in tasks]
+    cached = [frame is not None for frame in frames]
+    missing = [i for i, frame in enumerate(frames) if frame is None]
+    missing_bytes = sum(len(tasks[i][0]) for i in missing)
+
+    if len(missing) > 1 and workers > 1 and missing_bytes >= EXCEL_PARALLEL_MIN_BYTES:
+        # "spawn" rather than fork: the app process runs server and job
+        # threads whose locks a forked child could inherit mid-use.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(missing)), mp_context=context) as pool:
+            futures = {i: pool.submit(parse_sheet, tasks[i][0], tasks[i][1], engine) for i in missing}
+            for i, future in futures.items():
+                frames[i] = future.result()
+    else:
+        for i in missing:
+            frames[i] = parse_sheet(tasks[i][0], tasks[i][1], engine)
+    if use_cache:
+        for i in missing:
+            store_parsed(tasks[i][2], frames[i])
+    return frames, cached
+
+# ----------------------------
+# Multiple Files
+# ----------------------------
+def align_frames(frames, sources, add_source=True):
+    # Stacks frames whose columns may differ: the result has every column
+    # seen, in first-seen order, with missing ones left empty. With
+    # add_source, a column records which file (and sheet) each row came from.
+    # Also returns the columns each source lacked.
+    columns = list(dict.fromkeys(col for frame in frames for col in frame.columns))
+    source_column = SOURCE_COLUMN if SOURCE_COLUMN not in columns else f"_{SOURCE_COLUMN}"
+    missing = {}
+    parts = []
+    for frame, source in zip(frames, sources):
+        absent = [col for col in columns if col not in frame.columns]
+        if absent:
+            missing[source] = absent
+        part = frame.reindex(columns=columns) if absent else frame
+        if add_source:
+            part = part.assign(**{source_column: pd.Categorical([source] * len(part), categories=list(dict.fromkeys(sources)))})
+        parts.append(part.reset_index(drop=True))
+    return concat_chunks(parts), missing
+
+def read_files(files, sheets=None, add_source=True, engine=EXCEL_ENGINE, workers=EXCEL_WORKERS, use_cache=True):
+    # files: list of (name, raw bytes) for CSV and Excel files. sheets maps a
+    # workbook name to the sheets to read (default: its first sheet). Each
+    # sheet of each file is one part; several parts are aligned and stacked.
+    sheets = sheets or {}
+    start = time.perf_counter()
+    parts, sources, cached = [], [], []
+    workbooks, workbook_slots = [], []
+    for name, raw in files:
+        if name.lower().endswith(".csv"):
+            parts.append(pd.read_csv(io.BytesIO(raw)))
+            sources.append(name)
+            cached.append(False)
+            continue
+        selected = sheets.get(name) or excel_sheet_names(raw, engine)[:1]
+        workbooks.append((raw, selected))
+        for sheet in selected:
+            workbook_slots.append(len(parts))
+            parts.append(None)
+            sources.append(f"{name}:{sheet}" if len(files) > 1 or len(selected) > 1 else name)
+            cached.append(False)
+    if workbooks:
+        frames, from_cache = read_excel_sheets(workbooks, engine, workers, use_cache)
+        for slot, frame, hit in zip(workbook_slots, frames, from_cache):
+            parts[slot] = frame
+            cached[slot] = hit
+
+    if len(parts) == 1:
+        df, missing = parts[0], {}
+    else:
+        df, missing = align_frames(parts, sources, add_source)
+    info = {
+        "engine": engine,
+        "parts": [{"source": s, "rows": len(p), "cached": c} for s, p, c in zip(sources, parts, cached)],
+        "missing_columns": missing,
+        "seconds": time.perf_counter() - start,
+    }
+    return df, info
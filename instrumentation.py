@@ -0,0 +1,276 @@
+import cProfile
+import contextvars
+import io
+import json
+import os
+import pstats
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+from lazy_imports import is_installed, optional_module
+
+# ----------------------------
+# Settings
+# ----------------------------
+TRACE_DIR = os.environ.get("PLOTPILOT_TRACE_DIR", "traces")
+SERVICE_NAME = "plotpilot"
+PROFILE_TOP_FUNCTIONS = 40
+# Background job traces the Performance panel keeps listing after their run.
+RECENT_JOB_TRACES = 10
+
+# ----------------------------
+# Memory
+# ----------------------------
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def current_rss():
+    # Resident set size of the whole process in bytes (Linux only, else None).
+    # Sessions share the process, so deltas are indicative under concurrent use.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+# ----------------------------
+# Spans and Traces
+# ----------------------------
+# A trace covers one script run. Spans nest through context variables, so code
+# deep in the cleaning pipeline or the figure builders can open a span without
+# being handed anything; with no active trace, span() does nothing.
+_current_trace = contextvars.ContextVar("plotpilot_trace", default=None)
+_current_span = contextvars.ContextVar("plotpilot_span", default=None)
+
+class Span:
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.seconds = None
+        self._start = time.perf_counter()
+        self._rss = current_rss()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._start
+        self.end_ns = self.start_ns + int(self.seconds * 1e9)
+        rss = current_rss()
+        if rss is not None and self._rss is not None:
+            self.attributes["memory_delta_bytes"] = rss - self._rss
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "seconds": self.seconds,
+            "attributes": self.attributes,
+        }
+
+class _NullSpan:
+    def set(self, **attributes):
+        pass
+
+NULL_SPAN = _NullSpan()
+
+class Trace:
+    def __init__(self, name, measure_payload=False, parent=None):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        # Payload sizes need an extra figure serialization, so they are opt-in.
+        self.measure_payload = measure_payload
+        self.spans = []
+        # Traces of background jobs started during this one (see child_trace).
+        self.children = []
+        self.finished = False
+        attributes = {}
+        if parent is not None:
+            attributes["parent_trace_id"] = parent.trace_id
+            parent.children.append(self)
+        self.root = Span(name, self.trace_id, None, attributes)
+
+    def finish(self):
+        if self.finished:
+            return
+        self.root.finish()
+        self.spans.append(self.root)
+        self.finished = True
+
+    def ordered_spans(self):
+        # Spans in start order with their nesting depth, for display.
+        children = {}
+        for s in self.spans:
+            children.setdefault(s.parent_id, []).append(s)
+        rows = []
+        def walk(parent_id, depth):
+            for s in sorted(children.get(parent_id, []), key=lambda s: s.start_ns):
+                rows.append((depth, s))
+                walk(s.span_id, depth + 1)
+        walk(None, 0)
+        return rows
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "spans": [s.to_dict() for _, s in self.ordered_spans()],
+        }
+
+    def to_otlp(self):
+        # OpenTelemetry OTLP/JSON layout, loadable by OTLP-aware trace viewers.
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": SERVICE_NAME},
+                    "spans": [
+                        {
+                            "traceId": self.trace_id,
+                            "spanId": s.span_id,
+                            "parentSpanId": s.parent_id or "",
+                            "name": s.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(s.start_ns),
+                            "endTimeUnixNano": str(s.end_ns),
+                            "attributes": [otlp_attribute(k, v) for k, v in s.attributes.items()],
+                        }
+                        for _, s in self.ordered_spans()
+                    ],
+                }],
+            }]
+        }
+
+def otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+def start_trace(name, measure_payload=False):
+    trace = Trace(name, measure_payload)
+    _current_trace.set(trace)
+    _current_span.set(trace.root)
+    return trace
+
+def end_trace():
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.finish()
+        _current_trace.set(None)
+        _current_span.set(None)
+    return trace
+
+def active_trace():
+    return _current_trace.get()
+
+def child_trace(name):
+    # A trace for background work started from the current run, or None with
+    # no active trace. Jobs outlive the run that submits them, so their spans
+    # go here instead of into the run's trace, which end_trace() may already
+    # have finished and saved. The job finishes it when it is done.
+    parent = _current_trace.get()
+    if parent is None:
+        return None
+    return Trace(name, parent.measure_payload, parent=parent)
+
+@contextmanager
+def use_trace(trace):
+    # Makes trace the current trace for the block; None leaves things as they are.
+    if trace is None:
+        yield None
+        return
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+@contextmanager
+def span(name, **attributes):
+    trace = _current_trace.get()
+    if trace is None:
+        yield NULL_SPAN
+        return
+    parent = _current_span.get()
+    s = Span(name, trace.trace_id, parent.span_id if parent is not None else None, attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except Exception as e:
+        s.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        s.finish()
+        _current_span.reset(token)
+        trace.spans.append(s)
+
+def measure_payload(s, fig):
+    trace = _current_trace.get()
+    if trace is not None and trace.measure_payload:
+        s.set(payload_bytes=len(fig.to_json()))
+
+def save_trace(trace, directory=TRACE_DIR):
+    # Writes <trace_id>.json (plain) and <trace_id>.otlp.json; returns both paths.
+    os.makedirs(directory, exist_ok=True)
+    plain = os.path.join(directory, f"{trace.trace_id}.json")
+    otlp = os.path.join(directory, f"{trace.trace_id}.otlp.json")
+    with open(plain, "w", encoding="utf-8") as f:
+        json.dump(trace.to_dict(), f, indent=2, default=str)
+    with open(otlp, "w", encoding="utf-8") as f:
+        json.dump(trace.to_otlp(), f, indent=2, default=str)
+    return plain, otlp
+
+# ----------------------------
+# Profiler
+# ----------------------------
+def available_profilers():
+    return ["cProfile"] + (["pyinstrument"] if is_installed("pyinstrument") else [])
+
+class RunProfiler:
+    # Captures one script run. stop() returns a text report and the raw
+    # profile (a .prof file for cProfile, an HTML page for pyinstrument).
+
+    def __init__(self, kind="cProfile"):
+        self.kind = kind
+        # pyinstrument is imported the first time it is picked.
+        self._profiler = optional_module("pyinstrument").Profiler() if kind == "pyinstrument" else cProfile.Profile()
+
+    def start(self):
+        self._profiler.start() if self.kind == "pyinstrument" else self._profiler.enable()
+        return self
+
+    def stop(self):
+        if self.kind == "pyinstrument":
+            self._profiler.stop()
+            return {
+                "kind": self.kind,
+                "report": self._profiler.output_text(unicode=True, color=False),
+                "data": self._profiler.output_html().encode("utf-8"),
+                "extension": "html",
+            }
+        self._profiler.disable()
+        buffer = io.StringIO()
+        pstats.Stats(self._profiler, stream=buffer).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        fd, path = tempfile.mkstemp(suffix=".prof")
+        os.close(fd)
+        try:
+            self._profiler.dump_stats(path)
+            with open(path, "rb") as f:
+                data = f.read()
+        finally:
+            os.remove(path)
+        return {"kind": self.kind, "report": buffer.getvalue(), "data": data, "extension": "prof"}
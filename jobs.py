@@ -0,0 +1,211 @@
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from caching import estimate_nbytes
+from instrumentation import child_trace, use_trace
+
+# ----------------------------
+# Settings
+# ----------------------------
+# Jobs run on threads so they share the loaded frames and the in-process
+# cleaning and figure caches without copying; pandas and numpy release the GIL
+# in most of the heavy work.
+JOB_WORKERS = int(os.environ.get("PLOTPILOT_JOB_WORKERS", min(4, os.cpu_count() or 1)))
+MAX_FINISHED_JOBS = 64
+# Finished results are also capped by size, so jobs cannot hold on to frames
+# and figures the cleaning and figure caches have already evicted. Results
+# are dropped least recently used first, except the newest one; a job whose
+# result was dropped is rerun (usually from those caches) when requested again.
+JOB_RESULTS_MAX_MB = int(os.environ.get("PLOTPILOT_JOB_RESULTS_MB", 512))
+# The UI waits this long for a new job before showing progress, so quick jobs
+# and cache hits appear in the same run; running jobs are then polled.
+JOB_INLINE_WAIT_SECONDS = 1.0
+JOB_POLL_SECONDS = 0.5
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+class JobCancelled(Exception):
+    pass
+
+# ----------------------------
+# Jobs
+# ----------------------------
+class Job:
+    # One unit of background work. The function receives the job as its first
+    # argument and calls job.report() to publish progress; report() raises
+    # JobCancelled once cancel() was requested, so work stops at the next
+    # progress point. waiters holds the sessions that asked for the job.
+
+    def __init__(self, job_id, label, on_done=None):
+        self.id = job_id
+        self.label = label
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "Waiting for a worker"
+        self.result = None
+        self.result_bytes = 0
+        self.expired = False
+        self.error = None
+        self.waiters = set()
+        # Spans opened by the job go to a trace of its own (see child_trace).
+        self.trace = child_trace(f"job.{label}")
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._future = None
+        self._on_done = on_done
+
+    @property
+    def is_finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def report(self, progress, message):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.progress = min(max(progress, 0.0), 1.0)
+        self.message = message
+
+    def cancel(self):
+        self._cancel.set()
+        if self._future is not None and self._future.cancel():
+            # Never started: finish it here since no worker will.
+            self._finish(CANCELLED)
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _run(self, fn, args, kwargs):
+        if self._cancel.is_set():
+            self._finish(CANCELLED)
+            return
+        self.status = RUNNING
+        self.started = time.time()
+        self.message = "Starting"
+        try:
+            with use_trace(self.trace):
+                result = fn(self, *args, **kwargs)
+        except JobCancelled:
+            self._finish(CANCELLED)
+        except Exception as e:
+            # The traceback would keep the job's frames, and the data they
+            # reference, alive for as long as the job is listed.
+            self.error = e.with_traceback(None)
+            self._finish(FAILED)
+        else:
+            self.result = result
+            self.result_bytes = estimate_nbytes(result)
+            self.progress = 1.0
+            if self._on_done is not None:
+                self._on_done(self)
+            self._finish(DONE)
+
+    def drop_result(self):
+        self.result = None
+        self.result_bytes = 0
+        self.expired = True
+
+    def _finish(self, status):
+        self.status = status
+        self.finished = time.time()
+        if status == CANCELLED:
+            self.message = "Cancelled"
+        if self.trace is not None:
+            self.trace.root.set(job=self.id, status=status)
+            self.trace.finish()
+        self._done.set()
+
+# ----------------------------
+# Manager
+# ----------------------------
+class JobManager:
+    # Shared by every session. Job IDs come from the request (e.g. the cache
+    # key of the cleaned frame), so the same request made again, from any
+    # session, gets the queued, running or finished job instead of new work.
+    # Failed and cancelled jobs, and finished jobs whose result was dropped,
+    # are replaced on resubmission. A job several sessions wait on is only
+    # cancelled once all of them have cancelled it.
+
+    def __init__(self, max_workers=JOB_WORKERS, max_finished=MAX_FINISHED_JOBS, max_result_mb=JOB_RESULTS_MAX_MB):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plotpilot-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_finished = max_finished
+        self.max_result_bytes = max_result_mb * 1024 * 1024
+
+    def submit(self, job_id, label, fn, *args, waiter=None, **kwargs):
+        # waiter identifies the session asking for the job; work no session
+        # waits on (e.g. saving to the project store) passes None.
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in (FAILED, CANCELLED) or job.expired:
+                job = Job(job_id, label, on_done=self._store_result)
+                self._jobs[job_id] = job
+                # Runs in a copy of the caller's context, so nothing the job
+                # sets leaks into the next job on the same worker thread.
+                context = contextvars.copy_context()
+                job._future = self._pool.submit(context.run, job._run, fn, args, kwargs)
+                self._prune()
+            else:
+                self._jobs.move_to_end(job_id)
+            if waiter is not None:
+                job.waiters.add(waiter)
+            return job
+
+    def get(self, job_id):
+        # Reading a job counts as using its result, like a cache hit.
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._jobs.move_to_end(job_id)
+            return job
+
+    def cancel(self, job_id, waiter=None):
+        # Withdraws waiter from the job and cancels the job once no other
+        # session waits on it; without a waiter it is cancelled outright.
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.waiters.discard(waiter)
+            if waiter is not None and job.waiters:
+                return job
+        job.cancel()
+        return job
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def _store_result(self, job):
+        # Called by a worker as its job completes: the job becomes the most
+        # recently used and older results are dropped past the byte cap.
+        with self._lock:
+            if self._jobs.get(job.id) is job:
+                self._jobs.move_to_end(job.id)
+            total = job.result_bytes
+            for other in reversed(self._jobs.values()):
+                if other is job or other.result_bytes == 0:
+                    continue
+                total += other.result_bytes
+                if total > self.max_result_bytes:
+                    total -= other.result_bytes
+                    other.drop_result()
+
+job_manager = JobManager()
@@ -0,0 +1,34 @@
+import importlib
+import importlib.util
+
+# ----------------------------
+# Lazy Imports
+# ----------------------------
+# Optional engines (SciPy, numexpr, openpyxl, pyinstrument, ...) and the chart
+# builders are imported the first time a feature needs them rather than when
+# the app starts, so a cold start only pays for what the first page shows.
+# Availability checks use the import system's finders and load nothing.
+
+_modules = {}
+
+def is_installed(name):
+    # Whether a module can be imported, without importing it (only the parent
+    # packages of a dotted name are imported).
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+def optional_module(name):
+    # The module, imported on the first call; None when it is not installed.
+    if name not in _modules:
+        try:
+            _modules[name] = importlib.import_module(name)
+        except ImportError:
+            _modules[name] = None
+    return _modules[name]
+
+def load_object(path):
+    # Resolves a "module:attribute" path, importing the module if needed.
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
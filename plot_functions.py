@@ -1,134 +1,370 @@
+import uuid
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
+from aggregations import (
+    MAX_HISTOGRAM_BINS, MAX_OUTLIER_POINTS, KDE_GRID_SIZE, GROUP_AGGREGATIONS,
+    finite_values, grouped, auto_bin_count, histogram_bins, box_stats, group_box_stats, kde_grid,
+)
+from correlation import ANNOTATE_MAX_COLUMNS, COLUMN_ORDERS, CORRELATION_METHODS, CORRELATION_SAMPLE_ROWS, TOP_PAIRS
+from charts import build_figure, figure_cache, figure_key
+from jobs import job_manager, DONE, FAILED, CANCELLED, JOB_POLL_SECONDS, JOB_INLINE_WAIT_SECONDS
+from instrumentation import span, measure_payload
+from profiling import get_profile
+from projects import project_store
+from rendering import (
+    DEFAULT_POINT_BUDGET, DENSITY_BINS, CHART_STRATEGIES, STRATEGY_LABELS,
+    choose_strategy, describe_strategy, decimate_line, bin_2d,
+    lttb_indices, minmax_indices, helper_source,
+)
+
+# ----------------------------
+# Rendering Helpers
+# ----------------------------
+def get_point_budget():
+    return st.session_state.get("point_budget", DEFAULT_POINT_BUDGET)
+
+def select_render_strategy(kind, df, key):
+    options = ["auto"] + CHART_STRATEGIES[kind]
+    requested = st.selectbox(
+        "Rendering",
+        options,
+        format_func=lambda s: "Auto (by row count)" if s == "auto" else STRATEGY_LABELS[s],
+        key=key,
+        help="Large datasets are reduced before they are sent to the browser."
+    )
+    return choose_strategy(kind, len(df), get_point_budget(), requested)
+
+def show_figure(fig, key=None):
+    # Streamlit serializes the figure here; the span separates that cost from building it.
+    with span("figure.render") as s:
+        measure_payload(s, fig)
+        st.plotly_chart(fig, use_container_width=True, key=key)
+
+# ----------------------------
+# Background Jobs
+# ----------------------------
+def session_id():
+    # Identifies this browser session as a waiter on shared background jobs.
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress(job_id, label, on_cancel=None):
+    # Polls a background job without rerunning the page; the whole app reruns
+    # once the job finishes so its result can be used. Cancelling only stops
+    # the job if no other session waits on it, so on_cancel() makes this
+    # session forget the job either way.
+    job = job_manager.get(job_id)
+    if job is None:
+        return
+    if job.is_finished:
+        st.rerun()
+    st.progress(job.progress, text=f"{label}: {job.message} ({job.elapsed:.0f}s)")
+    if st.button("Cancel", key=f"cancel_{job_id}"):
+        job_manager.cancel(job_id, waiter=session_id())
+        if on_cancel is not None:
+            on_cancel()
+        st.rerun()
+
+def run_figure_job(job, chart_type, df, params, key, project_id=None):
+    # Figures of a saved project are read back from the project store when
+    # they are no longer in memory, and saved there once built.
+    if project_id is not None and key not in figure_cache:
+        job.report(0.0, "Loading saved figure")
+        stored = project_store.load_figure(project_id, key)
+        if stored is not None:
+            return figure_cache.put(key, stored)
+    job.report(0.0, "Building figure")
+    result = build_figure(chart_type, df, params)
+    if project_id is not None:
+        job.report(0.9, "Saving figure to project")
+        project_store.save_figure(project_id, key, chart_type, params, *result)
+    return result
+
+def submit_figure_job(chart_type, df, params, key):
+    return job_manager.submit(
+        key, chart_type, run_figure_job, chart_type, df, params, key, st.session_state.get("project_id"),
+        waiter=session_id()
+    )
+
+def forget_figure_request():
+    st.session_state.figure_request = None
+
+def request_figure(chart_type, df, params, clicked):
+    # Figures are built in the background. The last requested figure stays on
+    # screen across reruns until its options change; a build that is still
+    # running shows progress and a cancel button instead.
+    key = figure_key(chart_type, df, params)
+    if clicked:
+        submit_figure_job(chart_type, df, params, key)
+        st.session_state.figure_request = {"chart": chart_type, "key": key}
+    request = st.session_state.get("figure_request")
+    if request is None or request["chart"] != chart_type or request["key"] != key:
+        return None
+    job = job_manager.get(key)
+    if job is None or job.expired:
+        # The finished job was pruned or its result dropped from memory; the
+        # figure cache or the project store usually still has the figure.
+        job = submit_figure_job(chart_type, df, params, key)
+    job.wait(JOB_INLINE_WAIT_SECONDS)
+    if job.status == DONE:
+        return job.result
+    if job.status in (FAILED, CANCELLED):
+        st.session_state.figure_request = None
+        if job.status == CANCELLED:
+            st.info("Chart cancelled.")
+        elif isinstance(job.error, ValueError):
+            st.warning(str(job.error))
+        else:
+            raise job.error
+        return None
+    job_progress(key, f"Building {chart_type}", on_cancel=forget_figure_request)
+    return None
+
+def render_mode_code(strategy):
+    return "" if strategy == "full" else ", render_mode='webgl'"
+
+def sample_code(strategy, df, budget):
+    if strategy == "sample" and len(df) > budget:
+        return f"df = df.sample(n={budget}, random_state=0)\n"
+    return ""
+
+# ----------------------------
+# Pre-aggregated Figures
+# ----------------------------
+# Histograms, box and violin plots are summarized server-side, so the figure
+# sent to the browser does not grow with the number of rows.
+AGGREGATION_CONSTANTS = (
+    f"MAX_HISTOGRAM_BINS = {MAX_HISTOGRAM_BINS}\n"
+    f"MAX_OUTLIER_POINTS = {MAX_OUTLIER_POINTS}\n"
+    f"KDE_GRID_SIZE = {KDE_GRID_SIZE}\n\n"
+)
+AGGREGATION_IMPORTS = (
+    "import numpy as np\nimport pandas as pd\nimport plotly.express as px\n"
+    "import plotly.graph_objects as go\nfrom plotly.subplots import make_subplots\n\n"
+)
+
+def aggregation_code(call, *functions):
+    return AGGREGATION_IMPORTS + AGGREGATION_CONSTANTS + helper_source(*functions) + "\n" + call + "\nfig.show()"
 
 def generate_scatter_plot(df):
     st.subheader("3. Options for: Scatter Plot")
-    numeric_columns = list(df.select_dtypes(['float', 'int']).columns)
-    categorical_columns = list(df.select_dtypes(['object', 'category']).columns)
+    profile = get_profile(df)
+    numeric_columns = profile.numeric_columns
+    categorical_columns = profile.categorical_columns
     x_axis = st.selectbox("Select the X-axis (numeric)", numeric_columns, key="scatter_x")
     y_axis = st.selectbox("Select the Y-axis (numeric)", numeric_columns, key="scatter_y")
     hue_column = st.selectbox("Color by (optional)", [None] + categorical_columns, key="scatter_hue")
+    strategy = select_render_strategy("scatter", df, "scatter_render")
     
-    if st.button(f"Generate Plot"):
-        fig = px.scatter(df, x=x_axis, y=y_axis, color=hue_column, title=f"{x_axis} vs. {y_axis}")
-        st.plotly_chart(fig, use_container_width=True)
-        code_string = f"fig = px.scatter(df, x='{x_axis}', y='{y_axis}', color={repr(hue_column)})\nfig.show()"
+    budget = get_point_budget()
+    result = request_figure("Scatter Plot", df, dict(x=x_axis, y=y_axis, color=hue_column, strategy=strategy, point_budget=budget), st.button("Generate Plot"))
+    if result is not None:
+        fig, meta = result
+        if strategy == "density":
+            code_string = (
+                "import numpy as np\nimport plotly.graph_objects as go\n\n"
+                + f"DENSITY_BINS = {DENSITY_BINS}\n\n"
+                + helper_source(bin_2d)
+                + f"\nx_centers, y_centers, z = bin_2d(df, '{x_axis}', '{y_axis}', bins={DENSITY_BINS})"
+                + "\nfig = go.Figure(go.Heatmap(x=x_centers, y=y_centers, z=z, colorscale='Viridis'))\nfig.show()"
+            )
+        else:
+            code_string = sample_code(strategy, df, budget) + f"fig = px.scatter(df, x='{x_axis}', y='{y_axis}', color={repr(hue_column)}{render_mode_code(strategy)})\nfig.show()"
+        show_figure(fig)
+        st.caption(describe_strategy(meta["strategy"], meta["rows"], meta["shown"]))
+        if strategy == "density" and hue_column is not None:
+            st.caption("Color grouping is not shown in density mode.")
         st.code(code_string, language='python')
 
 def generate_line_plot(df):
     st.subheader("3. Options for: Line Plot")
-    numeric_columns = list(df.select_dtypes(['float', 'int', 'datetime']).columns)
-    categorical_columns = list(df.select_dtypes(['object', 'category']).columns)
+    profile = get_profile(df)
+    numeric_columns = profile.numeric_or_datetime_columns
+    categorical_columns = profile.categorical_columns
     x_axis_line = st.selectbox("Select the X-axis (time or numeric)", numeric_columns, key="line_x")
     y_axis_line = st.selectbox("Select the Y-axis (numeric)", numeric_columns, key="line_y")
     color_line = st.selectbox("Break lines by (optional)", [None] + categorical_columns, key="line_color")
+    strategy = select_render_strategy("line", df, "line_render")
     
-    if st.button(f"Generate Plot"):
-        fig = px.line(df, x=x_axis_line, y=y_axis_line, color=color_line, title=f"Trend of {y_axis_line} over {x_axis_line}")
-        st.plotly_chart(fig, use_container_width=True)
-        code_string = f"fig = px.line(df, x='{x_axis_line}', y='{y_axis_line}', color={repr(color_line)})\nfig.show()"
+    budget = get_point_budget()
+    result = request_figure("Line Plot", df, dict(x=x_axis_line, y=y_axis_line, color=color_line, strategy=strategy, point_budget=budget), st.button("Generate Plot"))
+    if result is not None:
+        fig, meta = result
+        if strategy in ("lttb", "minmax"):
+            code_string = (
+                "import numpy as np\nimport pandas as pd\nimport plotly.express as px\n\n"
+                + helper_source(lttb_indices, minmax_indices, decimate_line)
+                + f"\ndf = decimate_line(df, '{x_axis_line}', '{y_axis_line}', {repr(color_line)}, {budget}, method='{strategy}')\n"
+            )
+        else:
+            code_string = ""
+        line_mode = "webgl" if strategy == "webgl" else "full"
+        show_figure(fig)
+        st.caption(describe_strategy(meta["strategy"], meta["rows"], meta["shown"]))
+        code_string += f"fig = px.line(df, x='{x_axis_line}', y='{y_axis_line}', color={repr(color_line)}{render_mode_code(line_mode)})\nfig.show()"
         st.code(code_string, language='python')
 
 def generate_bar_chart(df):
     st.subheader("3. Options for: Bar Chart")
-    categorical_columns = list(df.select_dtypes(['object', 'category']).columns)
-    numeric_columns = list(df.select_dtypes(['float', 'int']).columns)
+    profile = get_profile(df)
+    categorical_columns = profile.categorical_columns
+    numeric_columns = profile.numeric_columns
     x_axis_bar = st.selectbox("Select the X-axis (categorical)", categorical_columns, key="bar_x")
     y_axis_bar = st.selectbox("Select the Y-axis (numeric)", numeric_columns, key="bar_y")
     
-    if st.button(f"Generate Plot"):
-        fig = px.histogram(df, x=x_axis_bar, y=y_axis_bar, color=x_axis_bar, histfunc='avg', title=f"Average {y_axis_bar} by {x_axis_bar}")
-        fig.update_layout(yaxis_title=f"Average of {y_axis_bar}")
-        st.plotly_chart(fig, use_container_width=True)
-        code_string = f"fig = px.histogram(df, x='{x_axis_bar}', y='{y_axis_bar}', color='{x_axis_bar}', histfunc='avg')\nfig.show()"
+    result = request_figure("Bar Chart", df, dict(x=x_axis_bar, y=y_axis_bar), st.button("Generate Plot"))
+    if result is not None:
+        fig, _ = result
+        show_figure(fig)
+        code_string = (
+            f"agg_df = df.dropna(subset=['{x_axis_bar}', '{y_axis_bar}']).groupby('{x_axis_bar}', sort=False, observed=True)['{y_axis_bar}'].mean().reset_index()\n"
+            f"fig = px.bar(agg_df, x='{x_axis_bar}', y='{y_axis_bar}', color='{x_axis_bar}')\nfig.show()"
+        )
         st.code(code_string, language='python')
 
 def generate_histogram(df):
     st.subheader("3. Options for: Histogram")
-    numeric_columns = list(df.select_dtypes(['float', 'int']).columns)
+    profile = get_profile(df)
+    numeric_columns = profile.numeric_columns
     hist_column = st.selectbox("Select a column (numeric)", numeric_columns, key="hist_col")
     
-    if st.button(f"Generate Plot"):
-        fig = px.histogram(df, x=hist_column, title=f"Distribution of {hist_column}", marginal="box")
-        st.plotly_chart(fig, use_container_width=True)
-        code_string = f"fig = px.histogram(df, x='{hist_column}', title='Distribution of {hist_column}', marginal='box')\nfig.show()"
+    result = request_figure("Histogram", df, dict(column=hist_column), st.button("Generate Plot"))
+    if result is not None:
+        fig, _ = result
+        show_figure(fig)
+        from figures import histogram_figure  # Already imported by the figure build.
+        code_string = aggregation_code(
+            f"fig = histogram_figure(df, '{hist_column}', 'Distribution of {hist_column}')",
+            finite_values, auto_bin_count, histogram_bins, box_stats, histogram_figure
+        )
         st.code(code_string, language='python')
 
 def generate_box_plot(df):
     st.subheader("3. Options for: Box Plot")
-    categorical_columns = list(df.select_dtypes(['object', 'category']).columns)
-    numeric_columns = list(df.select_dtypes(['float', 'int']).columns)
+    profile = get_profile(df)
+    categorical_columns = profile.categorical_columns
+    numeric_columns = profile.numeric_columns
     x_axis_box = st.selectbox("Select the X-axis (categorical)", categorical_columns, key="box_x")
     y_axis_box = st.selectbox("Select the Y-axis (numeric)", numeric_columns, key="box_y")
 
-    if st.button(f"Generate Plot"):
-        fig = px.box(df, x=x_axis_box, y=y_axis_box, color=x_axis_box, title=f"Distribution of {y_axis_box} by {x_axis_box}")
-        st.plotly_chart(fig, use_container_width=True)
+    result = request_figure("Box Plot", df, dict(x=x_axis_box, y=y_axis_box), st.button("Generate Plot"))
+    if result is not None:
+        fig, _ = result
+        show_figure(fig)
         with st.expander("How to Read a Box Plot 📖"):
             st.markdown("A box plot shows the distribution of data. Hover over it to see the median, quartiles, and outliers.")
-        code_string = f"fig = px.box(df, x='{x_axis_box}', y='{y_axis_box}', color='{x_axis_box}')\nfig.show()"
+        from figures import box_figure  # Already imported by the figure build.
+        code_string = aggregation_code(
+            f"fig = box_figure(df, '{x_axis_box}', '{y_axis_box}', 'Distribution of {y_axis_box} by {x_axis_box}')",
+            finite_values, grouped, box_stats, group_box_stats, box_figure
+        )
         st.code(code_string, language='python')
 
 def generate_violin_plot(df):
     st.subheader("3. Options for: Violin Plot")
-    categorical_columns = list(df.select_dtypes(['object', 'category']).columns)
-    numeric_columns = list(df.select_dtypes(['float', 'int']).columns)
+    profile = get_profile(df)
+    categorical_columns = profile.categorical_columns
+    numeric_columns = profile.numeric_columns
     x_axis_violin = st.selectbox("Select the X-axis (categorical)", categorical_columns, key="violin_x")
     y_axis_violin = st.selectbox("Select the Y-axis (numeric)", numeric_columns, key="violin_y")
 
-    if st.button(f"Generate Plot"):
-        fig = px.violin(df, x=x_axis_violin, y=y_axis_violin, color=x_axis_violin, box=True, title=f"Distribution of {y_axis_violin} by {x_axis_violin}")
-        st.plotly_chart(fig, use_container_width=True)
-        code_string = f"fig = px.violin(df, x='{x_axis_violin}', y='{y_axis_violin}', color='{x_axis_violin}', box=True)\nfig.show()"
+    result = request_figure("Violin Plot", df, dict(x=x_axis_violin, y=y_axis_violin), st.button("Generate Plot"))
+    if result is not None:
+        fig, _ = result
+        show_figure(fig)
+        from figures import violin_figure  # Already imported by the figure build.
+        code_string = aggregation_code(
+            f"fig = violin_figure(df, '{x_axis_violin}', '{y_axis_violin}', 'Distribution of {y_axis_violin} by {x_axis_violin}')",
+            finite_values, grouped, box_stats, kde_grid, violin_figure
+        )
         st.code(code_string, language='python')
 
 def generate_count_plot(df):
     st.subheader("3. Options for: Count Plot")
-    categorical_columns = list(df.select_dtypes(['object', 'category']).columns)
+    profile = get_profile(df)
+    categorical_columns = profile.categorical_columns
     count_column = st.selectbox("Select a column to count (categorical)", categorical_columns, key="count_col")
     
-    if st.button(f"Generate Plot"):
-        fig = px.histogram(df, x=count_column, title=f"Count of {count_column}", color=count_column)
-        fig.update_layout(yaxis_title="Count")
-        st.plotly_chart(fig, use_container_width=True)
-        code_string = f"fig = px.histogram(df, x='{count_column}', title='Count of {count_column}', color='{count_column}')\nfig.show()"
+    result = request_figure("Count Plot", df, dict(column=count_column), st.button("Generate Plot"))
+    if result is not None:
+        fig, _ = result
+        show_figure(fig)
+        code_string = (
+            f"counts_df = df.groupby('{count_column}', sort=False, observed=True).size().rename('count').reset_index()\n"
+            f"fig = px.bar(counts_df, x='{count_column}', y='count', title='Count of {count_column}', color='{count_column}')\nfig.show()"
+        )
         st.code(code_string, language='python')
 
 def generate_heatmap(df):
     st.subheader("3. Options for: Heatmap")
     st.info("The heatmap shows the correlation between all numeric columns in your dataset.")
-    if st.button(f"Generate Plot"):
-        numeric_df = df.select_dtypes(include=np.number)
-        corr_matrix = numeric_df.corr()
-        fig = px.imshow(corr_matrix, text_auto=True, title="Correlation Heatmap of Numeric Variables")
-        st.plotly_chart(fig, use_container_width=True)
-        code_string = "numeric_df = df.select_dtypes(include=np.number)\ncorr_matrix = numeric_df.corr()\nfig = px.imshow(corr_matrix, text_auto=True)\nfig.show()"
+    method = st.selectbox("Correlation method", CORRELATION_METHODS, format_func=str.capitalize, key="heatmap_method")
+    order = st.selectbox(
+        "Column order", COLUMN_ORDERS,
+        format_func=lambda o: "Clustered (related columns together)" if o == "clustered" else "Original",
+        key="heatmap_order"
+    )
+    threshold = st.slider("Hide correlations weaker than |r|", 0.0, 1.0, 0.0, 0.05, key="heatmap_threshold",
+                          help="Columns without any pair at or above the threshold are dropped.")
+    top_k = st.number_input("Strongest pairs to list", min_value=1, max_value=200, value=TOP_PAIRS, key="heatmap_top_k")
+    max_rows = CORRELATION_SAMPLE_ROWS
+    if len(df) > CORRELATION_SAMPLE_ROWS and method != "kendall":
+        if st.checkbox(f"Use all {len(df):,} rows (slower)", value=False, key="heatmap_all_rows",
+                       help=f"By default a random sample of {CORRELATION_SAMPLE_ROWS:,} rows is used."):
+            max_rows = None
+
+    result = request_figure(
+        "Heatmap", df,
+        dict(method=method, order=order, threshold=threshold, top_k=top_k, max_rows=max_rows),
+        st.button("Generate Plot")
+    )
+    if result is not None:
+        fig, meta = result
+        show_figure(fig)
+        caption = f"{meta['columns']:,} of {meta['total_columns']:,} numeric columns"
+        if meta["rows_used"] < meta["rows"]:
+            caption += f", computed on a random sample of {meta['rows_used']:,} of {meta['rows']:,} rows"
+        if not meta["annotated"]:
+            caption += f"; cell values are shown on hover above {ANNOTATE_MAX_COLUMNS} columns"
+        st.caption(caption + ".")
+        if meta["pairs"]:
+            st.text("Strongest Pairs:")
+            st.dataframe(pd.DataFrame(meta["pairs"]), hide_index=True)
+        sample = f".sample(n={meta['rows_used']}, random_state=0)" if meta["rows_used"] < meta["rows"] else ""
+        text_auto = "True" if meta["annotated"] else "False"
+        code_string = f"numeric_df = df.select_dtypes(include=np.number){sample}\ncorr_matrix = numeric_df.corr(method='{method}')\nfig = px.imshow(corr_matrix, text_auto={text_auto}, color_continuous_scale='RdBu', zmin=-1, zmax=1)\nfig.show()"
         st.code(code_string, language='python')
 
 def generate_bubble_chart(df):
     st.subheader("3. Options for: Bubble Chart")
+    profile = get_profile(df)
     st.info("A bubble chart is a scatter plot where the size of the bubble represents a third numeric variable.")
-    numeric_columns = list(df.select_dtypes(['float', 'int']).columns)
-    categorical_columns = list(df.select_dtypes(['object', 'category']).columns)
+    numeric_columns = profile.numeric_columns
+    categorical_columns = profile.categorical_columns
     
     x_axis = st.selectbox("Select the X-axis (numeric)", numeric_columns, key="bubble_x")
     y_axis = st.selectbox("Select the Y-axis (numeric)", numeric_columns, key="bubble_y")
     size_col = st.selectbox("Select the Size variable (numeric)", numeric_columns, key="bubble_size")
     color_col = st.selectbox("Color by (optional)", [None] + categorical_columns, key="bubble_color")
+    strategy = select_render_strategy("bubble", df, "bubble_render")
     
-    if st.button(f"Generate Plot"):
-        fig = px.scatter(df, x=x_axis, y=y_axis, size=size_col, color=color_col, title=f"{x_axis} vs. {y_axis}, Sized by {size_col}")
-        st.plotly_chart(fig, use_container_width=True)
-        code_string = f"fig = px.scatter(df, x='{x_axis}', y='{y_axis}', size='{size_col}', color={repr(color_col)})\nfig.show()"
+    budget = get_point_budget()
+    result = request_figure("Bubble Chart", df, dict(x=x_axis, y=y_axis, size=size_col, color=color_col, strategy=strategy, point_budget=budget), st.button("Generate Plot"))
+    if result is not None:
+        fig, meta = result
+        show_figure(fig)
+        st.caption(describe_strategy(meta["strategy"], meta["rows"], meta["shown"]))
+        code_string = sample_code(strategy, df, budget) + f"fig = px.scatter(df, x='{x_axis}', y='{y_axis}', size='{size_col}', color={repr(color_col)}{render_mode_code(strategy)})\nfig.show()"
         st.code(code_string, language='python')
 
 def generate_pie_chart(df):
     st.subheader("3. Options for: Pie Chart")
-    categorical_columns = list(df.select_dtypes(['object', 'category', 'string']).columns)
-    numeric_columns = list(df.select_dtypes(['float', 'int']).columns)
+    profile = get_profile(df)
+    categorical_columns = profile.categorical_columns
+    numeric_columns = profile.numeric_columns
     
     names_col = st.selectbox("Select the column for labels (categorical)", categorical_columns, key="pie_names")
     values_col = st.selectbox("Select the column for values (numeric)", numeric_columns, key="pie_values")
@@ -137,34 +373,16 @@ def generate_pie_chart(df):
     top_n = st.number_input("Number of top slices to show", min_value=2, max_value=50, value=10, 
                             help="The rest will be grouped into an 'Others' slice.")
     
-    if st.button(f"Generate Plot"):
-        # Aggregate data in case categories are repeated
-        agg_df = df.groupby(names_col)[values_col].sum().reset_index()
-        agg_df = agg_df.sort_values(by=values_col, ascending=False)
-
-        # If there are more categories than top_n, group the rest
-        if len(agg_df) > top_n:
-            df_top = agg_df.head(top_n)
-            others_sum = agg_df.iloc[top_n:][values_col].sum()
-            
-            # Create the 'Others' row as a new DataFrame
-            df_others = pd.DataFrame([{names_col: 'Others', values_col: others_sum}])
-            
-            # Combine the top N with the 'Others' row
-            df_for_plot = pd.concat([df_top, df_others], ignore_index=True)
-            title = f"Top {top_n} Proportions of {values_col} by {names_col}"
-        else:
-            df_for_plot = agg_df
-            title = f"Proportion of {values_col} by {names_col}"
-
-        fig = px.pie(df_for_plot, names=names_col, values=values_col, title=title)
-        st.plotly_chart(fig, use_container_width=True)
+    result = request_figure("Pie Chart", df, dict(names=names_col, values=values_col, top_n=top_n), st.button("Generate Plot"))
+    if result is not None:
+        fig, _ = result
+        show_figure(fig)
         
         # The generated code will be more complex to reflect this logic
         code_string = f"""
 # First, aggregate and sort the data
-agg_df = df.groupby('{names_col}')['{values_col}'].sum().reset_index()
-agg_df = agg_df.sort_values(by='{values_col}', ascending=False)
+agg_df = df.groupby('{names_col}', sort=False, observed=True)['{values_col}'].sum().reset_index()
+agg_df = agg_df.sort_values(by='{values_col}', ascending=False, kind='stable')
 
 top_n = {top_n}
 if len(agg_df) > top_n:
@@ -181,80 +399,61 @@ fig.show()"""
 
 def generate_dot_plot(df):
     st.subheader("3. Options for: Dot Plot")
+    profile = get_profile(df)
     st.info("A dot plot is a clean alternative to a bar chart for comparing values across categories.")
-    numeric_columns = list(df.select_dtypes(['float', 'int']).columns)
-    categorical_columns = list(df.select_dtypes(['object', 'category']).columns)
+    numeric_columns = profile.numeric_columns
+    categorical_columns = profile.categorical_columns
     
     x_col = st.selectbox("Select the numeric axis", numeric_columns, key="dot_x")
     y_col = st.selectbox("Select the category axis", categorical_columns, key="dot_y")
     color_col = st.selectbox("Color by (optional)", [None] + categorical_columns, key="dot_color")
+    strategy = select_render_strategy("dot", df, "dot_render")
     
-    if st.button(f"Generate Plot"):
-        fig = px.scatter(df, x=x_col, y=y_col, color=color_col, title=f"{x_col} by {y_col}")
-        fig.update_traces(marker=dict(size=12)) # Make dots larger
-        st.plotly_chart(fig, use_container_width=True)
-        code_string = f"fig = px.scatter(df, x='{x_col}', y='{y_col}', color={repr(color_col)})\nfig.show()"
+    budget = get_point_budget()
+    result = request_figure("Dot Plot", df, dict(x=x_col, y=y_col, color=color_col, strategy=strategy, point_budget=budget), st.button("Generate Plot"))
+    if result is not None:
+        fig, meta = result
+        show_figure(fig)
+        st.caption(describe_strategy(meta["strategy"], meta["rows"], meta["shown"]))
+        code_string = sample_code(strategy, df, budget) + f"fig = px.scatter(df, x='{x_col}', y='{y_col}', color={repr(color_col)}{render_mode_code(strategy)})\nfig.show()"
         st.code(code_string, language='python')
 
-import plotly.graph_objects as go # Make sure this import is at the top of plot_functions.py
-
 def generate_radar_chart(df):
     st.subheader("3. Options for: Radar Chart")
+    profile = get_profile(df)
     st.info("A radar chart compares multiple numeric variables for one or more categories.")
     
-    categorical_columns = list(df.select_dtypes(['object', 'category']).columns)
-    numeric_columns = list(df.select_dtypes(['float', 'int']).columns)
+    categorical_columns = profile.categorical_columns
+    numeric_columns = profile.numeric_columns
     
     category_col = st.selectbox("Select the main category to compare", categorical_columns, key="radar_cat")
     numeric_vars = st.multiselect("Select the numeric variables to display", numeric_columns, key="radar_num")
+    agg = st.selectbox("Aggregate each category by", GROUP_AGGREGATIONS, key="radar_agg")
+    normalize = st.checkbox("Normalize each metric to 0-1 (min-max)", value=False, key="radar_normalize",
+                            help="Puts metrics on different scales on a common axis.")
     
-    if st.button("Generate Plot"):
-        if not numeric_vars:
-            st.warning("Please select at least one numeric variable.")
-        elif len(df[category_col].unique()) > 10:
-             st.warning("Radar charts are best for comparing a few categories (less than 10). Please filter your data.")
-        else:
-            # Melt dataframe
-            id_vars = [category_col]
-            value_vars = numeric_vars
-            melted_df = pd.melt(df, id_vars=id_vars, value_vars=value_vars, var_name='Metric', value_name='Value')
-
-            # Build radar chart manually
-            fig = go.Figure()
-            for cat in melted_df[category_col].unique():
-                subset = melted_df[melted_df[category_col] == cat]
-                fig.add_trace(go.Scatterpolar(
-                    r=subset["Value"],
-                    theta=subset["Metric"],
-                    mode='lines+markers',
-                    name=str(cat),
-                    fill='toself'  # <-- THIS IS THE KEY ADDITION
-                ))
-
-            fig.update_layout(
-                polar=dict(radialaxis=dict(visible=True)),
-                title=f"Comparison of Metrics for {category_col}"
-            )
-
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # The generated code should also reflect this more robust method
-            code_string = f"""
+    result = request_figure("Radar Chart", df, dict(category=category_col, metrics=numeric_vars, agg=agg, normalize=normalize), st.button("Generate Plot"))
+    if result is not None:
+        fig, meta = result
+        show_figure(fig)
+        st.caption(f"{meta['categories']:,} categories, {agg} of {len(df):,} rows per metric.")
+        
+        normalize_code = "table = (table - table.min()) / (table.max() - table.min())\n" if normalize else ""
+        code_string = f"""
+import numpy as np
 import plotly.graph_objects as go
-# Radar charts often require reshaping the data from wide to long format
-id_vars = ['{category_col}']
-value_vars = {numeric_vars}
-melted_df = pd.melt(df, id_vars=id_vars, value_vars=value_vars, var_name='Metric', value_name='Value')
-
+# One aggregated row per category, one point per metric
+metrics = {numeric_vars}
+table = df.groupby('{category_col}', sort=False, observed=True)[metrics].agg('{agg}')
+{normalize_code}
 fig = go.Figure()
-for cat in melted_df['{category_col}'].unique():
-    subset = melted_df[melted_df['{category_col}'] == cat]
+for cat, values in zip(table.index, table.to_numpy()):
     fig.add_trace(go.Scatterpolar(
-        r=subset["Value"],
-        theta=subset["Metric"],
+        r=np.append(values, values[:1]),
+        theta=metrics + metrics[:1],
         mode='lines+markers',
         name=str(cat),
         fill='toself'
     ))
 fig.show()"""
-            st.code(code_string, language='python')
\ No newline at end of file
+        st.code(code_string, language='python')
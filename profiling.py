@@ -0,0 +1,132 @@
+import io
+import itertools
+import threading
+import weakref
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+from caching import hash_bytes, hash_key
+from correlation import CORRELATION_SAMPLE_ROWS, correlation_matrix
+from sketches import sketch_frame
+
+# ----------------------------
+# Column Profile
+# ----------------------------
+TOP_K = 10
+
+class ColumnProfile:
+    # Column metadata for one DataFrame, computed once per dataset version.
+    # Dtype groups and null counts are computed up front; cardinality, ranges,
+    # quantiles, top-k values, the describe()/info() views, the fast-stats
+    # sketch and correlation matrices on first use.
+
+    def __init__(self, df, version):
+        self._df = weakref.ref(df)
+        self.version = version
+        self.n_rows, self.n_cols = df.shape
+        self.columns = list(df.columns)
+        self.dtypes = df.dtypes
+        self.numeric_columns = list(df.select_dtypes(include=np.number).columns)
+        self.datetime_columns = list(df.select_dtypes(include=['datetime', 'datetimetz']).columns)
+        self.numeric_or_datetime_columns = list(df.select_dtypes(include=[np.number, 'datetime', 'datetimetz']).columns)
+        self.categorical_columns = list(df.select_dtypes(include=['object', 'category', 'string']).columns)
+        self.null_counts = df.isnull().sum()
+        self._lock = threading.RLock()
+        self._cache = {}
+
+    @property
+    def df(self):
+        df = self._df()
+        if df is None:
+            raise RuntimeError("The profiled DataFrame no longer exists.")
+        return df
+
+    def _cached(self, key, compute):
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+            return self._cache[key]
+
+    def fingerprint(self):
+        # Content hash of the frame (values, index, column names and dtypes),
+        # so equal data loaded twice maps to the same cache entries.
+        def compute():
+            df = self.df
+            rows = pd.util.hash_pandas_object(df, index=True).to_numpy()
+            return hash_key(hash_bytes(rows.tobytes()), self.columns, [str(t) for t in self.dtypes])
+        return self._cached("fingerprint", compute)
+
+    def cardinality(self, column):
+        return self._cached(("nunique", column), lambda: int(self.df[column].nunique(dropna=True)))
+
+    def min_max(self, column):
+        def compute():
+            series = self.df[column].dropna()
+            if series.empty:
+                return None, None
+            return series.min(), series.max()
+        return self._cached(("min_max", column), compute)
+
+    def quantiles(self, column, qs=(0.25, 0.5, 0.75)):
+        return self._cached(("quantiles", column, tuple(qs)), lambda: self.df[column].quantile(list(qs)))
+
+    def top_values(self, column, k=TOP_K):
+        return self._cached(("top", column, k), lambda: self.df[column].value_counts(dropna=True).head(k))
+
+    def info_text(self):
+        def compute():
+            buffer = io.StringIO()
+            with redirect_stdout(buffer):
+                self.df.info()
+            return buffer.getvalue()
+        return self._cached("info", compute)
+
+    def describe_numeric(self):
+        return self._cached("describe_numeric", lambda: self.df.describe(include=np.number))
+
+    def describe_categorical(self):
+        return self._cached("describe_categorical", lambda: self.df.describe(include=['object', 'category']))
+
+    def sketch(self):
+        # Approximate statistics with error bounds, read in one bounded-memory pass.
+        return self._cached("sketch", lambda: sketch_frame(self.df))
+
+    def correlation(self, method="pearson", max_rows=CORRELATION_SAMPLE_ROWS):
+        # (matrix, rows used) over the numeric columns; ordering, thresholds
+        # and top pairs are derived from it without recomputing.
+        return self._cached(
+            ("correlation", method, max_rows),
+            lambda: correlation_matrix(self.df[self.numeric_columns], method, max_rows)
+        )
+
+# ----------------------------
+# Registry
+# ----------------------------
+# Profiles are keyed on the DataFrame object itself: the app never mutates a
+# loaded or cleaned frame in place, so a new frame (a new version) gets a new
+# profile and the old one is dropped when its frame is garbage collected.
+_profiles = {}
+_profiles_lock = threading.Lock()
+_versions = itertools.count(1)
+
+def get_profile(df):
+    key = id(df)
+    with _profiles_lock:
+        entry = _profiles.get(key)
+        if entry is not None and entry._df() is df:
+            return entry
+        profile = ColumnProfile(df, next(_versions))
+        _profiles[key] = profile
+        weakref.finalize(df, _drop_profile, key, profile)
+        return profile
+
+def invalidate_profile(df):
+    with _profiles_lock:
+        _profiles.pop(id(df), None)
+
+def _drop_profile(key, profile):
+    with _profiles_lock:
+        if _profiles.get(key) is profile:
+            del _profiles[key]
@@ -0,0 +1,299 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from caching import private_directory
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    ARROW_ERRORS = (pa.ArrowInvalid, pa.ArrowNotImplementedError)
+except ImportError:
+    pa = None
+    pa_ipc = None
+    ARROW_ERRORS = ()
+
+# ----------------------------
+# Settings
+# ----------------------------
+# Projects outlive sessions and server restarts: the loaded data, each cleaned
+# version and the generated figures are written under PROJECT_DIR and listed
+# in one index file. Frames are uncompressed Arrow IPC files, which are
+# memory-mapped on reopening instead of parsed, so reopening a multi-GB
+# project costs about as much as reading the pages actually used. The store
+# is per user (under XDG_DATA_HOME, ~/.local/share by default), wherever the
+# app is started from, and private to its owner since it may hold pickles.
+PROJECT_DIR = os.path.abspath(os.environ.get(
+    "PLOTPILOT_PROJECT_DIR",
+    os.path.join(os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"), "plotpilot", "projects")
+))
+PROJECT_STORE_MAX_MB = int(os.environ.get("PLOTPILOT_PROJECT_STORE_MB", 10240))
+INDEX_FILE = "index.json"
+# Reading an item refreshes its last use (for eviction) at most this often,
+# so reopening and rerunning does not rewrite the index every time.
+LAST_USED_RESOLUTION_SECONDS = 60
+
+# ----------------------------
+# Frame Files
+# ----------------------------
+def write_frame(df, path_stem):
+    # Writes <path_stem>.arrow, or .pkl when Arrow cannot hold the frame
+    # (mixed Python objects in a column), and returns the file name. Written
+    # to a temporary file first, so a crash never leaves a truncated file
+    # under the final name.
+    directory = os.path.dirname(path_stem)
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=directory)
+    os.close(fd)
+    try:
+        extension = ".arrow" if _write_arrow(df, tmp) else ".pkl"
+        if extension == ".pkl":
+            df.to_pickle(tmp)
+        os.replace(tmp, path_stem + extension)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return os.path.basename(path_stem + extension)
+
+def _write_arrow(df, path):
+    if pa is None:
+        return False
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        with pa.OSFile(path, "wb") as sink, pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    except (TypeError, ValueError, *ARROW_ERRORS):
+        return False
+    return True
+
+def read_frame(path):
+    if path.endswith(".pkl"):
+        return pd.read_pickle(path)
+    # The mapping stays open as long as the frame's buffers refer to it;
+    # split_blocks keeps pandas from consolidating (copying) the columns.
+    table = pa_ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return table.to_pandas(split_blocks=True)
+
+# ----------------------------
+# Project Store
+# ----------------------------
+class ProjectStore:
+    # Shared by every session. A project is identified by the content hash of
+    # its uploaded files and ingestion options (the app's file_hash) and holds:
+    #
+    #   raw       the loaded frame
+    #   versions  cleaned frames, keyed like their cleaning job, with the
+    #             cleaning options, summary and stage timings
+    #   figures   Plotly figure JSON and build metadata, keyed like the
+    #             figure cache
+    #
+    # Every item records its size and last use. Once the store is over its
+    # quota, least recently used items are removed; removing a project's raw
+    # frame removes the whole project.
+
+    def __init__(self, directory=PROJECT_DIR, max_mb=PROJECT_STORE_MAX_MB):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.RLock()
+
+    # Index -----------------------------------------------------------------
+    def _index_path(self):
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _read_index(self):
+        # A store directory someone else could write to is treated as empty.
+        if not private_directory(self.directory):
+            return {"projects": {}}
+        try:
+            with open(self._index_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"projects": {}}
+
+    def _write_index(self, index):
+        if not private_directory(self.directory):
+            raise PermissionError(f"Project store {self.directory} is not private to this user")
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2, default=_json_default)
+        os.replace(tmp, self._index_path())
+
+    def _project_dir(self, project_id):
+        return os.path.join(self.directory, project_id)
+
+    # Queries ---------------------------------------------------------------
+    def projects(self):
+        # Saved projects, most recently used first.
+        with self._lock:
+            projects = self._read_index()["projects"]
+        return sorted(
+            ({"id": project_id, **project} for project_id, project in projects.items() if "raw" in project),
+            key=lambda p: p["last_used"],
+            reverse=True,
+        )
+
+    def get(self, project_id):
+        with self._lock:
+            return self._read_index()["projects"].get(project_id)
+
+    def has_raw(self, project_id):
+        project = self.get(project_id)
+        return project is not None and "raw" in project
+
+    def usage(self):
+        with self._lock:
+            return sum(size for *_, size in self._items(self._read_index()))
+
+    # Writes ----------------------------------------------------------------
+    def save_raw(self, project_id, name, df):
+        with self._lock:
+            if not private_directory(self.directory):
+                return False
+            os.makedirs(self._project_dir(project_id), exist_ok=True)
+        file_name = write_frame(df, os.path.join(self._project_dir(project_id), "raw"))
+        with self._lock:
+            index = self._read_index()
+            now = time.time()
+            project = index["projects"].setdefault(project_id, {"versions": {}, "figures": {}, "created": now})
+            project.update(name=name, last_used=now, raw=self._entry(project_id, file_name, rows=len(df), columns=df.shape[1]))
+            self._write_index(index)
+            self._evict(index, protect={(project_id, "raw", None)})
+        return True
+
+    def save_version(self, project_id, key, df, options, summary, timings):
+        if not self.has_raw(project_id):
+            return False
+        file_name = write_frame(df, os.path.join(self._project_dir(project_id), f"clean_{key}"))
+        return self._add_item(project_id, "versions", key, self._entry(
+            project_id, file_name, rows=len(df), columns=df.shape[1],
+            options=options, summary=list(summary), timings=list(timings),
+        ))
+
+    def save_figure(self, project_id, key, chart_type, params, fig, meta):
+        project = self.get(project_id)
+        if project is None or "raw" not in project:
+            return False
+        if key in project["figures"]:
+            # Figure keys include the data fingerprint, so a saved figure never goes stale.
+            return True
+        file_name = f"figure_{key}.json"
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self._project_dir(project_id))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            # fig.to_json() handles the NumPy arrays inside traces.
+            f.write(f'{{"figure": {fig.to_json()}, "meta": {json.dumps(meta, default=_json_default)}}}')
+        os.replace(tmp, os.path.join(self._project_dir(project_id), file_name))
+        return self._add_item(project_id, "figures", key, self._entry(
+            project_id, file_name, chart=chart_type, params=params,
+        ))
+
+    def _entry(self, project_id, file_name, **fields):
+        path = os.path.join(self._project_dir(project_id), file_name)
+        now = time.time()
+        return {"file": file_name, "bytes": os.path.getsize(path), "created": now, "last_used": now, **fields}
+
+    def _add_item(self, project_id, kind, key, entry):
+        with self._lock:
+            index = self._read_index()
+            project = index["projects"].get(project_id)
+            if project is None or "raw" not in project:
+                # Evicted or deleted while the item was being written.
+                self._remove_file(project_id, entry["file"])
+                return False
+            project[kind][key] = entry
+            project["last_used"] = entry["last_used"]
+            self._write_index(index)
+            self._evict(index, protect={(project_id, "raw", None), (project_id, kind, key)})
+            return True
+
+    # Reads -----------------------------------------------------------------
+    def load_raw(self, project_id):
+        return self._load(project_id, "raw", None, read_frame)
+
+    def load_version(self, project_id, key):
+        return self._load(project_id, "versions", key, read_frame)
+
+    def load_figure(self, project_id, key):
+        def read(path):
+            import plotly.graph_objects as go  # Only needed once a saved figure is opened.
+            with open(path, encoding="utf-8") as f:
+                stored = json.load(f)
+            return go.Figure(stored["figure"]), stored["meta"]
+        return self._load(project_id, "figures", key, read)
+
+    def _load(self, project_id, kind, key, read):
+        # Returns None when the item is gone (evicted, deleted or unreadable).
+        with self._lock:
+            index = self._read_index()
+            project = index["projects"].get(project_id)
+            if project is None:
+                return None
+            entry = project.get(kind) if key is None else project[kind].get(key)
+            if entry is None:
+                return None
+            now = time.time()
+            if now - entry["last_used"] >= LAST_USED_RESOLUTION_SECONDS:
+                entry["last_used"] = project["last_used"] = now
+                self._write_index(index)
+        try:
+            return read(os.path.join(self._project_dir(project_id), entry["file"]))
+        except (OSError, ValueError, EOFError, *ARROW_ERRORS):
+            return None
+
+    # Removal ---------------------------------------------------------------
+    def delete(self, project_id):
+        with self._lock:
+            index = self._read_index()
+            index["projects"].pop(project_id, None)
+            self._write_index(index)
+            shutil.rmtree(self._project_dir(project_id), ignore_errors=True)
+
+    def _remove_file(self, project_id, file_name):
+        try:
+            os.remove(os.path.join(self._project_dir(project_id), file_name))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _items(index):
+        for project_id, project in index["projects"].items():
+            if "raw" in project:
+                yield project["raw"]["last_used"], project_id, "raw", None, project["raw"]["bytes"]
+            for kind in ("versions", "figures"):
+                for key, entry in project[kind].items():
+                    yield entry["last_used"], project_id, kind, key, entry["bytes"]
+
+    def _evict(self, index, protect=()):
+        # Frames already memory-mapped by a session stay readable after their
+        # file is removed; only new reads miss.
+        items = sorted(self._items(index))
+        total = sum(size for *_, size in items)
+        changed = False
+        for _, project_id, kind, key, size in items:
+            if total <= self.max_bytes:
+                break
+            project = index["projects"].get(project_id)
+            if project is None or (project_id, kind, key) in protect:
+                continue
+            if kind == "raw":
+                total -= sum(item[-1] for item in self._items({"projects": {project_id: project}}))
+                del index["projects"][project_id]
+                shutil.rmtree(self._project_dir(project_id), ignore_errors=True)
+            else:
+                entry = project[kind].pop(key)
+                self._remove_file(project_id, entry["file"])
+                total -= size
+            changed = True
+        if changed:
+            self._write_index(index)
+
+def _json_default(value):
+    # NumPy scalars in cleaning timings and figure metadata.
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+project_store = ProjectStore()
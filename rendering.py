@@ -0,0 +1,136 @@
+import inspect
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# Settings
+# ----------------------------
+# Above the point budget the browser gets a reduced figure. WebGL traces are
+# used up to WEBGL_FACTOR times the budget; beyond that points are decimated,
+# binned or sampled down to the budget.
+DEFAULT_POINT_BUDGET = 20_000
+WEBGL_FACTOR = 10
+DENSITY_BINS = 200
+
+STRATEGY_LABELS = {
+    "full": "Full resolution (SVG)",
+    "webgl": "WebGL traces",
+    "lttb": "LTTB decimation",
+    "minmax": "Min/max per bucket",
+    "density": "2D density binning",
+    "sample": "Uniform sample (WebGL)",
+}
+
+# Strategies each chart kind supports, in the order offered to the user.
+CHART_STRATEGIES = {
+    "scatter": ["full", "webgl", "density", "sample"],
+    "line": ["full", "webgl", "lttb", "minmax"],
+    "bubble": ["full", "webgl", "sample"],
+    "dot": ["full", "webgl", "sample"],
+}
+
+def choose_strategy(kind, n_rows, point_budget=DEFAULT_POINT_BUDGET, requested="auto"):
+    if requested != "auto":
+        if requested not in CHART_STRATEGIES[kind]:
+            raise ValueError(f"Unknown rendering strategy '{requested}' for {kind} charts. "
+                             f"Choose one of: auto, {', '.join(CHART_STRATEGIES[kind])}")
+        return requested
+    if n_rows <= point_budget:
+        return "full"
+    if kind == "line":
+        return "lttb"
+    if n_rows <= point_budget * WEBGL_FACTOR:
+        return "webgl"
+    return "density" if kind == "scatter" else "sample"
+
+def describe_strategy(strategy, n_rows, n_shown):
+    label = STRATEGY_LABELS[strategy]
+    if strategy in ("full", "webgl"):
+        return f"Rendering: {label}, {n_rows:,} points."
+    if strategy == "density":
+        return f"Rendering: {label} of {n_rows:,} points into a {n_shown:,}-cell grid."
+    return f"Rendering: {label}, {n_shown:,} of {n_rows:,} points."
+
+# ----------------------------
+# Reductions
+# ----------------------------
+def lttb_indices(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: keeps the first and last point and, per
+    # bucket, the point forming the largest triangle with the previously kept
+    # point and the average of the next bucket. x must be sorted.
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        next_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        bx, by = x[start:stop], y[start:stop]
+        area = np.abs((x[prev] - next_x) * (by - y[prev]) - (x[prev] - bx) * (next_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+def minmax_indices(x, y, n_out):
+    # Keeps the minimum and maximum y of each of n_out / 2 buckets, which
+    # preserves spikes that averaging would hide. x must be sorted.
+    n = len(y)
+    n_buckets = max(1, n_out // 2)
+    if n_out >= n:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    bucket = np.minimum((np.arange(n) * n_buckets) // n, n_buckets - 1)
+    starts = np.searchsorted(bucket, np.arange(n_buckets))
+    order = np.lexsort((y, bucket))
+    first = order[starts]
+    last = order[np.append(starts[1:], n) - 1]
+    return np.unique(np.concatenate([first, last, [0, n - 1]]))
+
+def decimate_line(df, x, y, color, n_out, method="lttb"):
+    # Decimates each color group separately, with the point budget shared in
+    # proportion to group size.
+    data = df[[c for c in dict.fromkeys([x, y, color]) if c is not None]].dropna(subset=[x, y])
+    groups = [(None, data)] if color is None else list(data.groupby(color, sort=False, observed=True))
+    reduce = lttb_indices if method == "lttb" else minmax_indices
+    parts = []
+    for _, group in groups:
+        group = group.sort_values(x, kind="stable")
+        budget = max(3, int(n_out * len(group) / max(len(data), 1)))
+        xs = group[x].to_numpy()
+        if np.issubdtype(xs.dtype, np.datetime64):
+            xs = xs.astype("datetime64[ns]").astype(np.int64)
+        parts.append(group.iloc[reduce(xs, group[y].to_numpy(), budget)])
+    return pd.concat(parts) if parts else data
+
+def bin_2d(df, x, y, bins=DENSITY_BINS):
+    # x and y may be the same column; it is selected once.
+    data = df[list(dict.fromkeys([x, y]))].dropna()
+    xs = data[x].to_numpy(dtype=np.float64)
+    ys = data[y].to_numpy(dtype=np.float64)
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=bins)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    # Empty cells are left blank rather than drawn as zero.
+    z = np.where(counts.T > 0, counts.T, np.nan)
+    return x_centers, y_centers, z
+
+def sample_rows(df, n, seed=0):
+    if len(df) <= n:
+        return df
+    return df.sample(n=n, random_state=seed)
+
+# ----------------------------
+# Code Snippets
+# ----------------------------
+def helper_source(*functions):
+    # Source of the reduction helpers, so the generated snippet runs on its own.
+    return "\n".join(inspect.getsource(f) for f in functions)
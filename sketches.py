@@ -0,0 +1,397 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# Settings
+# ----------------------------
+# Fast statistics read the frame once, chunk by chunk, into fixed-size
+# sketches, so memory stays bounded however many rows there are. Counts,
+# means, standard deviations, minima and maxima stay exact; quantiles,
+# distinct counts, top values and duplicates are estimates with error bounds.
+SKETCH_CHUNK_ROWS = 1_000_000
+KLL_K = 200
+# Above this many values per column, quantile sketches first keep one random
+# value per block of rows, so the work per chunk follows the sample size.
+KLL_MIN_SAMPLE = 65_536
+HLL_PRECISION = 14
+CMS_EPSILON = 0.001
+CMS_DELTA = 0.01
+# Candidates for the most frequent value are drawn from this many rows per chunk.
+TOP_CANDIDATE_ROWS = 10_000
+TOP_CANDIDATES = 64
+DUPLICATE_MAX_HASHES = 1_000_000
+
+_HASH_PRIME = np.uint64(0x100000001B3)
+
+# ----------------------------
+# Quantiles
+# ----------------------------
+class KLLSketch:
+    # Quantile sketch after Karnin, Lang & Liberty: an item on level h stands
+    # for 2**h input values. Each level is a compactor; when it is over
+    # capacity it is sorted and every other item (random offset) moves up a
+    # level, so memory stays O(k). Large inputs go through the sampler of the
+    # same paper first, which keeps one random value per block of 2**h rows.
+
+    def __init__(self, k=KLL_K, min_sample=KLL_MIN_SAMPLE, seed=0):
+        self.k = k
+        self.min_sample = min_sample
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.compacted = False
+        # Sum of squared block sizes of sampled blocks, for the sampler's error.
+        self._sampled_weight_sq = 0.0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.n += values.size
+        level = max(0, int(np.log2(self.n / self.min_sample))) if self.n > self.min_sample else 0
+        block = 1 << level
+        blocks = values.size // block
+        if level > 0 and blocks > 0:
+            picks = np.arange(blocks) * block + self._rng.integers(0, block, blocks)
+            self._add(level, values[picks])
+            self._sampled_weight_sq += blocks * float(block) ** 2
+            values = values[blocks * block:]
+        self._add(0, values)
+        self._compress()
+
+    def _add(self, level, items):
+        while len(self.levels) <= level:
+            self.levels.append(np.empty(0))
+        self.levels[level] = np.concatenate([self.levels[level], items])
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        changed = True
+        while changed:
+            changed = False
+            for level in range(len(self.levels)):
+                items = self.levels[level]
+                if items.size <= self._capacity(level):
+                    continue
+                items = np.sort(items)
+                # An odd item stays behind so the total weight is unchanged.
+                start = items.size % 2
+                offset = int(self._rng.integers(2))
+                self.levels[level] = items[:start]
+                self._add(level + 1, items[start + offset::2])
+                self.compacted = True
+                changed = True
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if items.size == 0:
+            return [np.nan] * len(qs)
+        weights = np.concatenate([np.full(level.size, 1 << h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        ranks = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side="left")
+        return list(items[np.minimum(ranks, items.size - 1)])
+
+    @property
+    def rank_error(self):
+        # Normalized rank error at 99% confidence: the compactors' bound as
+        # published for KLL sketches, plus the sampler's (each sampled block
+        # of w rows is off by at most w, with variance w**2 / 4).
+        error = 2.296 / self.k ** 0.9723 if self.compacted else 0.0
+        if self._sampled_weight_sq:
+            error += 2.576 * np.sqrt(self._sampled_weight_sq) / (2 * self.n)
+        return error
+
+# ----------------------------
+# Distinct Counts
+# ----------------------------
+class HyperLogLog:
+    # Distinct count from 64-bit hashes: the top bits pick a register, which
+    # keeps the longest run of leading zeros seen in the remaining bits.
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, hashes):
+        if hashes.size == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        bit_length = np.zeros(hashes.size, dtype=np.int64)
+        nonzero = rest > 0
+        bit_length[nonzero] = np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.int64) + 1
+        rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small cardinalities: linear counting is more accurate.
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    @property
+    def relative_error(self):
+        # 95% confidence.
+        return 1.96 * 1.04 / np.sqrt(self.m)
+
+# ----------------------------
+# Frequencies
+# ----------------------------
+class CountMinSketch:
+    # Frequencies from 64-bit hashes. Estimates never undercount, and
+    # overcount by at most epsilon * n with probability 1 - delta.
+
+    def __init__(self, epsilon=CMS_EPSILON, delta=CMS_DELTA):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = int(np.ceil(np.e / epsilon))
+        self.depth = int(np.ceil(np.log(1 / delta)))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.n = 0
+
+    def _columns(self, hashes):
+        # Row hashes derived from two halves of one hash (Kirsch & Mitzenmacher).
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = hashes >> np.uint64(32)
+        for row in range(self.depth):
+            yield row, ((low + np.uint64(row) * high) % np.uint64(self.width)).astype(np.intp)
+
+    def update(self, hashes):
+        for row, columns in self._columns(hashes):
+            self.table[row] += np.bincount(columns, minlength=self.width)
+        self.n += hashes.size
+
+    def query(self, hashes):
+        estimates = np.full(hashes.size, np.iinfo(np.int64).max)
+        for row, columns in self._columns(hashes):
+            estimates = np.minimum(estimates, self.table[row, columns])
+        return estimates
+
+    @property
+    def error(self):
+        return int(np.ceil(self.epsilon * self.n))
+
+# ----------------------------
+# Duplicates
+# ----------------------------
+class DuplicateEstimator:
+    # Duplicate rows from row hashes by hash-based sampling: a row is kept when
+    # its hash is a multiple of `rate`, so every copy of a row is kept or
+    # dropped together. Duplicates among the kept rows, times the rate,
+    # estimate the total; the rate doubles whenever the kept distinct hashes
+    # would exceed the cap.
+
+    def __init__(self, max_hashes=DUPLICATE_MAX_HASHES):
+        self.max_hashes = max_hashes
+        self.rate = 1
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    def update(self, row_hashes):
+        kept = row_hashes[(row_hashes & np.uint64(self.rate - 1)) == 0]
+        if kept.size == 0:
+            return
+        hashes, inverse = np.unique(np.concatenate([self.hashes, kept]), return_inverse=True)
+        weights = np.concatenate([self.counts, np.ones(kept.size, dtype=np.int64)])
+        counts = np.bincount(inverse, weights=weights, minlength=hashes.size).astype(np.int64)
+        while hashes.size > self.max_hashes:
+            self.rate *= 2
+            keep = (hashes & np.uint64(self.rate - 1)) == 0
+            hashes, counts = hashes[keep], counts[keep]
+        self.hashes, self.counts = hashes, counts
+
+    def estimate(self):
+        # (estimate, 95% bound). Each distinct row with c copies is sampled
+        # with probability 1 / rate and contributes c - 1 duplicates.
+        extra = self.counts - 1
+        estimate = self.rate * int(extra.sum())
+        if self.rate == 1:
+            return estimate, 0
+        variance = self.rate ** 2 * (1 - 1 / self.rate) * float((extra.astype(np.float64) ** 2).sum())
+        # With no duplicates sampled, the rule of three still bounds the total.
+        return estimate, int(max(1.96 * np.sqrt(variance), 3 * self.rate))
+
+# ----------------------------
+# Frame Sketch
+# ----------------------------
+class FrameSketch:
+    # Fast statistics for a whole frame, in the layout of describe(), plus
+    # the error bound of every estimate.
+
+    def __init__(self, rows, numeric, categorical, duplicates, dtypes, non_null, memory_bytes):
+        self.rows = rows
+        self.numeric = numeric
+        self.categorical = categorical
+        self.duplicates = duplicates
+        self.dtypes = dtypes
+        self.non_null = non_null
+        self.memory_bytes = memory_bytes
+
+    def info_text(self):
+        # The summary of DataFrame.info(), from the counts gathered in the
+        # sketch pass; memory usage is shallow, as info() reports by default.
+        table = pd.DataFrame({
+            "Column": list(self.dtypes),
+            "Non-Null Count": [f"{self.non_null[col]:,} non-null" for col in self.dtypes],
+            "Dtype": [str(dtype) for dtype in self.dtypes.values()],
+        })
+        dtype_counts = table["Dtype"].value_counts(sort=False)
+        return "\n".join([
+            f"{self.rows:,} entries, {len(table)} columns",
+            table.to_string(),
+            "dtypes: " + ", ".join(f"{dtype}({n})" for dtype, n in sorted(dtype_counts.items())),
+            f"memory usage: {self.memory_bytes / (1024 * 1024):,.1f}+ MB",
+        ]) + "\n"
+
+    def describe_numeric(self):
+        rows = {}
+        for col, s in self.numeric.items():
+            n, mean, m2, vmin, vmax = s["moments"]
+            q25, q50, q75 = s["kll"].quantiles([0.25, 0.5, 0.75]) if n else (np.nan,) * 3
+            rows[col] = {
+                "count": n,
+                "mean": mean if n else np.nan,
+                "std": np.sqrt(m2 / (n - 1)) if n > 1 else np.nan,
+                "min": vmin,
+                "25%": q25,
+                "50%": q50,
+                "75%": q75,
+                "max": vmax,
+                "quantile rank ±": f"{s['kll'].rank_error:.2%}",
+            }
+        return pd.DataFrame(rows)
+
+    def describe_categorical(self):
+        rows = {}
+        for col, s in self.categorical.items():
+            rows[col] = {
+                "count": s["count"],
+                "unique": s["unique"],
+                "unique ±": f"{s['unique_error']:.1%}",
+                "top": s["top"],
+                "freq": s["freq"],
+                "freq overcount ≤": s["freq_error"],
+            }
+        return pd.DataFrame(rows)
+
+def _merge_moments(moments, values):
+    # Exact running count, mean, M2, min and max (Chan et al.).
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return moments
+    n_b, mean_b = values.size, values.mean()
+    m2_b = ((values - mean_b) ** 2).sum()
+    n_a, mean_a, m2_a, min_a, max_a = moments
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    return (
+        n,
+        mean_a + delta * n_b / n,
+        m2_a + m2_b + delta ** 2 * n_a * n_b / n,
+        min(min_a, values.min()),
+        max(max_a, values.max()),
+    )
+
+def _hash_values(values):
+    # Without categorize, text is hashed directly instead of being factorized
+    # first, which only pays off for low-cardinality columns.
+    return pd.util.hash_array(np.asarray(values, dtype=object), categorize=False)
+
+def _hash_column(s):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return pd.util.hash_pandas_object(s, index=False).to_numpy()
+    values = s.to_numpy()
+    return _hash_values(values) if values.dtype == object else pd.util.hash_array(values)
+
+def sketch_frame(df, chunk_rows=SKETCH_CHUNK_ROWS):
+    numeric_cols = list(df.select_dtypes(include=np.number).columns)
+    categorical_cols = list(df.select_dtypes(include=['object', 'category']).columns)
+    numeric = {
+        col: {"moments": (0, 0.0, 0.0, np.inf, -np.inf), "kll": KLLSketch(seed=i)}
+        for i, col in enumerate(numeric_cols)
+    }
+    categorical = {}
+    for col in categorical_cols:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            # Category codes are counted exactly; no sketch needed.
+            categorical[col] = {"codes": np.zeros(len(df[col].cat.categories), dtype=np.int64)}
+        else:
+            categorical[col] = {"hll": HyperLogLog(), "cms": CountMinSketch(), "candidates": {}}
+    non_null = dict.fromkeys(df.columns, 0)
+    duplicates = DuplicateEstimator()
+
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        row_hashes = np.zeros(len(chunk), dtype=np.uint64)
+        for col in chunk.columns:
+            s = chunk[col]
+            present = s.notna().to_numpy()
+            non_null[col] += int(np.count_nonzero(present))
+            hashes = _hash_column(s)
+            row_hashes = (row_hashes ^ hashes) * _HASH_PRIME
+            if col in numeric:
+                values = s.to_numpy(dtype=np.float64, na_value=np.nan)
+                numeric[col]["moments"] = _merge_moments(numeric[col]["moments"], values)
+                numeric[col]["kll"].update(values)
+            elif col in categorical:
+                state = categorical[col]
+                if "codes" in state:
+                    codes = s.cat.codes.to_numpy()
+                    state["codes"] += np.bincount(codes[codes >= 0], minlength=state["codes"].size)
+                    continue
+                hashes = hashes[present]
+                state["hll"].update(hashes)
+                state["cms"].update(hashes)
+                # Frequent values are very likely in an evenly spaced sample;
+                # their counts come from the Count-Min sketch.
+                values = s[present]
+                step = max(1, len(values) // TOP_CANDIDATE_ROWS)
+                for value in values.iloc[::step].value_counts().index[:TOP_CANDIDATES]:
+                    state["candidates"].setdefault(value, None)
+                if len(state["candidates"]) > TOP_CANDIDATES:
+                    candidates = list(state["candidates"])
+                    estimates = state["cms"].query(_hash_values(candidates))
+                    best = np.argsort(-estimates, kind="stable")[:TOP_CANDIDATES]
+                    state["candidates"] = dict.fromkeys(candidates[i] for i in best)
+        duplicates.update(row_hashes)
+
+    categorical_stats = {}
+    for col, state in categorical.items():
+        if "codes" in state:
+            counts = state["codes"]
+            top = int(np.argmax(counts)) if counts.size else None
+            categorical_stats[col] = {
+                "count": non_null[col],
+                "unique": int(np.count_nonzero(counts)),
+                "unique_error": 0.0,
+                "top": df[col].cat.categories[top] if top is not None and counts[top] else None,
+                "freq": int(counts[top]) if top is not None else 0,
+                "freq_error": 0,
+            }
+            continue
+        candidates = list(state["candidates"])
+        estimates = state["cms"].query(_hash_values(candidates)) if candidates else np.empty(0, dtype=np.int64)
+        top = int(np.argmax(estimates)) if candidates else None
+        categorical_stats[col] = {
+            "count": non_null[col],
+            "unique": state["hll"].estimate(),
+            "unique_error": state["hll"].relative_error,
+            "top": candidates[top] if top is not None else None,
+            "freq": int(estimates[top]) if top is not None else 0,
+            "freq_error": state["cms"].error,
+        }
+    return FrameSketch(
+        len(df), numeric, categorical_stats, duplicates.estimate(),
+        dtypes=df.dtypes.to_dict(), non_null=non_null,
+        memory_bytes=int(df.memory_usage(index=True, deep=False).sum()),
+    )
@@ -0,0 +1,165 @@
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# Settings
+# ----------------------------
+# A column's type is decided on an evenly spaced sample of its non-null values.
+# Only the winning candidate is then applied to the whole column, vectorized
+# and with an explicit format, so no per-value format guessing or exception
+# handling runs over millions of rows.
+INFERENCE_SAMPLE_SIZE = 1000
+# Share of the column's non-null values that may fail to parse (they become
+# NaN / NaT), per kind. A candidate must also parse this share of the sample
+# to be tried. Numeric conversion is lossless: a column with any value that
+# is not a number stays text, as it did before inference.
+MAX_FAILED_FRACTION = {"numeric": 0.0, "datetime": 0.01}
+DATETIME_PROBE_SIZE = 20
+
+# Tried in order; on a tie the earlier format wins (month-first before
+# day-first, as pandas does). "ISO8601" covers dates with or without a time,
+# "T" separator, fractional seconds and UTC offsets.
+DATETIME_FORMATS = [
+    "ISO8601",
+    "%Y/%m/%d", "%Y/%m/%d %H:%M", "%Y/%m/%d %H:%M:%S",
+    "%m/%d/%Y", "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S", "%m/%d/%Y %I:%M %p", "%m/%d/%y",
+    "%d/%m/%Y", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%y",
+    "%m-%d-%Y", "%d-%m-%Y", "%d.%m.%Y", "%d.%m.%Y %H:%M", "%d.%m.%Y %H:%M:%S",
+    "%d %b %Y", "%d %B %Y", "%d-%b-%Y", "%d-%b-%y",
+    "%b %d, %Y", "%B %d, %Y", "%b %d %Y", "%B %d %Y",
+    "%a, %d %b %Y %H:%M:%S",
+]
+
+# Cheap shape check run before any format is tried: digit groups separated by
+# - / . (2024-01-31, 31/01/2024) or a month name next to a day number
+# (31 Jan 2024, January 31, 2024). Plain text columns fail it and are skipped.
+_DATE_SHAPE = re.compile(
+    r"^\s*(\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}"
+    r"|\d{1,2}[ -][A-Za-z]{3,9}[ -]\d{2,4}"
+    r"|[A-Za-z]{3,9},? \d{1,2}"
+    r"|[A-Za-z]{3}, \d{1,2} [A-Za-z]{3})"
+)
+
+# ----------------------------
+# Sampling
+# ----------------------------
+def sample_values(s, size=INFERENCE_SAMPLE_SIZE):
+    # Evenly spaced rather than the first rows, so a column that only turns
+    # to text (or to another date format) further down is still caught. Rows
+    # are picked before nulls are dropped; mostly-empty columns fall back to
+    # scanning for their non-null values.
+    if len(s) > size:
+        sample = s.iloc[np.linspace(0, len(s) - 1, size).astype(np.int64)].dropna()
+        if len(sample) >= size // 2:
+            return sample
+    values = s.dropna()
+    if len(values) > size:
+        values = values.iloc[np.linspace(0, len(values) - 1, size).astype(np.int64)]
+    return values
+
+def _parsed_share(parsed):
+    return float(parsed.notna().mean()) if len(parsed) else 0.0
+
+def _to_datetime(values, fmt):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            return pd.to_datetime(values, format=fmt, errors="coerce")
+        except (ValueError, TypeError):
+            # Mixed UTC offsets and similar cases pandas refuses outright.
+            return None
+
+# ----------------------------
+# Inference
+# ----------------------------
+def infer_numeric(sample):
+    confidence = _parsed_share(pd.to_numeric(sample, errors="coerce"))
+    return {"kind": "numeric", "format": None, "confidence": confidence}
+
+def infer_datetime(sample):
+    best = {"kind": "datetime", "format": None, "confidence": 0.0}
+    if pd.api.types.infer_dtype(sample, skipna=True) != "string":
+        return best
+    strings = sample.astype(str)
+    if strings.str.match(_DATE_SHAPE).mean() < 1 - MAX_FAILED_FRACTION["datetime"]:
+        return best
+    # Formats are screened on a few values first; parsing failures are the
+    # slow path in pandas, so most formats never see the full sample.
+    probe = strings.iloc[:DATETIME_PROBE_SIZE]
+    for fmt in DATETIME_FORMATS:
+        parsed = _to_datetime(probe, fmt)
+        if parsed is None or parsed.isna().sum() > 1:
+            continue
+        parsed = _to_datetime(strings, fmt)
+        confidence = _parsed_share(parsed) if parsed is not None else 0.0
+        if confidence > best["confidence"]:
+            best = {"kind": "datetime", "format": fmt, "confidence": confidence}
+            if confidence == 1.0:
+                break
+    return best
+
+INFERRERS = {"numeric": infer_numeric, "datetime": infer_datetime}
+
+def infer_type(s, kinds=("numeric", "datetime"), sample_size=INFERENCE_SAMPLE_SIZE):
+    # Best candidate among `kinds` for a text or category column, as a dict
+    # with kind, format and confidence (the share of sampled values it parsed).
+    # kind is "text" when no candidate parses enough of the sample.
+    sample = sample_values(s, sample_size)
+    if isinstance(sample.dtype, pd.CategoricalDtype):
+        sample = sample.astype(object)
+    best = {"kind": "text", "format": None, "confidence": 0.0}
+    if len(sample) == 0:
+        return best
+    for kind in kinds:
+        candidate = INFERRERS[kind](sample)
+        if candidate["confidence"] >= 1 - MAX_FAILED_FRACTION[kind] and candidate["confidence"] > best["confidence"]:
+            best = candidate
+    return best
+
+# ----------------------------
+# Conversion
+# ----------------------------
+def _convert_values(values, inference):
+    if inference["kind"] == "numeric":
+        return pd.to_numeric(values, errors="coerce")
+    return _to_datetime(values, inference["format"])
+
+def convert_column(s, inference):
+    # Applies an inference to the full column. Returns the converted column
+    # and the share of non-null values that failed to parse, or (None, share)
+    # when that share is over MAX_FAILED_FRACTION and the column should stay
+    # as it is.
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, uniques = s.cat.codes.to_numpy(), s.cat.categories.astype(object)
+    else:
+        # Hashing the strings is several times cheaper than parsing them, and
+        # dates and amounts repeat a lot, so each distinct value is parsed
+        # once and spread back through the codes.
+        codes, uniques = pd.factorize(s)
+    parsed = _convert_values(pd.Series(uniques), inference)
+    if parsed is None:
+        return None, 1.0
+    present = codes != -1
+    converted = pd.Series(parsed.take(np.maximum(codes, 0)).array, index=s.index, name=s.name)
+    if not present.all():
+        converted = converted.where(present)
+    failed = int(np.count_nonzero(parsed.isna().to_numpy()[codes] & present))
+    non_null = int(np.count_nonzero(present))
+    failed_fraction = failed / non_null if non_null else 0.0
+    if failed_fraction > MAX_FAILED_FRACTION[inference["kind"]]:
+        return None, failed_fraction
+    return converted, failed_fraction
+
+def infer_and_convert(s, kinds=("numeric", "datetime")):
+    # Returns (converted column or None, report). The report is the inference
+    # plus failed_fraction; converted is None when the column stays text.
+    inference = infer_type(s, kinds)
+    if inference["kind"] == "text":
+        return None, dict(inference, failed_fraction=0.0)
+    converted, failed_fraction = convert_column(s, inference)
+    if converted is None:
+        return None, dict(inference, kind="text", failed_fraction=failed_fraction)
+    return converted, dict(inference, failed_fraction=failed_fraction)